@@ -0,0 +1,127 @@
+"""
+Benchmark: recall and speed of MinHash LSH title blocking
+
+1. In memory: indexes N synthetic titles in a TitleBlocker and queries it
+   with misspelled copies of some of them (character typos, a dropped
+   word, changed case and punctuation). For each query the best match by
+   title_similarity over the blocked candidates is compared with the
+   exhaustive best match over all N titles. Reported per (bands, rows)
+   setting: average candidates per query, time per query and recall (share
+   of queries where blocking finds the exhaustive best match).
+2. Mirror: builds a SQLite mirror with and without --mirror-blocking and
+   reports how often the misspelled title (with its first author) still
+   brings the cited work among the candidates.
+
+Usage: python benchmarks/bench_blocking.py [N] [QUERIES]   (defaults 5000, 300)
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+SETTINGS = [(8, 8), (16, 4), (20, 3), (32, 2)]
+
+
+def misspell(title, rnd):
+    """A copy of title with typos, maybe a dropped word and changed case/punctuation"""
+    chars = list(title)
+    for _ in range(rnd.randint(1, 3)):
+        i = rnd.randrange(len(chars))
+        edit = rnd.random()
+        if edit < 0.4:
+            chars[i] = rnd.choice("abcdefghijklmnopqrstuvwxyz")
+        elif edit < 0.7:
+            del chars[i]
+        elif i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    words = "".join(chars).split()
+    if len(words) > 4 and rnd.random() < 0.3:
+        del words[rnd.randrange(len(words))]
+    text = " ".join(words)
+    return text.upper() if rnd.random() < 0.1 else text.rstrip(".") + "."
+
+
+def best_match(query, titles, keys):
+    best, best_sim = None, -1.0
+    for key in keys:
+        sim = vb.title_similarity_at_least(query, titles[key], max(best_sim, 0.0) + 1e-9)
+        if sim is not None and sim > best_sim:
+            best, best_sim = key, sim
+    return best, best_sim
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rnd = random.Random(3)
+    references = []
+    seen = set()
+    for text in make_references(n * 2):
+        parsed = vb.parse_reference(text)
+        if parsed.title and parsed.ref_type != "ancient_text" and vb.normalize_title(parsed.title) not in seen:
+            seen.add(vb.normalize_title(parsed.title))
+            references.append(parsed)
+        if len(references) == n:
+            break
+    titles = [parsed.title for parsed in references]
+    sources = rnd.sample(range(len(titles)), min(n_queries, len(titles)))
+    queries = [misspell(titles[i], rnd) for i in sources]
+
+    start = time.perf_counter()
+    exhaustive = [best_match(query, titles, range(len(titles))) for query in queries]
+    exhaustive_time = (time.perf_counter() - start) / len(queries)
+    print(f"Titles: {len(titles):,} | misspelled queries: {len(queries):,}")
+    print(f"Exhaustive title_similarity: {exhaustive_time * 1e3:.2f} ms/query, "
+          f"finds the source title for {sum(best == i for (best, _), i in zip(exhaustive, sources)) / len(queries):.1%}")
+
+    for bands, rows in SETTINGS:
+        blocker = vb.TitleBlocker(bands=bands, rows=rows)
+        start = time.perf_counter()
+        for key, title in enumerate(titles):
+            blocker.add(key, title)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        candidate_counts, agree = [], 0
+        for query, (best, best_sim) in zip(queries, exhaustive):
+            keys = blocker.candidates(query)
+            candidate_counts.append(len(keys))
+            found, found_sim = best_match(query, titles, keys)
+            agree += found == best or found_sim == best_sim
+        query_time = (time.perf_counter() - start) / len(queries)
+        print(f"bands={bands:>2} rows={rows}: index {build_time:5.2f} s | "
+              f"{sum(candidate_counts) / len(queries):7.1f} candidates/query | "
+              f"{query_time * 1e3:6.2f} ms/query | recall {agree / len(queries):6.1%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "dump.jsonl")
+        with open(dump, "w", encoding="utf-8") as f:
+            for i, parsed in enumerate(references):
+                f.write(json.dumps({"DOI": f"10.5555/ref.{i}", "title": [parsed.title],
+                                    "author": [{"family": parsed.first_author or "Anonymous"}]}) + "\n")
+        vb.MIRROR_BUILD_BATCH = 10 ** 9  # no progress lines
+        for label, blocker in [("plain", None), ("blocking", vb.TitleBlocker())]:
+            path = os.path.join(tmp, f"{label}.sqlite")
+            vb.CrossrefMirror.build(path, [dump], blocker=blocker)
+            mirror = vb.CrossrefMirror(path)
+            found = 0
+            start = time.perf_counter()
+            for query, i in zip(queries, sources):
+                ok, candidates = mirror.check(query, references[i].first_author)
+                found += ok and any(work["DOI"] == f"10.5555/ref.{i}" for work in candidates)
+            query_time = (time.perf_counter() - start) / len(queries)
+            mirror.close()
+            print(f"Mirror ({label}): {os.path.getsize(path) / 2**20:.1f} MiB | {query_time * 1e3:.2f} ms/query | "
+                  f"cited work among candidates for misspelled titles: {found / len(queries):.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
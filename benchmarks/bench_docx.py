@@ -0,0 +1,94 @@
+"""
+Benchmark: reading references from a long Word document
+
+Writes a dissertation-sized .docx (body paragraphs made of several
+formatted runs, tables, then a References section of synthetic references)
+and reads it with read_references using the python-docx object model and
+the streaming reader. Each reader runs in a fresh subprocess so the peak
+RSS is its own. Reports time, peak RSS and whether both readers return the
+same references, and checks iter_docx_paragraphs against python-docx's
+paragraph text for the whole document.
+
+Usage: python benchmarks/bench_docx.py [BODY_PARAGRAPHS] [REFERENCES]   (defaults 20000, 1000)
+"""
+
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from bench_suite import peak_rss_mib  # noqa: E402
+from synthetic import WORDS, make_references  # noqa: E402
+
+
+def make_dissertation(path, n_body, references):
+    from docx import Document
+
+    rnd = random.Random(9)
+    document = Document()
+    document.add_heading("1. Introduction", 1)
+    for i in range(n_body):
+        paragraph = document.add_paragraph()
+        for _ in range(rnd.randint(2, 6)):
+            run = paragraph.add_run(" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 15))) + " ")
+            run.bold = rnd.random() < 0.1
+            run.italic = rnd.random() < 0.1
+        if rnd.random() < 0.2:
+            paragraph.add_run(f"(Smith, {rnd.randint(1990, 2024)}).")
+        if i % 500 == 499:
+            table = document.add_table(rows=4, cols=3)
+            for cell in table._cells:
+                cell.text = " ".join(rnd.choice(WORDS) for _ in range(3))
+    document.add_heading("References", 1)
+    for reference in references:
+        document.add_paragraph(reference)
+    document.save(path)
+
+
+def read_once(path, reader):
+    """Subprocess side: time one read_references call and report peak RSS"""
+    start = time.perf_counter()
+    references = vb.read_references(path, reader)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "references": len(references),
+                      "peak_rss_mib": peak_rss_mib(),
+                      "sha256": hashlib.sha256("\n".join(references).encode("utf-8")).hexdigest()}))
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--read":
+        read_once(sys.argv[2], sys.argv[3])
+        return 0
+    n_body = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_refs = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dissertation.docx")
+        make_dissertation(path, n_body, make_references(n_refs))
+        print(f"Document: {n_body:,} body paragraphs + {n_refs:,} references "
+              f"({os.path.getsize(path) / 2**20:.1f} MiB .docx)")
+
+        from docx import Document
+        same_text = [p.text for p in Document(path).paragraphs] == list(vb.iter_docx_paragraphs(path))
+        print(f"Streamed paragraph text identical to python-docx: {same_text}")
+
+        digests = set()
+        for reader in ["python-docx", "stream"]:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--read", path, reader],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            digests.add(result["sha256"])
+            print(f"{reader:<12} {result['seconds']:6.2f} s | peak RSS {result['peak_rss_mib']:6.1f} MiB | "
+                  f"{result['references']:,} references")
+        print(f"Same references from both readers: {len(digests) == 1}")
+    return 0 if same_text and len(digests) == 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
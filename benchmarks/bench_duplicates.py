@@ -0,0 +1,84 @@
+"""
+Benchmark: duplicate-citation detection on large bibliographies
+
+Builds a synthetic bibliography with a share of repeated citations (exact
+copies, misspelled titles, years off by one, upper-cased titles, DOI
+repeats), runs find_duplicate_references on it and reports the time taken,
+how many reference pairs were compared (against n(n-1)/2 for an exhaustive
+pass), and precision and recall of the flagged duplicates.
+
+Usage: python benchmarks/bench_duplicates.py [N] [DUPLICATE_SHARE]   (defaults 5000, 0.1)
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from bench_blocking import misspell  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+
+def duplicate_of(text, parsed, rnd):
+    """A second citation of the same work, written a little differently"""
+    if parsed.title and rnd.random() < 0.6:
+        text = text.replace(parsed.title, misspell(parsed.title, rnd).rstrip("."), 1)
+    if parsed.year and parsed.year.isdigit() and rnd.random() < 0.3:
+        text = text.replace(f"({parsed.year})", f"({int(parsed.year) + 1})", 1)
+    return text
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    rnd = random.Random(11)
+    originals = make_references(int(n * (1 - share)))
+    texts = list(originals)
+    sources = [None] * len(texts)
+    while len(texts) < n:
+        i = rnd.randrange(len(originals))
+        parsed = vb.parse_reference(originals[i])
+        if parsed.ref_type == "ancient_text" or not (parsed.doi or (parsed.title and parsed.first_author)):
+            continue
+        position = rnd.randrange(i + 1, len(texts) + 1)
+        texts.insert(position, duplicate_of(originals[i], parsed, rnd))
+        sources.insert(position, originals[i])
+    parsed_references = [vb.parse_reference(text) for text in texts]
+
+    compared = 0
+    same_cited_work = vb.same_cited_work
+
+    def counting(a, b, min_similarity=None):
+        nonlocal compared
+        compared += 1
+        return same_cited_work(a, b, min_similarity)
+
+    vb.same_cited_work = counting
+    start = time.perf_counter()
+    found = vb.find_duplicate_references(parsed_references)
+    elapsed = time.perf_counter() - start
+    vb.same_cited_work = same_cited_work
+
+    # A flagged entry is correct when it and its cluster head render the same original work
+    original_of = {text: text for text in originals}
+    for text, source in zip(texts, sources):
+        if source is not None:
+            original_of[text] = source
+    flagged = [i for i, first in enumerate(found) if first is not None]
+    correct = sum(1 for i in flagged if original_of[texts[i]] == original_of[texts[found[i]]])
+    injected = sum(1 for source in sources if source is not None)
+    # Synthetic originals can themselves repeat a work (same DOI), so count every later copy
+    expected = len(texts) - len({original_of[text] for text in texts})
+    print(f"References: {len(texts):,} ({injected:,} injected duplicates)")
+    print(f"find_duplicate_references: {elapsed:.2f} s | pairs compared {compared:,} "
+          f"(exhaustive: {len(texts) * (len(texts) - 1) // 2:,})")
+    print(f"Flagged {len(flagged):,} | precision {correct / max(1, len(flagged)):.1%} | "
+          f"recall {correct / max(1, expected):.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
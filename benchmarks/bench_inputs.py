@@ -0,0 +1,100 @@
+"""
+Benchmark: reading BibTeX, RIS and plain-text bibliographies
+
+Writes the same N synthetic references as a BibTeX file, a RIS file and a
+plain-text file (one reference per line, preceded by body text that must
+be skipped), then reads each with load_references. BibTeX and RIS fields
+are used directly; plain text still goes through parse_reference, which is
+timed separately. Reports time and peak traced memory per format and
+checks that the structured readers return the cited title and first author
+of every entry. Memory is measured in a second, traced pass, since
+tracemalloc slows pure-Python parsing down several times.
+
+Usage: python benchmarks/bench_inputs.py [N]   (default 100000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+
+def entries_for(references):
+    """Fields of the synthetic references (from the APA extraction), skipping ones without a title"""
+    entries = []
+    for text in references:
+        parsed = vb.parse_reference(text)
+        if parsed.title and parsed.first_author and parsed.year:
+            entries.append(parsed)
+    return entries
+
+
+def write_bibtex(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, parsed in enumerate(entries):
+            kind = "book" if parsed.ref_type == "book" else "article"
+            authors = " and ".join(f"{name}, A." for name in parsed.all_authors or (parsed.first_author,))
+            doi = f"  doi = {{{parsed.doi}}},\n" if parsed.doi else ""
+            f.write(f"@{kind}{{ref{i},\n  author = {{{authors}}},\n  title = {{{parsed.title}}},\n"
+                    f"  year = {parsed.year},\n  journal = {{Journal of Things}},\n{doi}}}\n\n")
+
+
+def write_ris(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        for parsed in entries:
+            f.write("TY  - " + ("BOOK" if parsed.ref_type == "book" else "JOUR") + "\n")
+            for name in parsed.all_authors or (parsed.first_author,):
+                f.write(f"AU  - {name}, A.\n")
+            f.write(f"TI  - {parsed.title}\nPY  - {parsed.year}\n")
+            if parsed.doi:
+                f.write(f"DO  - {parsed.doi}\n")
+            f.write("ER  - \n\n")
+
+
+def measure(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {elapsed:7.2f} s | peak traced {peak / 2**20:7.1f} MiB")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    references = make_references(n)
+    entries = entries_for(references)
+    with tempfile.TemporaryDirectory() as tmp:
+        bib, ris, txt = (os.path.join(tmp, f"refs.{ext}") for ext in ("bib", "ris", "txt"))
+        write_bibtex(bib, entries)
+        write_ris(ris, entries)
+        with open(txt, "w", encoding="utf-8") as f:
+            f.write("Body text citing (Smith, 2020) and (Lee, 2019).\n" * 1000 + "References\n")
+            f.write("\n".join(references) + "\n")
+        print(f"{n:,} references ({len(entries):,} with title, author and year as BibTeX/RIS) | "
+              f"bib {os.path.getsize(bib) / 2**20:.1f} MiB, ris {os.path.getsize(ris) / 2**20:.1f} MiB, "
+              f"txt {os.path.getsize(txt) / 2**20:.1f} MiB")
+
+        mismatches = 0
+        for label, path in [("BibTeX (fields, no regex)", bib), ("RIS (fields, no regex)", ris)]:
+            _, parsed = measure(label, lambda: vb.load_references(path))
+            mismatches += sum(1 for got, want in zip(parsed, entries)
+                              if (got.title, got.first_author, got.year) != (want.title, want.first_author, want.year))
+            mismatches += abs(len(parsed) - len(entries))
+        texts, _ = measure("Plain text (streamed lines)", lambda: vb.load_references(txt))
+        measure("  + parse_reference on each line", lambda: [vb.parse_reference(text) for text in texts])
+        print(f"Plain-text references kept: {len(texts):,} of {n:,} | structured field mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
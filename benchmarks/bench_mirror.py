@@ -0,0 +1,110 @@
+"""
+Benchmark: local CrossRef mirror build time, query latency and recall
+
+Writes a synthetic CrossRef dump (JSON Lines) with one work per synthetic
+reference plus unrelated distractor works, builds both mirror formats from
+it (SQLite and memory-mapped compact), then queries each with every
+reference the way check_crossref_candidates does (DOI lookup, or title +
+first author + year search). Reports build time, on-disk size, query
+latency percentiles, how often the cited work is among the returned
+candidates (recall) and how often rank_candidates picks it, and checks that
+both formats return the same candidates.
+
+Usage: python benchmarks/bench_mirror.py [N] [DISTRACTORS]   (defaults 20000, 100000)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+
+def work_for(parsed, doi):
+    work = {"DOI": doi, "title": [parsed.title or ""],
+            "author": [{"family": parsed.first_author or "Anonymous", "given": "A."}]}
+    if parsed.year and parsed.year.isdigit():
+        work["issued"] = {"date-parts": [[int(parsed.year)]]}
+    return work
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def disk_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def measure(mirror, references, expected):
+    latencies, found, picked, answers = [], 0, 0, []
+    for parsed, doi in zip(references, expected):
+        if parsed.ref_type == "ancient_text" or not (parsed.doi or parsed.title):
+            continue
+        start = time.perf_counter()
+        ok, candidates = mirror.check(parsed.title, parsed.first_author, parsed.year, parsed.doi)
+        latencies.append(time.perf_counter() - start)
+        answers.append(candidates)
+        if not ok:
+            continue
+        dois = [work["DOI"].lower() for work in candidates]
+        found += doi in dois
+        best, _ = vb.rank_candidates(parsed, candidates)
+        picked += best is not None and best.verified_doi.lower() == doi
+    return latencies, found, picked, answers
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    distractors = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    references = [vb.parse_reference(text) for text in make_references(n)]
+    noise = [vb.parse_reference(text) for text in make_references(distractors, seed=99)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "dump.jsonl")
+        expected = []
+        with open(dump, "w", encoding="utf-8") as f:
+            for i, parsed in enumerate(references):
+                doi = parsed.doi or f"10.5555/ref.{i}"
+                expected.append(doi.lower())
+                f.write(json.dumps(work_for(parsed, doi)) + "\n")
+            for i, parsed in enumerate(noise):
+                f.write(json.dumps(work_for(parsed, f"10.5555/noise.{i}")) + "\n")
+
+        vb.MIRROR_BUILD_BATCH = 10 ** 9  # no progress lines
+        formats = [("sqlite", vb.CrossrefMirror, "mirror.sqlite"),
+                   ("compact", vb.CompactMirror, "mirror.compact")]
+        answers = {}
+        for name, mirror_class, filename in formats:
+            path = os.path.join(tmp, filename)
+            start = time.perf_counter()
+            indexed = mirror_class.build(path, [dump])
+            build_time = time.perf_counter() - start
+            start = time.perf_counter()
+            mirror = mirror_class(path)
+            open_time = time.perf_counter() - start
+            latencies, found, picked, answers[name] = measure(mirror, references, expected)
+            mirror.close()
+            queried = len(latencies)
+            print(f"[{name}] {indexed:,} works ({n:,} cited + {distractors:,} distractors) | "
+                  f"build {build_time:.1f} s | {disk_size(path) / 2**20:.1f} MiB | open {open_time * 1e3:.1f} ms")
+            print(f"[{name}] Queries: {queried:,} | latency p50 {percentile(latencies, 0.5) * 1e3:.2f} ms, "
+                  f"p95 {percentile(latencies, 0.95) * 1e3:.2f} ms")
+            print(f"[{name}] Cited work among candidates: {found / queried:.1%} | "
+                  f"chosen by scoring: {picked / queried:.1%}")
+
+    mismatches = sum(1 for a, b in zip(answers["sqlite"], answers["compact"]) if a != b)
+    print(f"Queries answered differently by the two formats: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
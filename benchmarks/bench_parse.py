@@ -0,0 +1,79 @@
+"""
+Benchmark: per-reference parse cost, single-pass parser vs separate extractors
+
+Times parse_reference against calling detect_reference_type and the six
+extract_* functions one after another (what verify_bibliography used to do),
+and extract_references_frame (a DataFrame of the same fields) over the whole
+corpus, and checks that all three produce identical fields for every
+reference.
+
+Usage: python benchmarks/bench_parse.py [N]   (default N = 100000)
+"""
+
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+
+def parse_separately(text):
+    return vb.ParsedReference(
+        ref_type=vb.detect_reference_type(text),
+        doi=vb.extract_doi_from_text(text),
+        year=vb.extract_year_from_text(text),
+        original_year=vb.extract_original_year_from_text(text),
+        first_author=vb.extract_first_author_from_apa(text),
+        all_authors=tuple(vb.extract_all_authors_from_apa(text)),
+        title=vb.extract_title_from_apa(text),
+    )
+
+
+def timed(fn, corpus):
+    start = time.perf_counter()
+    records = [fn(text) for text in corpus]
+    return time.perf_counter() - start, records
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    corpus = make_references(n)
+    print(f"Corpus: {n:,} synthetic references")
+
+    separate_time, separate = timed(parse_separately, corpus)
+    single_time, single = timed(vb.parse_reference, corpus)
+
+    start = time.perf_counter()
+    frame = vb.extract_references_frame(pd.Series(corpus))
+    bulk_time = time.perf_counter() - start
+    bulk = [
+        vb.ParsedReference(
+            ref_type=row.Reference_Type,
+            doi=row.Extracted_DOI,
+            year=row.Extracted_Year,
+            original_year=row.Extracted_Original_Year,
+            first_author=row.Extracted_First_Author,
+            all_authors=tuple(row.Extracted_All_Authors.split(", ")) if row.Extracted_All_Authors else (),
+            title=row.Extracted_Title,
+        )
+        for row in frame.itertuples(index=False)
+    ]
+
+    mismatches = sum(1 for a, b in zip(separate, single) if a != b)
+    bulk_mismatches = sum(1 for a, b in zip(separate, bulk) if a != b)
+    for label, elapsed in [("separate extract_* calls", separate_time),
+                           ("parse_reference", single_time),
+                           ("extract_references_frame", bulk_time)]:
+        print(f"{label:<28}{elapsed:8.2f} s  {elapsed / n * 1e6:8.1f} µs/ref")
+    print(f"Speed-up (parse_reference): {separate_time / single_time:.2f}x | "
+          f"field mismatches: {mismatches} single-pass, {bulk_mismatches} bulk")
+    return 1 if mismatches or bulk_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
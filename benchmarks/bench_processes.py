@@ -0,0 +1,111 @@
+"""
+Benchmark: process-pool scaling of the CPU stages (parse + score)
+
+Parses a synthetic corpus with parse_references and scores it with
+iter_process_outcomes for 1, 2, 4, ... worker processes (up to the core
+count). CrossRef candidates are generated offline (three perturbed titles
+per reference) and handed over through SharedLookups, so no request is made
+and only the CPU-bound work is timed. Checks that every process count
+yields exactly the results of the single-process run.
+
+Usage: python benchmarks/bench_processes.py [N] [CHUNK]   (default N = 100000)
+"""
+
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+vb.CACHE_ENABLED = False
+vb.CACHE_OFFLINE = True  # any lookup not prepared below fails instead of going online
+
+
+def candidate_works(parsed, rnd):
+    """Three CrossRef-like works: the cited title, a truncated one, an unrelated one"""
+    title = parsed.title or "Untitled"
+    author = {"family": parsed.first_author or "Smith", "given": "A."}
+    year = int(parsed.year) if parsed.year and parsed.year.isdigit() else 2000
+    words = title.split()
+    return [
+        {"DOI": f"10.1000/{rnd.randint(1, 10**6)}", "title": [title], "author": [author],
+         "issued": {"date-parts": [[year]]}},
+        {"DOI": f"10.1000/{rnd.randint(1, 10**6)}", "title": [" ".join(words[: max(1, len(words) // 2)])],
+         "author": [author], "issued": {"date-parts": [[year + 1]]}},
+        {"DOI": f"10.1000/{rnd.randint(1, 10**6)}", "title": [" ".join(reversed(words))],
+         "author": [{"family": "Other", "given": "B."}], "issued": {"date-parts": [[year - 5]]}},
+    ]
+
+
+def prepared_lookups(parsed_references):
+    rnd = random.Random(7)
+    crossref = {}
+    pubmed = {}
+    for parsed in parsed_references:
+        key = vb.lookup_key(parsed)
+        if key is not None and key not in crossref:
+            crossref[key] = (True, candidate_works(parsed, rnd))
+        pubmed[(parsed.title, parsed.first_author)] = False
+    return vb.SharedLookups.from_export({"crossref": crossref, "pubmed": pubmed})
+
+
+def run(processes, corpus, chunk_size):
+    start = time.perf_counter()
+    if processes > 1:
+        executor = ProcessPoolExecutor(max_workers=processes)
+        parsed = vb.parse_references(corpus, executor, chunk_size)
+    else:
+        executor = None
+        parsed = vb.parse_references(corpus)
+    parse_time = time.perf_counter() - start
+
+    lookups = prepared_lookups(parsed)
+    n = len(corpus)
+    start = time.perf_counter()
+    if executor is not None:
+        rows = zip(range(1, n + 1), corpus, parsed, [None] * n)
+        outcomes = list(vb.iter_process_outcomes(executor, rows, n, lookups, processes, chunk_size=chunk_size))
+        executor.shutdown()
+    else:
+        outcomes = [vb.process_reference(idx, text, n, parsed=p, lookups=lookups)
+                    for idx, text, p in zip(range(1, n + 1), corpus, parsed)]
+    score_time = time.perf_counter() - start
+    return parse_time, score_time, [result for result, _, _ in outcomes]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else vb.PROCESS_CHUNK_SIZE
+    corpus = make_references(n)
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    if cores == 1:
+        counts.append(2)  # still exercise the pool path on a single core
+    print(f"Corpus: {n:,} synthetic references | {cores} cores | chunk size {chunk_size}")
+
+    baseline = None
+    mismatches = 0
+    for processes in counts:
+        parse_time, score_time, results = run(processes, corpus, chunk_size)
+        total = parse_time + score_time
+        if baseline is None:
+            baseline, base_total = results, total
+        else:
+            mismatches += sum(1 for a, b in zip(baseline, results) if a != b)
+        print(f"{processes:>3} process(es): parse {parse_time:7.2f} s  score {score_time:7.2f} s  "
+              f"{n / total:9.0f} refs/s  speed-up {base_total / total:5.2f}x")
+    print(f"Result mismatches vs single process: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Benchmark: batched PubMed lookups, including rejected batch queries
+
+Runs check_pubmed_batch over the (title, first author) pairs of synthetic
+references against the mock API (benchmarks/mock_api.py), once as is and
+once with the mock rejecting every esearch term that OR-joins more than a
+few titles (an ERROR reply without a count, as PubMed answers a malformed
+or oversized query). Reports the requests each run made and checks that
+both agree with one check_pubmed call per pair: a rejected group must be
+split or looked up member by member, never settled as not found.
+
+Usage: python benchmarks/bench_pubmed.py [N] [MAX_TERMS]   (defaults 400, 5)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from mock_api import Catalog, MockAPI  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+
+def run(pairs, max_terms):
+    api = MockAPI(Catalog([]), max_terms=max_terms).start()
+    try:
+        for name, url in api.endpoints.items():
+            setattr(vb, name, url)
+        start = time.perf_counter()
+        found, _ = vb.check_pubmed_batch(pairs)
+        elapsed = time.perf_counter() - start
+        expected = {pair: vb.check_pubmed(*pair)[0] for pair in pairs}
+    finally:
+        api.stop()
+    mismatches = sum(1 for pair in pairs if found.get(pair) != expected[pair])
+    return elapsed, api.requests, sum(expected.values()), mismatches
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    max_terms = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    vb.CACHE_ENABLED = False
+    parsed = [vb.parse_reference(text) for text in make_references(n)]
+    pairs = list(dict.fromkeys((p.title, p.first_author) for p in parsed if p.title and p.first_author))
+    print(f"{len(pairs):,} PubMed pairs, PUBMED_BATCH_SIZE {vb.PUBMED_BATCH_SIZE}")
+    failures = 0
+    for label, limit in [("accepted", 0), (f"rejected > {max_terms}", max_terms)]:
+        elapsed, requests, hits, mismatches = run(pairs, limit)
+        # The per-pair reference lookups are counted too; take them out
+        batch_requests = requests["total"] - len(pairs)
+        print(f"{label:<16} {elapsed:6.2f} s  {batch_requests:6,} requests "
+              f"({requests['rejected']:,} rejected)  {hits:,} found  {mismatches} mismatches")
+        failures += mismatches
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
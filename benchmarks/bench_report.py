@@ -0,0 +1,109 @@
+"""
+Benchmark: report statistics, R columns and Parquet output
+
+Builds N synthetic verification results (the extraction of synthetic
+references, with random statuses, scores and CrossRef hits) and compares
+the row-by-row path (ReportStats.from_results and r_export_row per row)
+with the vectorized one (ReportStats.from_frame and r_export_columns).
+Both must give the same summary and the same derived columns. Then writes
+the R export as CSV and as Parquet and reads each back, reporting time
+and file size. The Parquet part is skipped without pyarrow.
+
+Usage: python benchmarks/bench_report.py [N]   (default 200000)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd  # noqa: E402
+
+import verify_bibliography_production as vb  # noqa: E402
+from synthetic import make_references  # noqa: E402
+
+STATUSES = ["VERIFIED", "VERIFIED", "NEEDS_REVIEW", "ANCIENT_TEXT"]
+
+
+def make_results(n, seed=3):
+    """Result rows shaped like process_reference's, for n synthetic references"""
+    rnd = random.Random(seed)
+    results = []
+    for idx, text in enumerate(make_references(n), 1):
+        parsed = vb.parse_reference(text)
+        found = rnd.random() < 0.7
+        score = rnd.choice([0, 25, 50, 70, 85, 100]) if found else 0
+        results.append({
+            'Reference_Number': idx,
+            'Reference_Type': parsed.ref_type,
+            'Original_Text': text,
+            'Extracted_First_Author': parsed.first_author,
+            'Extracted_All_Authors': ', '.join(parsed.all_authors),
+            'Extracted_Year': parsed.year,
+            'Extracted_Original_Year': parsed.original_year,
+            'Extracted_Title': parsed.title,
+            'Extracted_DOI': parsed.doi,
+            'CrossRef_Found': found,
+            'Title_Similarity': round(rnd.random(), 3) if found else 0.0,
+            'CrossRef_Match_Score': score,
+            'CrossRef_Candidates': rnd.randint(1, 20) if found else 0,
+            'Runner_Up_Margin': rnd.choice([10, 25, 50]) if found else '',
+            'PubMed_Found': rnd.random() < 0.3,
+            'Verified_DOI': parsed.doi or '' if found else '',
+            'Verified_Title': parsed.title or '' if found else '',
+            'Verified_Authors': parsed.first_author or '' if found else '',
+            'Verified_Year': parsed.year or '' if found else '',
+            'Issues_Detected': 'None' if score >= 75 else 'LOW_MATCH_CONFIDENCE',
+            'Status': rnd.choice(STATUSES),
+        })
+    return results
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    results = make_results(n)
+    df = pd.DataFrame(results)
+    print(f"{n:,} synthetic results")
+
+    row_stats, row_stats_s = timed(vb.ReportStats.from_results, results)
+    row_extra, row_extra_s = timed(lambda: pd.DataFrame([vb.r_export_row(r) for r in results]))
+    frame_stats, frame_stats_s = timed(vb.ReportStats.from_frame, df)
+    frame_extra, frame_extra_s = timed(vb.r_export_columns, df)
+    same = (row_stats.summary_lines() == frame_stats.summary_lines()
+            and len(row_stats.needs_review) == len(frame_stats.needs_review)
+            and row_extra.equals(frame_extra))
+    print(f"Summary statistics   row by row {row_stats_s:6.2f} s | groupby   {frame_stats_s:6.2f} s")
+    print(f"R columns            row by row {row_extra_s:6.2f} s | np.select {frame_extra_s:6.2f} s")
+    print(f"Same summary and R columns: {same}")
+
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow is not installed: skipping the Parquet comparison")
+        return 0 if same else 1
+    r_df = pd.concat([df, frame_extra], axis=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file, parquet_file = os.path.join(tmp, "report.csv"), os.path.join(tmp, "report.parquet")
+        _, csv_write_s = timed(lambda: r_df.to_csv(csv_file, index=False))
+        _, csv_read_s = timed(pd.read_csv, csv_file)
+        _, parquet_write_s = timed(lambda: pq.write_table(vb.report_arrow_table(df), parquet_file))
+        table, parquet_read_s = timed(pq.read_table, parquet_file)
+        same = same and table.num_rows == n
+        for name, size, write_s, read_s in [
+                ("CSV", os.path.getsize(csv_file), csv_write_s, csv_read_s),
+                ("Parquet", os.path.getsize(parquet_file), parquet_write_s, parquet_read_s)]:
+            print(f"{name:<8} {size / 2**20:7.1f} MiB | write {write_s:6.2f} s | read {read_s:6.2f} s")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
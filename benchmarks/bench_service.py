@@ -0,0 +1,153 @@
+"""
+Benchmark: one subprocess per manuscript against the verification service
+
+Writes M synthetic manuscripts of R references each (drawn from a shared
+pool, so manuscripts cite some of the same works) and verifies them
+against the mock CrossRef/PubMed server of mock_api.py in two ways:
+
+- subprocess   a fresh Python process per manuscript, as a submission
+               system calling the script does (startup, imports, new
+               session, cold in-memory lookups)
+- service      one VerificationService; each manuscript is POSTed to
+               /jobs?wait=1 on its HTTP API
+
+Both use a response cache file that starts empty. Reports per-manuscript
+latency and total time, and checks that both ways write the same reports.
+Then client "a" submits M jobs at once and client "b" one more: b's wait
+shows the round-robin queue at work (with first-come first-served it would
+wait for all of a's jobs).
+
+Usage: python benchmarks/bench_service.py [MANUSCRIPTS] [REFERENCES]   (defaults 20, 30)
+                                          [--latency 0.02] [--job-workers 2] [--workers 4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import requests  # noqa: E402
+
+import verify_bibliography_production as vb  # noqa: E402
+from mock_api import Catalog, MockAPI, catalog_for  # noqa: E402
+from synthetic import make_docx, make_references  # noqa: E402
+
+RUN_ONE = """
+import sys
+sys.path.insert(0, {root!r})
+import verify_bibliography_production as vb
+for name, value in {settings!r}.items():
+    setattr(vb, name, value)
+vb.run_verification({docx!r}, 'report.csv', 'report_r.csv', 'summary.txt', max_workers={workers})
+"""
+
+
+def make_manuscripts(tmp, n_docs, n_refs, seed=11):
+    pool = make_references(n_docs * n_refs // 2 + n_refs)
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(n_docs):
+        path = os.path.join(tmp, f"manuscript_{i:03d}.docx")
+        make_docx(path, rnd.sample(pool, n_refs))
+        paths.append(path)
+    return pool, paths
+
+
+def run_subprocesses(paths, settings, workdir, workers):
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    latencies, reports = [], []
+    for i, path in enumerate(paths):
+        cwd = os.path.join(workdir, str(i))
+        os.makedirs(cwd)
+        code = RUN_ONE.format(root=root, settings=settings, docx=path, workers=workers)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        latencies.append(time.perf_counter() - start)
+        with open(os.path.join(cwd, "report.csv"), "rb") as f:
+            reports.append(f.read())
+    return latencies, reports
+
+
+def post(base, path, client="bench"):
+    with open(path, "rb") as f:
+        data = f.read()
+    return requests.post(f"{base}/jobs?wait=1&filename={os.path.basename(path)}", data=data,
+                         headers={"X-Client-Id": client}).json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subprocess per manuscript vs the verification service")
+    parser.add_argument("manuscripts", type=int, nargs="?", default=20)
+    parser.add_argument("references", type=int, nargs="?", default=30)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every mock response")
+    parser.add_argument("--job-workers", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool, paths = make_manuscripts(tmp, args.manuscripts, args.references)
+        api = MockAPI(Catalog(catalog_for(pool, distractors=len(pool))), latency=args.latency).start()
+        settings = dict(api.endpoints, CACHE_ENABLED=True, CACHE_FILE=os.path.join(tmp, "sub_cache.sqlite"))
+        print(f"{args.manuscripts} manuscripts x {args.references} references (pool of {len(pool)}) | "
+              f"mock latency {args.latency * 1e3:.0f} ms | {args.workers} workers")
+
+        start = time.perf_counter()
+        sub_latencies, sub_reports = run_subprocesses(paths, settings, os.path.join(tmp, "sub"), args.workers)
+        sub_total = time.perf_counter() - start
+
+        for name, value in dict(settings, CACHE_FILE=os.path.join(tmp, "service_cache.sqlite")).items():
+            setattr(vb, name, value)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            service = vb.VerificationService(service_dir=os.path.join(tmp, "service"),
+                                             job_workers=args.job_workers, max_workers=args.workers)
+            server = vb.make_service_server(service, port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            start = time.perf_counter()
+            service_latencies, service_reports = [], []
+            for path in paths:
+                started = time.perf_counter()
+                job = post(base, path)
+                service_latencies.append(time.perf_counter() - started)
+                service_reports.append(requests.get(base + job["files"][vb.OUTPUT_FILE]).content)
+            service_total = time.perf_counter() - start
+
+            # Fairness: a floods the queue, then b submits one manuscript
+            a_done = []
+            flood = [threading.Thread(target=lambda path=path: (post(base, path, "a"),
+                                                                 a_done.append(time.perf_counter())))
+                     for path in paths]
+            for thread in flood:
+                thread.start()
+                time.sleep(0.01)
+            time.sleep(0.05)
+            b_job = post(base, paths[0], "b")
+            b_done = time.perf_counter()
+            for thread in flood:
+                thread.join()
+            server.shutdown()
+            service.close()
+        api.stop()
+
+    same = sub_reports == service_reports
+    for name, latencies, total in [("subprocess", sub_latencies, sub_total),
+                                   ("service", service_latencies, service_total)]:
+        ordered = sorted(latencies)
+        print(f"{name:<11} total {total:7.2f} s | per manuscript: first {latencies[0]:6.2f} s, "
+              f"median {ordered[len(ordered) // 2]:6.2f} s, mean {sum(latencies) / len(latencies):6.2f} s")
+    print(f"Same reports from both: {same}")
+    print(f"Client b behind {len(paths)} jobs of client a: waited {b_job['wait_s']:.2f} s in the queue, "
+          f"ran in {b_job['run_s']:.2f} s; {sum(t > b_done for t in a_done)} of a's jobs finished after it")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Benchmark: cold start of each command-line mode
+
+Runs the script in a fresh Python process per invocation, the way a shell
+or a submission system calls it, and reports the median wall time of:
+
+- help          --help
+- bad-option    an invalid option (rejected by parse_args)
+- extract-txt   --extract-only on a plain-text bibliography of R references
+- extract-docx  --extract-only on a Word document of R references
+- build-mirror  --build-mirror on a small dump (compact format)
+- verify        a full run with --offline on an empty cache (no network)
+- serve         --serve until GET /health answers
+
+plus which of the heavy dependencies (pandas, numpy, python-docx, requests,
+httpx) each mode ended up importing, from one extra run under
+-X importtime. The first lines give the bare interpreter start and the
+time to import those dependencies up front, which every mode paid before
+they were loaded lazily.
+
+Usage: python benchmarks/bench_startup.py [REPEATS] [REFERENCES]   (defaults 5, 200)
+"""
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from bench_mirror import work_for  # noqa: E402
+from synthetic import make_docx, make_references  # noqa: E402
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "verify_bibliography_production.py")
+HEAVY = ["pandas", "numpy", "docx", "requests", "httpx"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_serve(args, cwd):
+    """Start --serve and return once /health answers; the server is then stopped"""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, *args, SCRIPT, "--serve", "--port", str(port)], cwd=cwd,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    json.load(response)
+                break
+            except OSError:
+                if process.poll() is not None:
+                    raise RuntimeError("--serve exited before answering /health")
+                time.sleep(0.005)
+    finally:
+        process.terminate()
+        _, stderr = process.communicate()
+    return stderr
+
+
+def run_once(mode, options, cwd, python_args=()):
+    """Run one mode in a fresh process: (seconds, stderr)"""
+    start = time.perf_counter()
+    if mode == "serve":
+        stderr = run_serve(list(python_args), cwd)
+    else:
+        stderr = subprocess.run([sys.executable, *python_args, SCRIPT, *options], cwd=cwd,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    return time.perf_counter() - start, stderr
+
+
+def imported(stderr):
+    """Top-level heavy packages in -X importtime output"""
+    names = {line.rsplit("|", 1)[-1].strip().split(".")[0] for line in stderr.splitlines()
+             if line.startswith("import time:")}
+    return [name for name in HEAVY if name in names]
+
+
+def median_time(command, repeats, cwd):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_refs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    references = make_references(n_refs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "refs.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(references) + "\n")
+        make_docx(os.path.join(tmp, "refs.docx"), references)
+        with open(os.path.join(tmp, "dump.jsonl"), "w", encoding="utf-8") as f:
+            for i, text in enumerate(references):
+                f.write(json.dumps(work_for(vb.parse_reference(text), f"10.5555/ref.{i}")) + "\n")
+
+        modes = [
+            ("help", ["--help"]),
+            ("bad-option", ["--workers", "0"]),
+            ("extract-txt", ["--input", "refs.txt", "--extract-only", "extracted.csv"]),
+            ("extract-docx", ["--input", "refs.docx", "--extract-only", "extracted.csv"]),
+            ("build-mirror", ["--mirror", "mirror.compact", "--mirror-format", "compact",
+                              "--build-mirror", "dump.jsonl"]),
+            ("verify", ["--input", "refs.txt", "--offline", "--cache-file", "empty.sqlite"]),
+            ("serve", []),
+        ]
+        bare = median_time([sys.executable, "-c", "pass"], repeats, tmp)
+        eager = median_time([sys.executable, "-c", "import pandas, numpy, docx, requests"], repeats, tmp)
+        print(f"{repeats} runs per mode, {n_refs} references | Python {sys.version.split()[0]}")
+        print(f"{'interpreter':<13} {bare * 1e3:7.0f} ms")
+        print(f"{'eager deps':<13} {(eager - bare) * 1e3:7.0f} ms  (pandas, numpy, python-docx, requests)")
+        for mode, options in modes:
+            times = [run_once(mode, options, tmp)[0] for _ in range(repeats)]
+            _, stderr = run_once(mode, options, tmp, python_args=("-X", "importtime"))
+            loaded = imported(stderr)
+            print(f"{mode:<13} {statistics.median(times) * 1e3:7.0f} ms  "
+                  f"(min {min(times) * 1e3:5.0f})  loads: {', '.join(loaded) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Benchmark suite: end-to-end verification runs against a local mock API
+
+Generates synthetic bibliographies (10, 100 and 1,000 references by default;
+add 10000 with --sizes), starts the mock CrossRef/PubMed server of
+mock_api.py with some latency and a share of 429 responses, and verifies
+each document in every execution mode:
+
+- serial       one worker, sync transport
+- threads      --workers threads, sync transport
+- async        --workers threads on the httpx transport (skipped without httpx)
+- processes    --processes worker processes for parsing and scoring
+- warm-cache   the threads run again on a response cache filled by a first run
+
+Every run happens in a fresh subprocess (so peak RSS is per run) with a
+RunProfile attached. Reported per run: wall time, references per second,
+p50/p95 per-reference latency, requests made (from cache, retried) and peak
+RSS. The reports of all modes must be identical for each size; the suite
+exits with 1 otherwise. --json saves the results for comparison over time.
+
+The mock server is not rate limited the way api.crossref.org and NCBI are,
+so these runs measure the pipeline, not the politeness limits.
+
+Usage: python benchmarks/bench_suite.py [--sizes 10,100,1000] [--modes serial,threads,...]
+                                        [--latency 0.02] [--fail-rate 0.02] [--workers 8]
+                                        [--fixtures DUMP] [--json FILE]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+from mock_api import Catalog, MockAPI, catalog_for  # noqa: E402
+from synthetic import make_docx, make_references  # noqa: E402
+
+MODES = ["serial", "threads", "async", "processes", "warm-cache"]
+
+
+def peak_rss_mib():
+    """Peak resident memory of this process in MiB
+
+    Reads VmHWM on Linux: ru_maxrss keeps the parent's high-water mark
+    across fork and exec, so a subprocess would report at least the
+    benchmark driver's peak.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(spec):
+    """Subprocess side: one verification run as described by spec; writes the result JSON"""
+    for name, value in spec["settings"].items():
+        setattr(vb, name, value)
+    profile = vb.RunProfile(spec["docx"])
+    with open(os.devnull, "w", encoding="utf-8") as quiet:
+        stdout, sys.stdout = sys.stdout, quiet
+        try:
+            start = time.perf_counter()
+            vb.run_verification(spec["docx"], "report.csv", "report_r.csv", "summary.txt",
+                                profile=profile, **spec["options"])
+            elapsed = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+    with open("report.csv", "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    summary = profile.summary()
+    # Worker processes (processes mode) are forked from this one; count the larger peak
+    peak = max(peak_rss_mib(), resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024)
+    with open(spec["result_file"], "w", encoding="utf-8") as f:
+        json.dump({"seconds": elapsed, "references": summary["references"]["total"],
+                   "latency": summary["reference_latency_s"], "requests": summary["requests"],
+                   "peak_rss_mib": peak, "report_sha256": digest}, f)
+
+
+def case_spec(mode, docx, workdir, api, workers):
+    settings = dict(api.endpoints, CACHE_ENABLED=True,
+                    CACHE_FILE=os.path.join(workdir, "cache.sqlite"), HTTP_TRANSPORT="sync")
+    options = {"max_workers": workers}
+    if mode == "serial":
+        options["max_workers"] = 1
+    elif mode == "async":
+        settings["HTTP_TRANSPORT"] = "async"
+    elif mode == "processes":
+        options["processes"] = 2
+    return {"docx": docx, "settings": settings, "options": options,
+            "result_file": os.path.join(workdir, "result.json")}
+
+
+def run_subprocess(spec, workdir):
+    spec_file = os.path.join(workdir, "spec.json")
+    with open(spec_file, "w", encoding="utf-8") as f:
+        json.dump(spec, f)
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--case", spec_file],
+                   cwd=workdir, check=True)
+    with open(spec["result_file"], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def has_httpx():
+    return importlib.util.find_spec("httpx") is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite against a mock API")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.02, help="share of 429 responses")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--fixtures", metavar="DUMP",
+                        help="CrossRef dump (JSON Lines) to serve instead of the synthetic catalog")
+    parser.add_argument("--json", metavar="FILE", help="save the results as JSON")
+    args = parser.parse_args()
+    if args.case:
+        with open(args.case, encoding="utf-8") as f:
+            run_case(json.load(f))
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    modes = args.modes.split(",")
+    if "async" in modes and not has_httpx():
+        print("httpx is not installed: skipping the async mode")
+        modes.remove("async")
+    references = make_references(max(sizes))
+    catalog = Catalog.from_dump(args.fixtures) if args.fixtures else Catalog(
+        catalog_for(references, distractors=2 * max(sizes)))
+    api = MockAPI(catalog, latency=args.latency, fail_rate=args.fail_rate).start()
+    print(f"Mock API at {api.base_url}: {len(catalog.works):,} works | latency {args.latency * 1e3:.0f} ms | "
+          f"429 rate {args.fail_rate:.0%} | {args.workers} workers | {os.cpu_count()} cores")
+    print(f"{'refs':>6} {'mode':<11} {'time s':>8} {'refs/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'requests':>8} {'cached':>7} {'retries':>7} {'RSS MiB':>8}")
+
+    results = []
+    mismatches = 0
+    try:
+        for size in sizes:
+            digests = set()
+            with tempfile.TemporaryDirectory() as tmp:
+                docx = os.path.join(tmp, f"bibliography_{size}.docx")
+                make_docx(docx, references[:size])
+                for mode in modes:
+                    workdir = os.path.join(tmp, mode)
+                    os.makedirs(workdir)
+                    spec = case_spec(mode, docx, workdir, api, args.workers)
+                    if mode == "warm-cache":
+                        run_subprocess(case_spec("threads", docx, workdir, api, args.workers), workdir)
+                    served = api.requests["total"]
+                    result = run_subprocess(spec, workdir)
+                    result.update(size=size, mode=mode, served=api.requests["total"] - served)
+                    results.append(result)
+                    digests.add(result["report_sha256"])
+                    made = result["requests"]
+                    print(f"{size:>6} {mode:<11} {result['seconds']:8.2f} "
+                          f"{result['references'] / result['seconds']:8.1f} "
+                          f"{result['latency']['p50'] * 1e3:8.1f} {result['latency']['p95'] * 1e3:8.1f} "
+                          f"{made['requests']:>8} {made['cache_hits']:>7} {made['retries']:>7} "
+                          f"{result['peak_rss_mib']:8.1f}")
+            if len(digests) > 1:
+                mismatches += 1
+                print(f"  ✗ {size} references: reports differ between modes")
+    finally:
+        api.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"latency": args.latency, "fail_rate": args.fail_rate, "workers": args.workers,
+                       "runs": results}, f, indent=1)
+        print(f"Results saved to {args.json}")
+    print(f"Sizes with differing reports between modes: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
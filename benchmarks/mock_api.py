@@ -0,0 +1,245 @@
+"""
+Local stand-in for the CrossRef and PubMed APIs, for benchmarks
+
+A ThreadingHTTPServer that answers the requests verify_bibliography_production
+makes, from an in-memory catalog of CrossRef works:
+
+- /works/{doi}                     exact DOI lookup (404 when unknown)
+- /works?filter=doi:a,doi:b        bulk DOI lookup
+- /works?query.title=...           title (+ author) search over title words
+- /esearch.fcgi?term=...           PubMed search; OR-joined batch terms supported
+- /esummary.fcgi?id=...            PubMed summaries of the PMIDs esearch handed out
+
+Responses can be delayed (latency, in seconds) and a share of them answered
+with 429 Too Many Requests (Retry-After: 0) to exercise the retry path, and
+esearch terms that OR-join more than max_terms titles rejected the way
+PubMed rejects a malformed query (an ERROR reply without a count). The
+catalog is built from synthetic references (catalog_for) or read from a
+CrossRef dump file in the format --build-mirror accepts (fixtures).
+
+Usage: python benchmarks/mock_api.py [PORT] [LATENCY] [FAIL_RATE] [DUMP]
+       then point CROSSREF_API at http://127.0.0.1:PORT/works,
+       PUBMED_API at .../esearch.fcgi and PUBMED_SUMMARY_API at .../esummary.fcgi
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import verify_bibliography_production as vb  # noqa: E402
+
+PUBMED_TERM = re.compile(r'"(.+?)"\[Title\](?: AND (.+?)\[Author\])?')
+
+
+def _stable(text):
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def catalog_for(references, distractors=0, seed=5):
+    """CrossRef works for synthetic references: most cited works exist, some don't
+
+    About 85% of the references with a title get a matching work (sometimes
+    with a truncated title or another year); DOIs of the others are unknown.
+    distractors adds unrelated works that share vocabulary with the rest.
+    """
+    rnd = random.Random(seed)
+    works = []
+    for i, text in enumerate(references):
+        parsed = vb.parse_reference(text)
+        if not parsed.title or rnd.random() < 0.15:
+            continue
+        title = parsed.title
+        if rnd.random() < 0.1:
+            words = title.split()
+            title = " ".join(words[: max(2, len(words) // 2)])
+        work = {"DOI": parsed.doi or f"10.5555/mock.{i}", "title": [title],
+                "author": [{"family": parsed.first_author or "Anonymous", "given": "A."}]}
+        if parsed.year and parsed.year.isdigit():
+            year = int(parsed.year) + (1 if rnd.random() < 0.1 else 0)
+            work["issued"] = {"date-parts": [[year]]}
+        works.append(work)
+    words = [word for work in works for word in work["title"][0].split()] or ["untitled"]
+    for i in range(distractors):
+        works.append({"DOI": f"10.5555/distractor.{i}",
+                      "title": [" ".join(rnd.choice(words) for _ in range(rnd.randint(4, 10)))],
+                      "author": [{"family": rnd.choice(["Other", "Someone", "Else"]), "given": "B."}],
+                      "issued": {"date-parts": [[rnd.randint(1950, 2024)]]}})
+    return works
+
+
+class Catalog:
+    """Works indexed by DOI and by title word, for the mock /works endpoint"""
+
+    def __init__(self, works):
+        self.by_doi = {}
+        self.works = []
+        self.index = {}
+        for work in works:
+            if not work.get("DOI") or not work.get("title"):
+                continue
+            position = len(self.works)
+            self.works.append(work)
+            self.by_doi[work["DOI"].lower()] = work
+            for token in vb.title_tokens(work["title"][0]):
+                self.index.setdefault(token, []).append(position)
+
+    @classmethod
+    def from_dump(cls, path):
+        return cls(vb.iter_crossref_dump(path))
+
+    def search(self, title, rows):
+        """Works sharing the most title words with the query, best first"""
+        counts = Counter()
+        for token in vb.title_tokens(title):
+            counts.update(self.index.get(token, ()))
+        return [self.works[position] for position, _ in
+                sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:rows]]
+
+
+class MockAPI:
+    """The mock server: start() it, read .base_url and .requests, then stop()"""
+
+    def __init__(self, catalog, latency=0.0, fail_rate=0.0, port=0, seed=1, max_terms=0):
+        self.catalog = catalog
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.max_terms = max_terms
+        self.requests = Counter()
+        self.pmids = {}
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def do_GET(self):
+                api.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = None
+
+    @property
+    def endpoints(self):
+        """Module settings that send verify_bibliography_production to this server"""
+        return {"CROSSREF_API": f"{self.base_url}/works",
+                "PUBMED_API": f"{self.base_url}/esearch.fcgi",
+                "PUBMED_SUMMARY_API": f"{self.base_url}/esummary.fcgi"}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, request):
+        url = urlsplit(request.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with self._lock:
+            self.requests["total"] += 1
+            throttled = self.fail_rate and self._rnd.random() < self.fail_rate
+            if throttled:
+                self.requests["throttled"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            self._send(request, 429, {"status": "error", "message": "rate limited"}, {"Retry-After": "0"})
+            return
+        path = unquote(url.path)
+        if path.startswith("/works/"):
+            work = self.catalog.by_doi.get(path[len("/works/"):].lower())
+            if work is None:
+                self._send(request, 404, {"status": "error", "message": "Resource not found."})
+            else:
+                self._send(request, 200, {"status": "ok", "message": work})
+        elif path == "/works":
+            self._send(request, 200, {"status": "ok", "message": {"items": self._works(params)}})
+        elif path.endswith("esearch.fcgi"):
+            self._send(request, 200, {"esearchresult": self._esearch(params)})
+        elif path.endswith("esummary.fcgi"):
+            self._send(request, 200, {"result": self._esummary(params)})
+        else:
+            self._send(request, 404, {"status": "error", "message": "unknown endpoint"})
+
+    def _works(self, params):
+        rows = int(params.get("rows", 20))
+        if "filter" in params:
+            dois = [part[4:].lower() for part in params["filter"].split(",") if part.startswith("doi:")]
+            return [self.catalog.by_doi[doi] for doi in dois if doi in self.catalog.by_doi][:rows]
+        return self.catalog.search(params.get("query.title", ""), rows)
+
+    def _esearch(self, params):
+        pairs = PUBMED_TERM.findall(params.get("term", ""))
+        if self.max_terms and len(pairs) > self.max_terms:
+            with self._lock:
+                self.requests["rejected"] += 1
+            return {"ERROR": "Search Backend failed: query too long",
+                    "errorlist": {"phrasesnotfound": [], "fieldsnotfound": []}}
+        # A (title, author) pair is "in PubMed" for two references out of three
+        hits = [(title, author) for title, author in pairs if _stable(title + author) % 3]
+        ids = [str(_stable(title + author) % 10 ** 8) for title, author in hits]
+        with self._lock:
+            self.pmids.update(zip(ids, hits))
+        return {"count": str(len(ids)), "idlist": ids[: int(params.get("retmax", 20))]}
+
+    def _esummary(self, params):
+        ids = [pmid for pmid in params.get("id", "").split(",") if pmid in self.pmids]
+        result = {"uids": ids}
+        for pmid in ids:
+            title, author = self.pmids[pmid]
+            result[pmid] = {"title": title + ".", "authors": [{"name": f"{author or 'Doe'} J"}]}
+        return result
+
+    @staticmethod
+    def _send(request, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    fail_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    if len(sys.argv) > 4:
+        catalog = Catalog.from_dump(sys.argv[4])
+    else:
+        from synthetic import make_references
+        catalog = Catalog(catalog_for(make_references(1000), distractors=5000))
+    api = MockAPI(catalog, latency, fail_rate, port)
+    print(f"Mock CrossRef/PubMed on {api.base_url} ({len(catalog.works):,} works)")
+    for name, url in api.endpoints.items():
+        print(f"  {name} = {url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
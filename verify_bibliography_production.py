@@ -13,39 +13,222 @@ Key Features:
 - Comprehensive extraction failure logging
 - R-compatible CSV output with boolean flags
 - Detailed verification reports for peer review
+- Optional concurrent verification on a bounded worker pool (--workers N)
+- Persistent on-disk API response cache (SQLite) with TTL and size-based eviction
+- Per-host token-bucket rate limiting shared by all workers
+- Batched PubMed lookups (OR-joined esearch groups, split only where hits are)
+- Bulk DOI resolution through CrossRef filter queries (deduplicated per document)
+- Pluggable HTTP transport: requests (default) or an asyncio/httpx keep-alive pool
+- Precompiled single-pass APA parser (parse_reference) producing compact records
+- Bulk extraction of a pandas Series into a DataFrame for offline corpus audits
+- Title similarity with cached normalization and cheap upper-bound prefilters
+- Multi-candidate scoring: every CrossRef row is ranked, runner-up margin recorded
+- Incremental mode: only new or changed references are re-verified (--incremental)
+- Crash-safe checkpoint journal; interrupted runs continue with --resume
+- Streaming report output: CSV rows written as references finish, summary from running totals
+- Batch mode over many documents (--batch DIR|GLOB): shared citations looked up once
+- Process-pool parse and scoring stages for large corpora (--processes N)
+- Local CrossRef mirror (SQLite index of a CrossRef data dump) for network-free runs
+- Compact memory-mapped mirror format for very large snapshots (--mirror-format compact)
+- MinHash LSH title blocking: fuzzy title matches narrowed to a few candidates
+- Duplicate citations in one bibliography verified once and flagged (DUPLICATE_OF_REF_n)
+- Run profile (--profile): per-stage timings, requests, retries, bytes and cache status
+- Streaming .docx reader (zip + incremental XML), starting at the References heading
+- BibTeX and RIS input (fields used directly, no regex extraction), plain text and stdin
+- Optional Parquet copy of the report with typed columns (--parquet)
+- Verification service (--serve): HTTP/JSON job API with warm pools and fair scheduling
+- Command-line input, output paths, contact email and thresholds; --extract-only parses offline
+- Fast startup: pandas, numpy, python-docx and requests load only when a stage needs them
 
 Requirements: pip install python-docx pandas requests urllib3
+Optional (async transport): pip install "httpx[http2]"
+Optional (faster title prefilter): pip install rapidfuzz
+Optional (Parquet output): pip install pyarrow
 """
 
-import requests
-import pandas as pd
-from docx import Document
+import argparse
+import csv
+import glob
+import gzip
 import re
+import math
+import sys
+import json
+import shutil
+import hashlib
+import sqlite3
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
 from time import sleep
 import unicodedata
+import zlib
+import zipfile
+import xml.etree.ElementTree as ET
 from difflib import SequenceMatcher
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, deque, namedtuple
+from functools import lru_cache
+from itertools import islice
+from array import array
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+# pandas, numpy, python-docx and requests are imported inside the functions
+# that use them: --help, --extract-only and cached or mirror-only runs start
+# without loading the ones they never touch.
+
+try:
+    # Optional C implementation of the LCS-based Indel similarity, used only as
+    # an upper bound to skip hopeless SequenceMatcher comparisons
+    from rapidfuzz.distance import Indel as rapidfuzz_indel
+except ImportError:
+    rapidfuzz_indel = None
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
-WORD_FILE = "bibliography.docx"  # Your Word file with References
-OUTPUT_FILE = "verification_report.csv"
-DETAILED_LOG = "verification_log.txt"
-R_OUTPUT_FILE = "verification_for_R.csv"
+WORD_FILE = "bibliography.docx"  # Your Word file with References (--input)
+BATCH_OUTPUT_DIR = "verification_batch"  # --batch: one sub-folder of reports per document
+OUTPUT_FILE = "verification_report.csv"    # --output
+DETAILED_LOG = "verification_log.txt"      # --log
+R_OUTPUT_FILE = "verification_for_R.csv"   # --r-output
+# Report names in each --batch document folder and --serve job folder; fixed,
+# since --output, --r-output and --log name the single-document reports only
+DOCUMENT_REPORT_FILE = OUTPUT_FILE
+DOCUMENT_R_OUTPUT_FILE = R_OUTPUT_FILE
+DOCUMENT_LOG = DETAILED_LOG
 EXTRACTION_FAILURES_LOG = "extraction_failures.txt"
+EXTRACTION_FILE = "extracted_references.csv"  # --extract-only: parsed fields, no lookups
+PARQUET_FILE = "verification_report.parquet"  # --parquet: report + R columns, typed
+STATE_FILE = "verification_state.json"  # Per-reference results kept for --incremental runs
+CHECKPOINT_FILE = "verification_checkpoint.jsonl"  # Progress journal for --resume
+PROFILE_FILE = "verification_profile.json"  # --profile: stage timings and request counts
+PROFILE_CSV = "verification_profile.csv"    # --profile: one row per reference
+PROFILE_TOP = 10                            # Slowest references listed after a profiled run
+
+# Parquet output (needs pyarrow): the report rows plus the R export's derived
+# columns, with booleans and numbers typed and empty cells stored as nulls.
+# Rows are buffered and written PARQUET_ROW_GROUP_SIZE at a time.
+PARQUET_OUTPUT = False
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Word reader: "stream" reads word/document.xml from the .docx zip with an
+# incremental XML parser (fast, small memory on long manuscripts);
+# "python-docx" loads the full document object model. Both give the same
+# paragraph text; the stream reader falls back to python-docx on files it
+# cannot read.
+DOCX_READER = "stream"
+
+# Headings that open the reference list (compared case-insensitively, ignoring
+# section numbers and a trailing colon). Paragraphs before the first one are
+# not treated as references; documents without such a heading are read whole.
+REFERENCE_HEADINGS = {"references", "reference list", "bibliography", "works cited",
+                      "literature cited", "cited literature", "cited references", "sources"}
+
+# Incremental mode: reuse results from STATE_FILE for references whose text is
+# unchanged since the last run; only new or edited references are looked up
+INCREMENTAL_MODE = False
+
+# Checkpointing: finished references are appended to CHECKPOINT_FILE in batches
+# (every CHECKPOINT_BATCH_SIZE results or CHECKPOINT_FLUSH_SECONDS, whichever
+# comes first) so an interrupted run can continue with --resume
+CHECKPOINT_BATCH_SIZE = 25
+CHECKPOINT_FLUSH_SECONDS = 5.0
+
+# Number of references verified concurrently (1 = serial, one at a time).
+# Keep this modest (4-8): every worker shares the same API rate limits.
+MAX_WORKERS = 1
+
+# Worker processes for the CPU-bound stages (parsing, title matching and
+# scoring) on large corpora; 0 or 1 keeps them in the main process. Network
+# lookups always stay in the main process (on MAX_WORKERS threads). References
+# are handed to the processes in chunks of PROCESS_CHUNK_SIZE.
+PROCESS_WORKERS = 0
+PROCESS_CHUNK_SIZE = 500
+
+# Verification service (--serve): a local HTTP/JSON API that keeps the HTTP
+# connection pools, response cache, lookup memo and worker pools warm between
+# jobs. Jobs from different clients (X-Client-Id header, else the caller's
+# address) are taken round-robin and run SERVICE_JOB_WORKERS at a time.
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8750
+SERVICE_DIR = "verification_service"   # One folder of reports per job
+SERVICE_JOB_WORKERS = 2
+SERVICE_KEEP_JOBS = 200                # Finished jobs kept (with their files); older ones are removed
+SERVICE_MAX_QUEUED_PER_CLIENT = 50     # Further submissions are refused (429) until some have run
+SERVICE_MAX_UPLOAD_MB = 50
+SERVICE_LOOKUP_MEMO_SIZE = 200000      # Shared lookup memo is started afresh beyond this many entries
 
 # DEBUG MODE - Set to False after testing
 DEBUG_MODE = False
 
 # Your email for polite API usage (CrossRef/PubMed require this)
-EMAIL = "your.email@uw.edu"  # Replace with your actual email
+EMAIL = "your.email@uw.edu"  # Replace with your actual email, or pass --email
 
 # API endpoints
 CROSSREF_API = "https://api.crossref.org/works"
 PUBMED_API = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+PUBMED_SUMMARY_API = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+
+# HTTP transport behind get_with_backoff: "sync" (requests, default) or "async"
+# (asyncio + httpx connection pool with keep-alive, HTTP/2 when h2 is installed)
+HTTP_TRANSPORT = "sync"
+HTTP_POOL_SIZE = 20      # Keep-alive connections held open by the async transport
+                         # (also the CrossRef searches it keeps in flight at once)
+
+# Retry policy shared by both transports
+REQUEST_TIMEOUT = 20     # seconds
+RETRY_TOTAL = 5
+RETRY_BACKOFF_FACTOR = 1.0
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# Proactive API throttling (requests/second per host, shared by all workers).
+# CrossRef's rate is re-read from its X-Rate-Limit-* response headers; NCBI
+# allows 3 requests/second, or 10 with an API key.
+CROSSREF_RATE_LIMIT = 10
+NCBI_API_KEY = ""  # Optional: https://www.ncbi.nlm.nih.gov/account/settings/
+
+# PubMed lookups are resolved in OR-joined groups of this many references
+PUBMED_BATCH_SIZE = 20
+PUBMED_BATCH_RETMAX = 100  # PMIDs fetched per group to map hits back to references
+
+# CrossRef rows requested per title search; every row is scored and the best kept
+CROSSREF_CANDIDATE_ROWS = 3
+
+# DOIs resolved per CrossRef filter=doi:... request in the bulk pre-pass
+CROSSREF_DOI_BATCH_SIZE = 50
+
+# Persistent API response cache (re-runs only pay for new or changed references)
+CACHE_ENABLED = True
+CACHE_FILE = "verification_cache.sqlite"
+CACHE_TTL_DAYS = 30      # Entries older than this are fetched again
+CACHE_MAX_MB = 200       # Least recently used entries are evicted beyond this size
+CACHE_OFFLINE = False    # Answer from the cache only, never touch the network
+
+# Local CrossRef mirror: an index built from a CrossRef data dump with
+# --build-mirror. When set, CrossRef lookups are answered from it and never
+# reach the API (PubMed is still queried unless CACHE_OFFLINE is set).
+CROSSREF_MIRROR = ""     # e.g. "crossref_mirror.sqlite" (a directory = compact format); "" = use the API
+MIRROR_QUERY_TOKENS = 6     # Rarest title/author tokens used to find candidates
+MIRROR_CANDIDATE_POOL = 50  # Candidates ranked before CROSSREF_CANDIDATE_ROWS are scored
+MIRROR_BUILD_BATCH = 10000  # Works inserted per transaction while building
+MIRROR_BUILD_RUN = 4000000  # Compact format: (hash, work) pairs sorted per run file while building
+MIRROR_FORMAT = "sqlite"    # --build-mirror output: "sqlite" file or memory-mapped "compact" directory
+
+# Title blocking: MinHash LSH over character n-grams of normalized titles,
+# narrowing fuzzy title matches to a few candidates before title_similarity
+# (mirrors built with --mirror-blocking). Two titles become candidates when
+# all BLOCKING_ROWS values of any one of BLOCKING_BANDS bands agree: more
+# bands or fewer rows raise recall and candidate counts. Titles with n-gram
+# Jaccard similarity near (1/BANDS)**(1/ROWS) collide half the time.
+BLOCKING_NGRAM = 3
+BLOCKING_BANDS = 16
+BLOCKING_ROWS = 4
+BLOCKING_MAX_BUCKET = 1000  # Larger buckets (degenerate titles) are ignored
 
 # Matching thresholds for JOURNAL ARTICLES
 TITLE_SIMILARITY_HIGH = 0.85  # 85% match = strong confidence
@@ -59,6 +242,15 @@ BOOK_TITLE_SIMILARITY_LOW = 0.60   # 60% match for books
 ALLOW_YEAR_DIFFERENCE = 2  # Allow ±2 years for early online vs print
 ANCIENT_TEXT_CUTOFF = 1800  # References before this are "ancient texts"
 
+# Duplicate citations: entries with the same DOI, or with titles at least this
+# similar, the same first author and years within ALLOW_YEAR_DIFFERENCE, are
+# verified once; later copies reuse that result and are flagged
+# DUPLICATE_OF_REF_<n> (the entry to remove from the bibliography).
+DETECT_DUPLICATES = True
+DUPLICATE_TITLE_SIMILARITY = 0.9
+DUPLICATE_BLOCKING_BANDS = 20  # Title blocking for the duplicate search favours recall
+DUPLICATE_BLOCKING_ROWS = 3    # (see BLOCKING_BANDS / BLOCKING_ROWS)
+
 # Book detection cues (expanded list)
 BOOK_CUES = [
     'publisher', 'press', 'edition', 'ed.)', 'trans.)', 'pp.',
@@ -72,29 +264,554 @@ BOOK_CUES = [
 # ============================================================================
 # CONFIGURE REQUESTS SESSION WITH BACKOFF & RETRY LOGIC
 # ============================================================================
-session = requests.Session()
-session.headers.update({
-    "User-Agent": f"UW-AcademicBibliographyVerifier/1.0 (mailto:{EMAIL})"
-})
+_session = None
+_session_pool_size = 10  # requests' default pool_maxsize
+_session_pool_lock = threading.Lock()
+
+def _mount_retrying_adapters(session, pool_size):
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    retries = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["GET", "HEAD"]
+    )
+    for prefix in ("https://", "http://"):  # http: local stand-in APIs (benchmarks)
+        session.mount(prefix, HTTPAdapter(max_retries=retries,
+                                          pool_connections=pool_size,
+                                          pool_maxsize=pool_size))
+
+def get_session():
+    """The shared requests session, created (and requests imported) on first use
+
+    Built lazily so its User-Agent carries the EMAIL set from the command
+    line, and so runs that never reach the network don't import requests.
+    """
+    global _session
+    with _session_pool_lock:
+        if _session is None:
+            import requests
+            session = requests.Session()
+            session.headers.update({
+                "User-Agent": f"UW-AcademicBibliographyVerifier/1.0 (mailto:{EMAIL})"
+            })
+            _mount_retrying_adapters(session, _session_pool_size)
+            _session = session
+        return _session
+
+def configure_session(pool_size):
+    """Grow the session connection pool so concurrent workers don't queue for sockets
+
+    The pool is only ever enlarged: remounting drops the open keep-alive
+    connections, which later runs in the same process (batch documents,
+    service jobs) would otherwise have to open again. Before the session
+    exists this only records the size it will be created with.
+    """
+    global _session_pool_size
+    with _session_pool_lock:
+        if pool_size <= _session_pool_size:
+            return
+        if _session is not None:
+            _mount_retrying_adapters(_session, pool_size)
+        _session_pool_size = pool_size
+
+# ============================================================================
+# HTTP TRANSPORTS
+# ============================================================================
+
+class HTTPResult:
+    """Transport-neutral response with the parts of requests.Response we use"""
+    
+    from_cache = False
+    retries = 0  # Retries the transport made before this response
+    
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+    
+    @property
+    def ok(self):
+        return self.status_code < 400
+    
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+    
+    def json(self):
+        return json.loads(self.text)
+    
+    def raise_for_status(self):
+        if not self.ok:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+class SyncTransport:
+    """Default transport: the shared requests session (urllib3 Retry does the backoff)"""
+    
+    def get(self, url, params=None, timeout=REQUEST_TIMEOUT):
+        return get_session().get(url, params=params, timeout=timeout)
+    
+    def close(self):
+        pass
+
+class AsyncTransport:
+    """asyncio transport on an httpx.AsyncClient with a tuned keep-alive pool
+
+    The client lives on a private event loop in a background thread. fetch()
+    is the coroutine for asyncio callers (the CrossRef lookup stage runs its
+    searches as coroutines on this loop, see SharedLookups.fetch_all_async);
+    get() lets ordinary worker threads share the same pool for everything
+    else, so dozens of lookups can be in flight over a few connections. Retries mirror the urllib3 Retry used by the sync session:
+    up to RETRY_TOTAL retries on RETRY_STATUS_CODES and connection errors,
+    no wait before the first retry, then RETRY_BACKOFF_FACTOR * 2**(n-1)
+    seconds (capped at 120), or the Retry-After header on 413/429/503.
+    Failures surface as requests exceptions so callers need not care which
+    transport is active.
+    """
+    
+    def __init__(self, pool_size=HTTP_POOL_SIZE):
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError('The async transport needs httpx: pip install "httpx[http2]"')
+        try:
+            import h2  # noqa: F401 - only probing whether HTTP/2 is available
+            http2 = True
+        except ImportError:
+            http2 = False
+        
+        import asyncio
+        self._httpx = httpx
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="async-transport", daemon=True)
+        self._thread.start()
+        
+        async def make_client():
+            return httpx.AsyncClient(
+                http2=http2,
+                headers=dict(get_session().headers),
+                limits=httpx.Limits(max_connections=pool_size,
+                                    max_keepalive_connections=pool_size,
+                                    keepalive_expiry=30.0),
+                follow_redirects=True,
+            )
+        self._client = asyncio.run_coroutine_threadsafe(make_client(), self._loop).result()
+    
+    @staticmethod
+    def _retry_after(response):
+        """Seconds requested by a Retry-After header, or None"""
+        value = response.headers.get('Retry-After')
+        if response.status_code not in (413, 429, 503) or not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+    
+    async def fetch(self, url, params=None, timeout=REQUEST_TIMEOUT):
+        """GET with the shared retry policy; returns an HTTPResult"""
+        import asyncio
+        import requests
+        errors = 0
+        while True:
+            try:
+                response = await self._client.get(url, params=params, timeout=timeout)
+            except self._httpx.HTTPError as e:
+                if errors >= RETRY_TOTAL:
+                    raise requests.exceptions.ConnectionError(str(e))
+                response = None
+            
+            if response is not None:
+                if response.status_code not in RETRY_STATUS_CODES or errors >= RETRY_TOTAL:
+                    result = HTTPResult(response.status_code, response.text, response.headers)
+                    result.retries = errors
+                    return result
+                wait = self._retry_after(response)
+            else:
+                wait = None
+            
+            errors += 1
+            if wait is None:
+                wait = 0.0 if errors <= 1 else min(120.0, RETRY_BACKOFF_FACTOR * 2 ** (errors - 1))
+            if wait:
+                await asyncio.sleep(wait)
+    
+    def submit(self, url, params=None, timeout=REQUEST_TIMEOUT):
+        """Schedule fetch() on the transport loop; returns a concurrent.futures.Future"""
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(self.fetch(url, params, timeout), self._loop)
+    
+    def get(self, url, params=None, timeout=REQUEST_TIMEOUT):
+        """Blocking wrapper around fetch() for use from worker threads"""
+        return self.submit(url, params, timeout).result()
+    
+    def run(self, coroutine):
+        """Run a coroutine on the transport loop and wait for its result"""
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+    
+    def close(self):
+        import asyncio
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+transport = None
+_transport_lock = threading.Lock()
+
+def get_transport():
+    """Create the configured HTTP transport on first use"""
+    global transport
+    with _transport_lock:
+        if transport is None:
+            if HTTP_TRANSPORT == "async":
+                transport = AsyncTransport(pool_size=HTTP_POOL_SIZE)
+            elif HTTP_TRANSPORT == "sync":
+                transport = SyncTransport()
+            else:
+                raise ValueError(f"Unknown HTTP_TRANSPORT {HTTP_TRANSPORT!r} (use 'sync' or 'async')")
+    return transport
+
+# ============================================================================
+# PER-HOST RATE LIMITING
+# ============================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a request slot is free
+
+    Tokens may go negative: each caller reserves the next free slot and sleeps
+    outside the lock until it arrives, so waiting workers are served in order.
+    """
+    
+    def __init__(self, rate, capacity=1.0, ceiling=None):
+        self.ceiling = ceiling
+        self.rate = min(rate, ceiling) if ceiling else rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self):
+        """Claim the next request slot; returns how many seconds to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+    
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            sleep(wait)
+    
+    def set_rate(self, rate):
+        """Change the refill rate, never exceeding the configured ceiling"""
+        if rate <= 0:
+            return
+        with self._lock:
+            self.rate = min(rate, self.ceiling) if self.ceiling else rate
+    
+    def update_from_headers(self, headers):
+        """Adopt CrossRef's advertised limit, e.g. X-Rate-Limit-Limit: 50 per X-Rate-Limit-Interval: 1s"""
+        limit = headers.get('X-Rate-Limit-Limit')
+        interval = headers.get('X-Rate-Limit-Interval')
+        if not limit or not interval:
+            return
+        match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m)?\s*$', interval)
+        try:
+            limit = float(limit)
+        except ValueError:
+            return
+        if not match:
+            return
+        seconds = float(match.group(1)) * {'ms': 0.001, 's': 1, 'm': 60}[match.group(2) or 's']
+        if seconds > 0 and limit / seconds != self.rate:
+            self.set_rate(limit / seconds)
+
+rate_limiters = {}
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter(url):
+    """Return the shared TokenBucket for the URL's host (None for hosts we don't throttle)"""
+    host = urlsplit(url).netloc.lower()
+    with _limiter_lock:
+        if host not in rate_limiters:
+            if host == 'api.crossref.org':
+                rate_limiters[host] = TokenBucket(CROSSREF_RATE_LIMIT)
+            elif host == 'eutils.ncbi.nlm.nih.gov':
+                ncbi_rate = 10 if NCBI_API_KEY else 3
+                rate_limiters[host] = TokenBucket(ncbi_rate, ceiling=ncbi_rate)
+            else:
+                rate_limiters[host] = None
+        return rate_limiters[host]
+
+# ============================================================================
+# REQUEST INSTRUMENTATION
+# ============================================================================
+
+class RequestStats:
+    """Counters for the API requests made for one reference (or one run stage)"""
+    
+    __slots__ = ('requests', 'cache_hits', 'retries', 'bytes')
+    
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.bytes = 0
+    
+    def add(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+    
+    @property
+    def cache_status(self):
+        """'none' (no request made), 'hit', 'miss' or 'mixed'"""
+        if not self.requests:
+            return 'none'
+        if self.cache_hits == self.requests:
+            return 'hit'
+        return 'mixed' if self.cache_hits else 'miss'
+    
+    def as_dict(self):
+        return {'requests': self.requests, 'cache_hits': self.cache_hits,
+                'network_requests': self.requests - self.cache_hits,
+                'retries': self.retries, 'bytes': self.bytes}
+
+_request_context = threading.local()
+
+@contextmanager
+def track_requests(stats):
+    """Count the get_with_backoff calls this thread makes inside the block into stats"""
+    previous = getattr(_request_context, 'stats', None)
+    _request_context.stats = stats
+    try:
+        yield stats
+    finally:
+        _request_context.stats = previous
+
+def _note_request(response, cached=False, retries=None):
+    """Record one request in the thread's RequestStats (a no-op unless track_requests is active)
+
+    bytes is the size of the response body as received; retries come from
+    urllib3's retry history (sync transport) or HTTPResult.retries (async).
+    """
+    stats = getattr(_request_context, 'stats', None)
+    if stats is None:
+        return
+    stats.requests += 1
+    if cached:
+        stats.cache_hits += 1
+    if response is not None:
+        stats.bytes += len(response.content)
+        if retries is None:
+            retries = getattr(response, 'retries', None)
+            if not isinstance(retries, int):
+                history = getattr(getattr(getattr(response, 'raw', None), 'retries', None), 'history', None)
+                retries = len(history) if history else 0
+    stats.retries += retries or 0
+
+# ============================================================================
+# PERSISTENT RESPONSE CACHE
+# ============================================================================
+
+# Params that identify the caller rather than the query; excluded from cache keys
+CACHE_IGNORED_PARAMS = {'mailto', 'email', 'tool', 'api_key'}
+
+class CachedResponse(HTTPResult):
+    """Response rebuilt from a cache entry"""
+    
+    from_cache = True
+
+class ResponseCache:
+    """SQLite-backed cache of API responses keyed on normalized URL and params
+
+    Successful responses and 404s (e.g. unknown DOIs) are stored. Entries
+    expire after ttl_seconds; once the stored bodies exceed max_bytes the
+    least recently used entries are evicted. Safe to share between threads.
+    """
+    
+    def __init__(self, path, ttl_seconds, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, status INTEGER NOT NULL, body TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    @staticmethod
+    def make_key(url, params):
+        """Build a stable key: lower-cased scheme/host, no trailing slash, sorted params"""
+        parts = urlsplit(url)
+        path = parts.path.rstrip('/') or '/'
+        base = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, '', ''))
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items()
+                       if k not in CACHE_IGNORED_PARAMS)
+        raw = base + '?' + '&'.join(f"{k}={v}" for k, v in items)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Return a CachedResponse, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return CachedResponse(row[0], row[1])
+    
+    def put(self, key, status, body):
+        """Store a response body, evicting LRU entries if over the size limit"""
+        now = time.time()
+        size = len(body.encode('utf-8'))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, body, size, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (key, status, body, size, now, now))
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+    
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            doomed.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+    
+    def stats_line(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return f"Cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate) [{self.path}]"
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+response_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Open the response cache on first use (None when caching is disabled)"""
+    global response_cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if response_cache is None:
+            response_cache = ResponseCache(CACHE_FILE,
+                                           ttl_seconds=CACHE_TTL_DAYS * 86400,
+                                           max_bytes=CACHE_MAX_MB * 1024 * 1024)
+    return response_cache
+
+def _cache_lookup(url, params):
+    """Shared cache step of get_with_backoff(_async): returns (cache, key, cached_response)"""
+    cache = get_response_cache()
+    if cache is None:
+        return None, None, None
+    key = cache.make_key(url, params)
+    return cache, key, cache.get(key)
 
-retries = Retry(
-    total=5,
-    backoff_factor=1.0,
-    status_forcelist=[429, 500, 502, 503, 504],
-    allowed_methods=["GET", "HEAD"]
-)
-session.mount("https://", HTTPAdapter(max_retries=retries))
+def _finish_response(response, limiter, cache, cache_key):
+    """Shared post-request step: adapt the rate limit, cache, and raise on HTTP errors"""
+    if limiter is not None:
+        limiter.update_from_headers(response.headers)
+    if cache_key is not None and (response.ok or response.status_code == 404):
+        cache.put(cache_key, response.status_code, response.text)
+    response.raise_for_status()
+    return response
 
 def get_with_backoff(url, params=None):
-    """Make HTTP GET request with automatic backoff and timeout"""
+    """Make HTTP GET request with automatic backoff and timeout
+
+    Responses are served from the persistent cache when possible. In offline
+    mode a cache miss returns None instead of going to the network.
+    """
     if params is None:
         params = {}
     params.setdefault("mailto", EMAIL)
+    
+    cache, cache_key, cached = _cache_lookup(url, params)
+    if cached is not None:
+        _note_request(cached, cached=True)
+        return cached if cached.ok else None
+    if CACHE_OFFLINE:
+        return None
+    
+    import requests
+    limiter = get_rate_limiter(url)
+    response = None
     try:
-        response = session.get(url, params=params, timeout=20)
-        response.raise_for_status()
-        return response
+        if limiter is not None:
+            limiter.acquire()
+        response = get_transport().get(url, params=params, timeout=REQUEST_TIMEOUT)
+        _note_request(response)
+        return _finish_response(response, limiter, cache, cache_key)
     except requests.exceptions.RequestException as e:
+        if response is None:
+            _note_request(None, retries=RETRY_TOTAL if isinstance(e, requests.exceptions.RetryError) else 0)
+        return None
+
+async def get_with_backoff_async(url, params=None):
+    """Coroutine version of get_with_backoff for asyncio callers (async transport only)"""
+    if params is None:
+        params = {}
+    params.setdefault("mailto", EMAIL)
+    
+    cache, cache_key, cached = _cache_lookup(url, params)
+    if cached is not None:
+        _note_request(cached, cached=True)
+        return cached if cached.ok else None
+    if CACHE_OFFLINE:
+        return None
+    
+    import asyncio
+    import requests
+    active = get_transport()
+    if not isinstance(active, AsyncTransport):
+        raise RuntimeError("get_with_backoff_async needs HTTP_TRANSPORT = 'async'")
+    limiter = get_rate_limiter(url)
+    response = None
+    try:
+        if limiter is not None:
+            await asyncio.sleep(limiter.reserve())
+        if asyncio.get_running_loop() is active._loop:
+            response = await active.fetch(url, params, REQUEST_TIMEOUT)
+        else:
+            response = await asyncio.wrap_future(active.submit(url, params, REQUEST_TIMEOUT))
+        _note_request(response)
+        return _finish_response(response, limiter, cache, cache_key)
+    except requests.exceptions.RequestException:
+        if response is None:
+            _note_request(None, retries=RETRY_TOTAL)
         return None
 
 # ============================================================================
@@ -112,13 +829,62 @@ def strip_accents(text):
     return ''.join(c for c in unicodedata.normalize('NFD', text)
                    if unicodedata.category(c) != 'Mn')
 
+@lru_cache(maxsize=65536)
+def normalize_title(title):
+    """Accent-free, lower-cased, stripped form of a title (cached per title)"""
+    return strip_accents(title).lower().strip()
+
 def title_similarity(t1, t2):
     """Calculate title similarity score using SequenceMatcher (0-1)"""
     if not t1 or not t2:
         return 0
-    t1_clean = strip_accents(t1).lower().strip()
-    t2_clean = strip_accents(t2).lower().strip()
-    return SequenceMatcher(None, t1_clean, t2_clean).ratio()
+    return SequenceMatcher(None, normalize_title(t1), normalize_title(t2)).ratio()
+
+def title_similarity_at_least(t1, t2, floor):
+    """title_similarity(t1, t2) if it can reach floor, otherwise None
+
+    Cheap upper bounds are tried first: the length ratio, then the C-level
+    Indel (LCS) similarity when rapidfuzz is installed, otherwise
+    SequenceMatcher.quick_ratio. SequenceMatcher's matching blocks form a
+    common subsequence, so none of these can be below the real ratio; a
+    returned score is exactly what title_similarity gives.
+    """
+    if not t1 or not t2:
+        return 0 if floor <= 0 else None
+    a = normalize_title(t1)
+    b = normalize_title(t2)
+    # Tolerance so float rounding in a bound never rejects a score equal to floor
+    floor -= 1e-9
+    length = len(a) + len(b)
+    if length and 2.0 * min(len(a), len(b)) / length < floor:
+        return None
+    if rapidfuzz_indel is not None and rapidfuzz_indel.normalized_similarity(a, b) < floor:
+        return None
+    matcher = SequenceMatcher(None, a, b)
+    if rapidfuzz_indel is None and matcher.quick_ratio() < floor:
+        return None
+    return matcher.ratio()
+
+# ============================================================================
+# PRECOMPILED PATTERNS
+# ============================================================================
+
+BCE_PATTERN = re.compile(r'\((\d+)\s*bce')
+YEAR_PATTERN = re.compile(r'\((\d{4})\)')
+DOI_PATTERN = re.compile(r'10\.\d{4,9}/[-._;()/:A-Z0-9]+', re.IGNORECASE)
+ORIGINAL_YEAR_PATTERN = re.compile(r'\(Original work published\s+(\d{3,4})\)', re.IGNORECASE)
+# \w matches Unicode word characters (accented surnames)
+FIRST_AUTHOR_PATTERN = re.compile(r'^([\w\-\']+),\s+[A-Z]', re.UNICODE)
+ET_AL_FIRST_AUTHOR_PATTERN = re.compile(r'^([\w\-\']+),\s+[A-Z]\.', re.UNICODE)
+AUTHOR_SPLIT_PATTERN = re.compile(r',\s*&\s*|\s+&\s+')
+SURNAME_PATTERN = re.compile(r'([\w\-\']+),\s+[A-Z]\.', re.UNICODE)
+# Multiple title patterns to handle variations, tried in order
+TITLE_PATTERNS = [
+    re.compile(r'\(\d{4}\)\.\s*(.+?)[.?!]\s+(?=[A-Z])'),
+    re.compile(r'\(\d{4}\)\.\s*(.+?)(?=\s+[A-Z][A-Za-z&\-\s]+[,\(])'),
+    re.compile(r'\(\d{4}\)\.\s*(.+?)\.\s*[A-Z]')
+]
+TITLE_ANCHOR_PATTERN = re.compile(r'\(\d{4}\)\.')
 
 # ============================================================================
 # REFERENCE TYPE DETECTION
@@ -126,26 +892,27 @@ def title_similarity(t1, t2):
 
 def detect_reference_type(text):
     """Detect if reference is a book, journal article, ancient text, or in-press"""
-    text_lower = text.lower()
-    
+    return _reference_type(text, text.lower(), YEAR_PATTERN.search(text))
+
+def _reference_type(text, text_lower, year_match):
+    """detect_reference_type with the lower-cased text and year match precomputed"""
     # Check for ancient text indicators (BCE)
-    if re.search(r'\((\d+)\s*bce', text_lower):
+    if BCE_PATTERN.search(text_lower):
         return 'ancient_text'
     
     # Check for very old dates (pre-1800)
-    year_match = re.search(r'\((\d{4})\)', text)
     if year_match:
         year = int(year_match.group(1))
         if year < ANCIENT_TEXT_CUTOFF:
             return 'ancient_text'
     
-    # Check for book indicators
-    if any(indicator in text_lower for indicator in BOOK_CUES):
-        return 'book'
+    # Check for book indicators (plain loop: cheaper than any() over a generator)
+    for indicator in BOOK_CUES:
+        if indicator in text_lower:
+            return 'book'
     
     # Check for "in press" or future dates
-    current_year = datetime.now().year
-    if year_match and int(year_match.group(1)) > current_year:
+    if year_match and int(year_match.group(1)) > datetime.now().year:
         return 'in_press'
     
     if 'in press' in text_lower:
@@ -160,49 +927,61 @@ def detect_reference_type(text):
 
 def extract_doi_from_text(text):
     """Extract DOI from reference text"""
-    doi_pattern = r'10\.\d{4,9}/[-._;()/:A-Z0-9]+'
-    match = re.search(doi_pattern, text, re.IGNORECASE)
+    match = DOI_PATTERN.search(text)
     return match.group(0) if match else None
 
 def extract_year_from_text(text):
     """Extract publication year from reference text"""
-    year_pattern = r'\((\d{4})\)'
-    match = re.search(year_pattern, text)
+    match = YEAR_PATTERN.search(text)
     return match.group(1) if match else None
 
 def extract_original_year_from_text(text):
     """Extract original publication year for classics/translations"""
-    original_pub_pattern = r'\(Original work published\s+(\d{3,4})\)'
-    match = re.search(original_pub_pattern, text, re.IGNORECASE)
+    match = ORIGINAL_YEAR_PATTERN.search(text)
     return match.group(1) if match else None
 
 def extract_first_author_from_apa(text):
     """Extract first author surname - handles accented characters"""
-    text = normalize_text(text)
-    # \w matches Unicode word characters with re.UNICODE flag
-    pattern = r'^([\w\-\']+),\s+[A-Z]'
-    match = re.search(pattern, text, re.UNICODE)
+    return _first_author(normalize_text(text))
+
+def _first_author(normalized):
+    match = FIRST_AUTHOR_PATTERN.search(normalized)
     return match.group(1) if match else None
 
 def extract_all_authors_from_apa(text):
     """Extract all authors from APA citation"""
-    text = normalize_text(text)
+    return _all_authors(normalize_text(text))
+
+def _author_block(normalized):
+    """Author block: everything before the first "(YEAR)"
+
+    Gives the same result as the lazy author-block regex "^(.+?) *(YEAR)"
+    without its backtracking: the text before the first "(YEAR)" not at position 0,
+    minus trailing whitespace (keeping at least one character), or None if
+    that text spans a line break.
+    """
+    for year_match in YEAR_PATTERN.finditer(normalized):
+        if year_match.start() >= 1:
+            end = max(1, len(normalized[:year_match.start()].rstrip()))
+            block = normalized[:end]
+            return None if '\n' in block else block
+    return None
+
+def _all_authors(normalized):
     # Match everything before (YEAR)
-    author_block_pattern = r'^(.+?)\s*\(\d{4}\)'
-    match = re.search(author_block_pattern, text)
-    if match:
-        authors_text = match.group(1)
+    authors_text = _author_block(normalized)
+    if authors_text is not None:
         
         # Handle "et al."
         if 'et al' in authors_text.lower():
-            first = re.search(r'^([\w\-\']+),\s+[A-Z]\.', authors_text, re.UNICODE)
+            first = ET_AL_FIRST_AUTHOR_PATTERN.search(authors_text)
             return [first.group(1)] if first else []
         
         # Split on ", &" or " & " for multiple authors
-        author_parts = re.split(r',\s*&\s*|\s+&\s+', authors_text)
+        author_parts = AUTHOR_SPLIT_PATTERN.split(authors_text)
         authors = []
         for part in author_parts:
-            surname_match = re.search(r'([\w\-\']+),\s+[A-Z]\.', part, re.UNICODE)
+            surname_match = SURNAME_PATTERN.search(part)
             if surname_match:
                 authors.append(surname_match.group(1))
         return authors
@@ -210,21 +989,70 @@ def extract_all_authors_from_apa(text):
 
 def extract_title_from_apa(text):
     """Extract article/book title from APA citation"""
-    # Multiple patterns to handle variations
-    patterns = [
-        r'\(\d{4}\)\.\s*(.+?)[.?!]\s+(?=[A-Z])',
-        r'\(\d{4}\)\.\s*(.+?)(?=\s+[A-Z][A-Za-z&\-\s]+[,\(])',
-        r'\(\d{4}\)\.\s*(.+?)\.\s*[A-Z]'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text)
+    # Every pattern starts at "(YEAR)." - skip them all when it is absent
+    if not TITLE_ANCHOR_PATTERN.search(text):
+        return None
+    
+    for pattern in TITLE_PATTERNS:
+        match = pattern.search(text)
         if match:
             title = match.group(1).strip()
             if len(title) > 10:  # Filter out very short matches
                 return title
     return None
 
+# Compact per-reference record: the same fields the extract_* functions return
+ParsedReference = namedtuple('ParsedReference', [
+    'ref_type', 'doi', 'year', 'original_year', 'first_author', 'all_authors', 'title'
+])
+
+def parse_reference(text):
+    """Parse one APA reference in a single pass over precompiled patterns
+
+    Equivalent to calling detect_reference_type and every extract_* function,
+    but the year match, lower-cased text and Unicode normalization are each
+    computed once and shared. all_authors is a tuple.
+    """
+    year_match = YEAR_PATTERN.search(text)
+    normalized = normalize_text(text)
+    doi_match = DOI_PATTERN.search(text)
+    original_match = ORIGINAL_YEAR_PATTERN.search(text)
+    return ParsedReference(
+        ref_type=_reference_type(text, text.lower(), year_match),
+        doi=doi_match.group(0) if doi_match else None,
+        year=year_match.group(1) if year_match else None,
+        original_year=original_match.group(1) if original_match else None,
+        first_author=_first_author(normalized),
+        all_authors=tuple(_all_authors(normalized)),
+        title=extract_title_from_apa(text)
+    )
+
+# ============================================================================
+# BULK EXTRACTION
+# ============================================================================
+
+EXTRACTED_COLUMNS = [
+    'Reference_Type', 'Extracted_First_Author', 'Extracted_All_Authors',
+    'Extracted_Year', 'Extracted_Original_Year', 'Extracted_Title', 'Extracted_DOI'
+]
+
+def extract_references_frame(texts):
+    """DataFrame of parse_reference's fields for a whole Series of reference strings
+
+    Not vectorized: each string goes through parse_reference, and this
+    function only builds the frame (same index as texts) with Reference_Type
+    and the Extracted_* columns, None where a field is missing. A version
+    built from per-column Series.str passes re-scanned every string once per
+    pattern and was slower than parse_reference. Intended for offline corpus
+    audits; no API calls are made.
+    """
+    import pandas as pd
+    texts = pd.Series(texts, dtype=object)
+    rows = [(parsed.ref_type, parsed.first_author, ', '.join(parsed.all_authors), parsed.year,
+             parsed.original_year, parsed.title, parsed.doi)
+            for parsed in map(parse_reference, texts)]
+    return pd.DataFrame(rows, index=texts.index, columns=EXTRACTED_COLUMNS, dtype=object)
+
 def extract_crossref_year(metadata):
     """Extract year from CrossRef metadata, checking multiple fields"""
     if not isinstance(metadata, dict):
@@ -254,431 +1082,3377 @@ def is_probable_reference(line):
     return True
 
 # ============================================================================
-# API CHECKING FUNCTIONS
+# WORD DOCUMENT READER (STREAMING)
 # ============================================================================
 
-def check_crossref(title, author=None, year=None, doi=None):
-    """Check reference against CrossRef database with improved session handling"""
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_BODY, W_P, W_R, W_HYPERLINK, W_T, W_BR = (W_NS + tag for tag in ('body', 'p', 'r', 'hyperlink', 't', 'br'))
+# Run children with a fixed text equivalent, as python-docx maps them
+W_RUN_SYMBOLS = {W_NS + 'tab': '\t', W_NS + 'ptab': '\t', W_NS + 'cr': '\n', W_NS + 'noBreakHyphen': '-'}
+HEADING_NUMBER_PATTERN = re.compile(r'^(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.)\s+')
+
+def _docx_main_part(archive):
+    """Zip member holding the main document (word/document.xml unless _rels/.rels says otherwise)"""
     try:
-        if doi:
-            url = f"https://api.crossref.org/works/{doi}"
-            response = get_with_backoff(url)
-            if response is None:
-                return False, None
-            data = response.json()
-            return True, data.get("message", {})
+        rels = ET.fromstring(archive.read('_rels/.rels'))
+    except KeyError:
+        return 'word/document.xml'
+    for rel in rels:
+        if rel.get('Type', '').endswith('/officeDocument'):
+            return rel.get('Target', 'word/document.xml').lstrip('/')
+    return 'word/document.xml'
+
+def _docx_paragraph_text(p):
+    """Text of a w:p element exactly as python-docx's Paragraph.text builds it
+
+    Only runs that are direct children of the paragraph or of a direct
+    w:hyperlink count; in a run, w:t text, tabs, soft returns, non-breaking
+    hyphens and text-wrapping breaks (page and column breaks are dropped).
+    """
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            runs = (child,)
+        elif child.tag == W_HYPERLINK:
+            runs = [run for run in child if run.tag == W_R]
         else:
-            params = {"rows": 3}
-            if title:
-                params["query.title"] = title
-            if author:
-                params["query.author"] = author
-            
-            response = get_with_backoff(CROSSREF_API, params=params)
-            if response is None:
-                return False, None
-            
-            data = response.json()
-            items = data.get("message", {}).get("items", [])
-            if items:
-                return True, items[0]
-        
-        return False, None
-    except Exception as e:
-        return False, str(e)
+            continue
+        for run in runs:
+            for item in run:
+                tag = item.tag
+                if tag == W_T:
+                    parts.append(item.text or '')
+                elif tag == W_BR:
+                    if item.get(W_NS + 'type', 'textWrapping') == 'textWrapping':
+                        parts.append('\n')
+                elif tag in W_RUN_SYMBOLS:
+                    parts.append(W_RUN_SYMBOLS[tag])
+    return ''.join(parts)
 
-def check_pubmed(title, author=None):
-    """Check reference against PubMed (primarily for journal articles)"""
+def iter_docx_paragraphs(word_file):
+    """Yield the text of each body paragraph of a .docx, streaming the XML
+
+    Gives what [p.text for p in Document(word_file).paragraphs] gives, but
+    parses word/document.xml incrementally and frees each paragraph once its
+    text is out, so memory stays flat however long the manuscript is.
+    """
+    with zipfile.ZipFile(word_file) as archive:
+        with archive.open(_docx_main_part(archive)) as xml:
+            depth = 0
+            body = None
+            for event, elem in ET.iterparse(xml, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 2 and elem.tag == W_BODY:
+                        body = elem
+                    continue
+                depth -= 1
+                if depth == 2 and body is not None:
+                    # A direct child of w:body (paragraph, table, section properties...)
+                    if elem.tag == W_P:
+                        yield _docx_paragraph_text(elem)
+                    body.clear()
+
+def iter_document_paragraphs(word_file, reader=None):
+    """Paragraph texts of a Word document with the DOCX_READER (or given) reader"""
+    if reader is None:
+        reader = DOCX_READER
+    if reader == 'stream':
+        try:
+            # Read one paragraph first so unreadable files fall back before anything is yielded
+            paragraphs = iter_docx_paragraphs(word_file)
+            first = next(paragraphs, None)
+        except (KeyError, zipfile.BadZipFile, ET.ParseError):
+            first = paragraphs = None
+        if paragraphs is not None:
+            if first is not None:
+                yield first
+                yield from paragraphs
+            return
     try:
-        # Use quoted title for better precision
-        query = f'"{title}"[Title]'
-        if author:
-            query += f' AND {author}[Author]'
-        
-        params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmode': 'json',
-            'retmax': 1,
-            'tool': 'UWAcademicVerifier',
-            'email': EMAIL
-        }
-        
-        response = get_with_backoff(PUBMED_API, params=params)
-        if response is None:
-            return False, None
-        
-        data = response.json()
-        count = int(data.get('esearchresult', {}).get('count', 0))
-        return count > 0, data
-    except Exception as e:
-        return False, str(e)
+        from docx import Document
+    except ImportError:
+        raise RuntimeError("Reading this Word file needs python-docx: pip install python-docx")
+    for para in Document(word_file).paragraphs:
+        yield para.text
+
+def is_reference_heading(text):
+    """Does a paragraph read like the heading of the reference list?"""
+    heading = HEADING_NUMBER_PATTERN.sub('', text.strip()).rstrip(':').strip().casefold()
+    return heading in REFERENCE_HEADINGS
+
+def collect_references(paragraphs):
+    """Probable references among paragraph texts, from the reference-list heading on
+
+    Collection starts at the first heading in REFERENCE_HEADINGS, so
+    citations in the body text are not picked up; without one, or with
+    nothing reference-like after it, every probable reference counts. Only
+    the kept texts are held, so paragraphs can be a lazy stream.
+    """
+    before_heading = []
+    references = None
+    
+    for text in paragraphs:
+        text = text.strip()
+        if references is None and is_reference_heading(text):
+            references = []
+        elif is_probable_reference(text):
+            (before_heading if references is None else references).append(text)
+    return references if references else before_heading
 
 # ============================================================================
-# MAIN VERIFICATION FUNCTION
+# INPUT FORMATS (BIBTEX, RIS, PLAIN TEXT)
 # ============================================================================
 
-def verify_bibliography(word_file):
-    """Main function to verify all references"""
+# BibTeX / RIS entry types cited like books (looser title threshold, no PubMed)
+BIBTEX_BOOK_TYPES = {'book', 'inbook', 'incollection', 'booklet', 'manual', 'mvbook', 'bookinbook',
+                     'collection', 'mvcollection', 'proceedings', 'phdthesis', 'mastersthesis',
+                     'thesis', 'techreport', 'report'}
+RIS_BOOK_TYPES = {'BOOK', 'CHAP', 'EBOOK', 'ECHAP', 'EDBOOK', 'THES', 'RPRT', 'MANSCPT'}
+BIBTEX_MONTHS = {month: month.capitalize() for month in
+                 ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')}
+
+# LaTeX accents -> Unicode combining marks (\'e, \'{e}, {\"o}, \c{c}, \v s ...)
+LATEX_ACCENTS = {'`': '\u0300', "'": '\u0301', '^': '\u0302', '"': '\u0308', '~': '\u0303',
+                 '=': '\u0304', '.': '\u0307', 'u': '\u0306', 'v': '\u030c', 'H': '\u030b',
+                 'c': '\u0327', 'k': '\u0328', 'r': '\u030a'}
+LATEX_SYMBOLS = {'o': 'ø', 'O': 'Ø', 'aa': 'å', 'AA': 'Å', 'ae': 'æ', 'AE': 'Æ', 'oe': 'œ',
+                 'OE': 'Œ', 'ss': 'ß', 'l': 'ł', 'L': 'Ł', 'i': 'ı', 'j': 'ȷ'}
+LATEX_SYMBOL_ACCENT_PATTERN = re.compile(r"""\\([`'^"~=.])\s*(?:\{\s*(\\?[A-Za-z])\s*\}|(\\?[A-Za-z]))""")
+LATEX_LETTER_ACCENT_PATTERN = re.compile(r'\\([uvHckr])(?:\s*\{\s*(\\?[A-Za-z])\s*\}|\s+(\\?[A-Za-z]))')
+LATEX_SYMBOL_PATTERN = re.compile(r'\\(aa|AA|ae|AE|oe|OE|ss|[oOlLij])(?![A-Za-z])\s*')
+LATEX_COMMAND_PATTERN = re.compile(r'\\[A-Za-z]+\*?\s*')
+LATEX_ESCAPED_PATTERN = re.compile(r'\\([&%$#_{}])')
+BIBTEX_ENTRY_PATTERN = re.compile(r'@\s*([A-Za-z]+)\s*([{(])')
+BIBTEX_BRACE_PATTERN = re.compile(r'[{}]')
+BIBTEX_QUOTED_PATTERN = re.compile(r'["{}]')
+BIBTEX_WORD_PATTERN = re.compile(r'[^,#})\s]*')
+BIBTEX_SPACE_PATTERN = re.compile(r'\s*')
+# Fast path: name = {value} (no nested braces) or name = number, not part of a '#' concatenation
+BIBTEX_SIMPLE_FIELD_PATTERN = re.compile(r'[\s,]*([^\s=,{}"#]+)\s*=\s*(?:\{([^{}]*)\}|(\d+))\s*(?=[,})])')
+BIBTEX_NAME_SEPARATOR = re.compile(r'\s+and\s+', re.IGNORECASE)
+RIS_LINE_PATTERN = re.compile(r'^([A-Z][A-Z0-9])  -(?: (.*))?$')
+FOUR_DIGIT_YEAR_PATTERN = re.compile(r'(?<!\d)(\d{4})(?!\d)')
+
+def latex_to_text(value):
+    """Plain Unicode text of a BibTeX field: accents decoded, commands and braces dropped"""
+    if not value or ('\\' not in value and '{' not in value and '-' not in value and '~' not in value):
+        return ' '.join(value.split()) if value else value
+    def accent(match):
+        letter = match.group(2) or match.group(3)
+        letter = LATEX_SYMBOLS.get(letter[1:], letter[1:]) if letter.startswith('\\') else letter
+        if letter in ('ı', 'ȷ'):
+            letter = 'i' if letter == 'ı' else 'j'  # \'{\i} is an accented i
+        return unicodedata.normalize('NFC', letter + LATEX_ACCENTS[match.group(1)])
+    value = LATEX_SYMBOL_ACCENT_PATTERN.sub(accent, value)
+    value = LATEX_LETTER_ACCENT_PATTERN.sub(accent, value)
+    value = LATEX_SYMBOL_PATTERN.sub(lambda match: LATEX_SYMBOLS[match.group(1)], value)
+    value = LATEX_ESCAPED_PATTERN.sub(lambda match: '\x00' + match.group(1), value)
+    value = LATEX_COMMAND_PATTERN.sub('', value)
+    value = value.replace('{', '').replace('}', '').replace('\x00', '')
+    value = value.replace('---', '—').replace('--', '–').replace('~', ' ')
+    return ' '.join(value.split())
+
+def _split_names(value):
+    """Split a BibTeX name list on ' and ' outside braces"""
+    if '{' not in value:
+        return [name.strip() for name in BIBTEX_NAME_SEPARATOR.split(value) if name.strip()]
+    names, depth, start, i = [], 0, 0, 0
+    lower = value.lower()
+    while i < len(value):
+        char = value[i]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif depth == 0 and lower.startswith('and', i) and (i == 0 or value[i - 1].isspace()) \
+                and (i + 3 == len(value) or value[i + 3].isspace()):
+            names.append(value[start:i])
+            start = i = i + 3
+            continue
+        i += 1
+    names.append(value[start:])
+    return [name.strip() for name in names if name.strip()]
+
+def parse_person_name(name):
+    """(family, given) of one BibTeX/RIS name: "Last, First", "First von Last" or "{Org Name}" """
+    name = name.strip()
+    if name.startswith('{') and name.endswith('}') and name.count('{') == 1:
+        return latex_to_text(name), ''
+    if ',' in name:
+        family, _, given = name.partition(',')
+        if ',' in given:  # "Last, Jr, First"
+            given = given.split(',', 1)[1]
+        return latex_to_text(family), latex_to_text(given)
+    words = latex_to_text(name).split()
+    if len(words) <= 1:
+        return ' '.join(words), ''
+    # BibTeX "von" part: lower-case words before the last name belong to the family name
+    start = len(words) - 1
+    while start > 1 and words[start - 1][:1].islower():
+        start -= 1
+    return ' '.join(words[start:]), ' '.join(words[:start])
+
+def _initials(given):
+    """APA initials of given names: "Jean-Paul Marie" -> "J.-P. M." """
+    parts = []
+    for word in given.replace('.', ' ').split():
+        parts.append('-'.join(piece[0] + '.' for piece in word.split('-') if piece))
+    return ' '.join(parts)
+
+def structured_reference(authors, year, title, is_book, container=None, volume=None, issue=None,
+                         pages=None, publisher=None, doi=None, original_year=None):
+    """(reference text, ParsedReference) for a record whose fields are already separated
+
+    authors is a list of (family, given). The text is an APA-style rendering
+    for the reports and the incremental state; the ParsedReference comes
+    straight from the fields, without the regex extraction.
+    """
+    year_text = (year or '').strip()
+    year_match = FOUR_DIGIT_YEAR_PATTERN.search(year_text)
+    year_value = year_match.group(1) if year_match else None
+    ancient = 'bce' in year_text.lower() or year_text.startswith('-') or (
+        year_text.isdigit() and int(year_text) < ANCIENT_TEXT_CUTOFF)
+    if ancient:
+        ref_type = 'ancient_text'
+    elif is_book:
+        ref_type = 'book'
+    elif 'press' in year_text.lower() or (year_value and int(year_value) > datetime.now().year):
+        ref_type = 'in_press'
+    else:
+        ref_type = 'journal_article'
+    original_match = FOUR_DIGIT_YEAR_PATTERN.search(original_year or '')
+    doi_match = DOI_PATTERN.search(doi or '')
+    title = (title or '').strip().rstrip('.') or None
+    families = tuple(normalize_text(family) for family, _ in authors if family)
     
-    print(f"Reading bibliography from {word_file}...")
+    names = [f"{family}, {_initials(given)}".rstrip(', ') for family, given in authors if family]
+    if len(names) > 1:
+        names[-1] = '& ' + names[-1]
+    text = ', '.join(names) if len(names) > 2 else ' '.join(names).replace(' &', ', &', 1)
+    if ancient and year_text.lstrip('-').isdigit():
+        year_text = f"{year_text.lstrip('-')} BCE"
+    text = f"{text} ({year_value or year_text or 'n.d.'}). {title or ''}."
+    if container:
+        text += f" {container}"
+        if volume:
+            text += f", {volume}" + (f"({issue})" if issue else '')
+        if pages:
+            text += f", {pages.replace('--', '-')}"
+        text += '.'
+    if publisher:
+        text += f" {publisher}."
+    if doi_match:
+        text += f" https://doi.org/{doi_match.group(0)}"
+    if original_match:
+        text += f" (Original work published {original_match.group(1)})"
     
-    # Read Word document
-    doc = Document(word_file)
-    references = []
+    return ' '.join(text.split()), ParsedReference(
+        ref_type=ref_type,
+        doi=doi_match.group(0) if doi_match else None,
+        year=year_value,
+        original_year=original_match.group(1) if original_match else None,
+        first_author=families[0] if families else None,
+        all_authors=families,
+        title=title
+    )
+
+def _open_text(path):
+    """Text stream of a file ("-" for standard input); .gz files are decompressed on the fly"""
+    if path == '-':
+        return nullcontext(sys.stdin)
+    opener = gzip.open if path.endswith('.gz') else open
+    return opener(path, 'rt', encoding='utf-8-sig', errors='replace')
+
+def iter_bibtex_entries(text):
+    """Yield (entry type, citation key, {field: raw value}) for each BibTeX entry
+
+    Handles braced and quoted values, @string macros, '#' concatenation and
+    month macros; @comment and @preamble blocks are skipped. Field names and
+    entry types are lower-cased; values keep their LaTeX (see latex_to_text).
+    """
+    macros = dict(BIBTEX_MONTHS)
+    pos, n = 0, len(text)
     
-    # Extract all paragraphs, filtering for probable references
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        if is_probable_reference(text):
-            references.append(text)
+    def skip_space(i):
+        return BIBTEX_SPACE_PATTERN.match(text, i).end()
     
-    print(f"Found {len(references)} reference entries (headers filtered)")
-    if DEBUG_MODE:
-        print(f"\n{'='*70}")
-        print("DEBUG MODE: ON - Showing detailed extraction info")
-        print(f"{'='*70}\n")
+    def closing(i, pattern):
+        """Index of the delimiter closing the group opened at text[i] (n if unclosed)"""
+        depth = 0
+        for match in pattern.finditer(text, i + 1):
+            char = match.group()
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                if not depth and pattern is BIBTEX_BRACE_PATTERN:
+                    return match.start()
+                depth = max(0, depth - 1)
+            elif not depth:  # '"' outside braces ends a quoted value
+                return match.start()
+        return n
     
-    # Initialize results list and extraction failure tracking
-    results = []
-    extraction_failures = {}
+    def read_value(i):
+        parts = []
+        while True:
+            i = skip_space(i)
+            if i >= n:
+                break
+            if text[i] in '{"':
+                end = closing(i, BIBTEX_BRACE_PATTERN if text[i] == '{' else BIBTEX_QUOTED_PATTERN)
+                parts.append(text[i + 1:end])
+                i = end + 1
+            else:
+                end = BIBTEX_WORD_PATTERN.match(text, i).end()
+                word = text[i:end]
+                parts.append(macros.get(word.lower(), word))
+                i = end
+            i = skip_space(i)
+            if i < n and text[i] == '#':
+                i += 1
+                continue
+            return ''.join(parts), i
+        return ''.join(parts), i
     
-    # Process each reference
-    for idx, ref_text in enumerate(references, 1):
-        print(f"\nProcessing reference {idx}/{len(references)}...")
-        print(f"  {ref_text[:80]}...")
-        
-        # Detect reference type
-        ref_type = detect_reference_type(ref_text)
-        
-        # Extract metadata
-        doi = extract_doi_from_text(ref_text)
-        year = extract_year_from_text(ref_text)
-        original_year = extract_original_year_from_text(ref_text)
-        first_author = extract_first_author_from_apa(ref_text)
-        all_authors = extract_all_authors_from_apa(ref_text)
-        title = extract_title_from_apa(ref_text)
-        
-        if DEBUG_MODE:
-            print(f"  DEBUG - Type: {ref_type}")
-            print(f"  DEBUG - Extracted:")
-            print(f"    First Author: {first_author}")
-            print(f"    All Authors: {all_authors}")
-            print(f"    Year: {year} | Original: {original_year}")
-            print(f"    Title: {title}")
-            print(f"    DOI: {doi}")
-        
-        # Initialize result dictionary
-        result = {
-            'Reference_Number': idx,
-            'Reference_Type': ref_type,
-            'Original_Text': ref_text,
-            'Extracted_First_Author': first_author,
-            'Extracted_All_Authors': ', '.join(all_authors) if all_authors else '',
-            'Extracted_Year': year,
-            'Extracted_Original_Year': original_year,
-            'Extracted_Title': title,
-            'Extracted_DOI': doi,
-            'CrossRef_Found': False,
-            'Title_Similarity': 0.0,
-            'CrossRef_Match_Score': 0,
-            'PubMed_Found': False,
-            'Verified_DOI': '',
-            'Verified_Title': '',
-            'Verified_Authors': '',
-            'Verified_Year': '',
-            'Issues_Detected': [],
-            'Status': 'PENDING'
-        }
-        
-        # Handle ancient texts separately (skip verification)
-        if ref_type == 'ancient_text':
-            result['Status'] = 'ANCIENT_TEXT'
-            result['Issues_Detected'] = f'Ancient text (pre-{ANCIENT_TEXT_CUTOFF}) - verification not applicable'
-            results.append(result)
-            print(f"  ⌛ Status: ANCIENT_TEXT (pre-{ANCIENT_TEXT_CUTOFF})")
+    while True:
+        pos = text.find('@', pos)
+        if pos < 0:
+            return
+        match = BIBTEX_ENTRY_PATTERN.match(text, pos)
+        if not match:
+            pos += 1
+            continue
+        entry_type = match.group(1).lower()
+        closer = '}' if match.group(2) == '{' else ')'
+        pos = match.end()
+        if entry_type in ('comment', 'preamble'):
+            depth = 1
+            while pos < n and depth:
+                depth += (text[pos] in '{(') - (text[pos] in '})')
+                pos += 1
             continue
         
-        # Handle in-press items
-        if ref_type == 'in_press':
-            result['Issues_Detected'] = 'In press or future publication'
-        
-        # Track extraction failures
-        if not title:
-            extraction_failures[idx] = "Title extraction failed - pattern may need adjustment"
-        if not first_author:
-            extraction_failures[idx] = extraction_failures.get(idx, "") + "; Author extraction failed"
-        if not year:
-            extraction_failures[idx] = extraction_failures.get(idx, "") + "; Year extraction failed"
-        
-        # Check CrossRef
-        if doi or title:
-            crossref_found, crossref_data = check_crossref(title, first_author, year, doi)
-            result['CrossRef_Found'] = crossref_found
-            
-            if crossref_found and crossref_data:
-                result['Verified_DOI'] = crossref_data.get('DOI', '')
-                result['Verified_Title'] = crossref_data.get('title', [''])[0]
-                
-                # Extract authors from CrossRef
-                authors_list = crossref_data.get('author', [])
-                if authors_list:
-                    verified_authors = ', '.join([
-                        f"{normalize_text(a.get('family', ''))} {normalize_text(a.get('given', ''))}" 
-                        for a in authors_list[:3]
-                    ])
-                    result['Verified_Authors'] = verified_authors
-                
-                # Extract year from CrossRef (robust extraction)
-                result['Verified_Year'] = extract_crossref_year(crossref_data)
-                
-                # Determine thresholds based on reference type
-                if ref_type == 'book':
-                    high_threshold = BOOK_TITLE_SIMILARITY_HIGH
-                    low_threshold = BOOK_TITLE_SIMILARITY_LOW
-                else:
-                    high_threshold = TITLE_SIMILARITY_HIGH
-                    low_threshold = TITLE_SIMILARITY_LOW
-                
-                # Calculate match score
-                match_score = 0
-                issues = []
-                
-                # Title similarity (using SequenceMatcher)
-                if title and result['Verified_Title']:
-                    sim = title_similarity(title, result['Verified_Title'])
-                    result['Title_Similarity'] = round(sim, 3)
-                    
-                    if sim >= high_threshold:
-                        match_score += 50
-                        if DEBUG_MODE:
-                            print(f"  DEBUG - Title match: STRONG ({sim:.2f})")
-                    elif sim >= low_threshold:
-                        match_score += 25
-                        if DEBUG_MODE:
-                            print(f"  DEBUG - Title match: PARTIAL ({sim:.2f})")
-                    else:
-                        if DEBUG_MODE:
-                            print(f"  DEBUG - Title match: WEAK ({sim:.2f})")
-                
-                # Year match (with special handling for classics/editions)
-                if year and result['Verified_Year']:
-                    try:
-                        year_diff = abs(int(year) - int(result['Verified_Year']))
-                        
-                        if original_year is None:
-                            # Modern source - strict checking
-                            if year_diff == 0:
-                                match_score += 25
-                                if DEBUG_MODE:
-                                    print(f"  DEBUG - Year match: EXACT")
-                            elif year_diff <= ALLOW_YEAR_DIFFERENCE:
-                                match_score += 15
-                                if DEBUG_MODE:
-                                    print(f"  DEBUG - Year match: CLOSE (±{year_diff} years)")
-                            else:
-                                issues.append(f"YEAR_MISMATCH_{year_diff}yrs")
-                                if DEBUG_MODE:
-                                    print(f"  DEBUG - Year match: MISMATCH ({year_diff} years apart)")
-                        else:
-                            # Classic/translation - lenient checking
-                            issues.append(f"CLASSIC_EDITION_(orig_{original_year}_edit_{year}_verified_{result['Verified_Year']})")
-                            match_score += 20  # Still give credit for finding it
-                            if DEBUG_MODE:
-                                print(f"  DEBUG - Year match: CLASSIC_TRANSLATION (original {original_year})")
-                    except ValueError:
-                        pass
-                
-                # Author match (using accent-stripped comparison)
-                if first_author and result['Verified_Authors']:
-                    author_stripped = strip_accents(first_author.lower())
-                    verified_stripped = strip_accents(result['Verified_Authors'].lower())
-                    
-                    if author_stripped in verified_stripped:
-                        match_score += 25
-                        if DEBUG_MODE:
-                            print(f"  DEBUG - Author match: YES")
-                    else:
-                        if DEBUG_MODE:
-                            print(f"  DEBUG - Author match: NO")
-                
-                result['CrossRef_Match_Score'] = match_score
-        
-        # Check PubMed (only for journal articles, not books)
-        if title and first_author and ref_type == 'journal_article':
-            pubmed_found, _ = check_pubmed(title, first_author)
-            result['PubMed_Found'] = pubmed_found
-        
-        # Determine status and issues
-        if not result.get('Issues_Detected'):
-            issues = []
-        else:
-            issues = result['Issues_Detected'] if isinstance(result['Issues_Detected'], list) else [result['Issues_Detected']]
-        
-        if not result['CrossRef_Found'] and not result['PubMed_Found']:
-            if 'NOT_FOUND_IN_DATABASES' not in issues:
-                issues.append("NOT_FOUND_IN_DATABASES")
-            result['Status'] = 'NEEDS_REVIEW'
-        elif result['CrossRef_Match_Score'] < 50:
-            if 'LOW_MATCH_CONFIDENCE' not in issues:
-                issues.append("LOW_MATCH_CONFIDENCE")
-            result['Status'] = 'NEEDS_REVIEW'
-        else:
-            result['Status'] = 'VERIFIED'
-        
-        if not doi:
-            if 'NO_DOI_FOUND' not in issues:
-                issues.append("NO_DOI_FOUND")
-        
-        if not title:
-            if 'TITLE_NOT_EXTRACTED' not in issues:
-                issues.append("TITLE_NOT_EXTRACTED")
-            result['Status'] = 'NEEDS_REVIEW'
-        
-        result['Issues_Detected'] = '; '.join(issues) if issues else 'None'
-        
-        results.append(result)
-        
-        # Print status
-        if result['Status'] == 'ANCIENT_TEXT':
-            status_symbol = '⌛'
-        elif result['Status'] == 'VERIFIED':
-            status_symbol = '✓'
-        else:
-            status_symbol = '⚠'
-        
-        print(f"  {status_symbol} Status: {result['Status']} | Score: {result['CrossRef_Match_Score']} | "
-              f"Sim: {result['Title_Similarity']:.2f} | Type: {ref_type}")
-    
-    return pd.DataFrame(results), extraction_failures
+        key = None
+        if entry_type != 'string':
+            end = pos
+            while end < n and text[end] not in ',' + closer:
+                end += 1
+            key = text[pos:end].strip()
+            pos = end + 1 if end < n and text[end] == ',' else end
+        fields = {}
+        while True:
+            simple = BIBTEX_SIMPLE_FIELD_PATTERN.match(text, pos)
+            if simple:
+                name, value = simple.group(1).lower(), simple.group(2) if simple.group(3) is None else simple.group(3)
+                (macros if entry_type == 'string' else fields)[name] = value
+                pos = simple.end()
+                continue
+            pos = skip_space(pos)
+            if pos >= n or text[pos] == closer:
+                pos += 1
+                break
+            if text[pos] == ',':
+                pos += 1
+                continue
+            end = text.find('=', pos)
+            if end < 0:
+                pos = n
+                break
+            name = text[pos:end].strip().lower()
+            value, pos = read_value(end + 1)
+            if entry_type == 'string':
+                macros[name] = value
+            else:
+                fields[name] = value
+        if entry_type != 'string':
+            yield entry_type, key, fields
+
+def _first_field(record, *names):
+    """First non-empty value among names in a BibTeX field dict or RIS record"""
+    for name in names:
+        value = record.get(name)
+        if value:
+            return value[0] if isinstance(value, list) else value
+    return None
+
+def read_bibtex(path):
+    """(reference texts, ParsedReferences) of a BibTeX / BibLaTeX file"""
+    with _open_text(path) as f:
+        text = f.read()
+    references, parsed_references = [], []
+    for entry_type, _, raw in iter_bibtex_entries(text):
+        fields = {name: latex_to_text(value) for name, value in raw.items()}
+        names = _split_names(raw.get('author') or raw.get('editor') or '')
+        authors = [parse_person_name(name) for name in names if name.strip().lower() != 'others']
+        doi = _first_field(raw, 'doi', 'url') or ''
+        ref_text, parsed = structured_reference(
+            authors, _first_field(fields, 'year', 'date'), fields.get('title'),
+            entry_type in BIBTEX_BOOK_TYPES,
+            container=_first_field(fields, 'journal', 'journaltitle', 'booktitle'),
+            volume=fields.get('volume'), issue=_first_field(fields, 'number', 'issue'),
+            pages=fields.get('pages'),
+            publisher=_first_field(fields, 'publisher', 'school', 'institution', 'organization'),
+            doi=doi if DOI_PATTERN.search(doi) else None,
+            original_year=_first_field(fields, 'origyear', 'origdate'))
+        references.append(ref_text)
+        parsed_references.append(parsed)
+    return references, parsed_references
+
+def iter_ris_records(lines):
+    """Yield {tag: [values]} for each RIS record (TY ... ER) in a stream of lines"""
+    record, last_tag = None, None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        match = RIS_LINE_PATTERN.match(line)
+        if match:
+            last_tag, value = match.group(1), (match.group(2) or '').strip()
+            if last_tag == 'TY':
+                record = {}
+            if record is None:
+                continue
+            if last_tag == 'ER':
+                yield record
+                record, last_tag = None, None
+                continue
+            record.setdefault(last_tag, []).append(value)
+        elif record is not None and last_tag and line.strip():
+            # Continuation of a long value on the next line
+            record[last_tag][-1] = f"{record[last_tag][-1]} {line.strip()}"
+    if record:
+        yield record
+
+def read_ris(path):
+    """(reference texts, ParsedReferences) of a RIS file, read line by line"""
+    references, parsed_references = [], []
+    with _open_text(path) as f:
+        for record in iter_ris_records(f):
+            authors = [parse_person_name(name) for tag in ('AU', 'A1') for name in record.get(tag, ())]
+            if not authors:
+                authors = [parse_person_name(name) for tag in ('A2', 'ED') for name in record.get(tag, ())]
+            kind = (_first_field(record, 'TY') or '').upper()
+            pages = _first_field(record, 'SP')
+            if pages and _first_field(record, 'EP'):
+                pages = f"{pages}-{_first_field(record, 'EP')}"
+            doi = _first_field(record, 'DO') or next(
+                (url for url in record.get('UR', ()) if DOI_PATTERN.search(url)), None)
+            ref_text, parsed = structured_reference(
+                authors, _first_field(record, 'PY', 'Y1', 'DA'), _first_field(record, 'TI', 'T1', 'CT', 'BT'),
+                kind in RIS_BOOK_TYPES,
+                container=_first_field(record, 'T2', 'JO', 'JF', 'JA', 'J2') if kind != 'BOOK' else None,
+                volume=_first_field(record, 'VL'), issue=_first_field(record, 'IS'), pages=pages,
+                publisher=_first_field(record, 'PB'), doi=doi, original_year=_first_field(record, 'OP'))
+            references.append(ref_text)
+            parsed_references.append(parsed)
+    return references, parsed_references
+
+def read_text_references(path):
+    """Probable references of a plain-text file or standard input ("-"), one per line
+
+    Lines are streamed, so only the kept references are held in memory.
+    """
+    with _open_text(path) as f:
+        return collect_references(line for line in f), None
+
+def read_docx_references(path):
+    return read_references(path), None
+
+# Reader per input extension: path -> (reference texts, ParsedReferences or None).
+# None means the texts still go through parse_reference.
+INPUT_READERS = {
+    '.docx': read_docx_references,
+    '.bib': read_bibtex,
+    '.ris': read_ris,
+    '.txt': read_text_references,
+}
+
+def input_format(path):
+    """Extension of an input path that selects its reader ('.txt' for standard input)"""
+    if path == '-':
+        return '.txt'
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return os.path.splitext(name)[1]
+
+def load_references(path):
+    """Read any supported input file: (reference texts, ParsedReferences or None)"""
+    reader = INPUT_READERS.get(input_format(path))
+    if reader is None:
+        raise ValueError(f"Unsupported input format '{input_format(path)}' "
+                         f"(supported: {', '.join(INPUT_READERS)})")
+    return reader(path)
 
 # ============================================================================
-# GENERATE REPORTS
+# API CHECKING FUNCTIONS
 # ============================================================================
 
-def generate_report(df, output_file, log_file, extraction_failures_file):
-    """Generate comprehensive verification reports"""
-    
-    # Save detailed CSV
-    df.to_csv(output_file, index=False)
-    print(f"\n✓ Detailed report saved to: {output_file}")
-    
-    # Generate summary statistics
-    total = len(df)
-    verified = len(df[df['Status'] == 'VERIFIED'])
-    needs_review = len(df[df['Status'] == 'NEEDS_REVIEW'])
-    ancient = len(df[df['Status'] == 'ANCIENT_TEXT'])
-    with_doi = len(df[df['Extracted_DOI'].notna() & (df['Extracted_DOI'] != '')])
-    with_original_year = len(df[df['Extracted_Original_Year'].notna() & (df['Extracted_Original_Year'] != '')])
-    crossref_found = len(df[df['CrossRef_Found'] == True])
-    high_similarity = len(df[df['Title_Similarity'] >= TITLE_SIMILARITY_HIGH])
-    
-    # Count by reference type
-    type_counts = df['Reference_Type'].value_counts().to_dict()
-    
-    # Count by status and type
-    status_by_type = pd.crosstab(df['Reference_Type'], df['Status'])
-    
-    # Write summary log
-    with open(log_file, 'w', encoding='utf-8') as f:
-        f.write("BIBLIOGRAPHY VERIFICATION SUMMARY\n")
-        f.write("="*70 + "\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write("="*70 + "\n\n")
-        
-        f.write("OVERALL STATISTICS:\n")
-        f.write("-"*70 + "\n")
-        f.write(f"Total references checked: {total}\n")
-        f.write(f"✓ Verified: {verified} ({verified/total*100:.1f}%)\n")
-        f.write(f"⚠  Needs review: {needs_review} ({needs_review/total*100:.1f}%)\n")
-        f.write(f"⌛ Ancient texts (skipped): {ancient} ({ancient/total*100:.1f}%)\n")
-        f.write(f"References with DOI: {with_doi} ({with_doi/total*100:.1f}%)\n")
-        f.write(f"Classics/translations (original year): {with_original_year} ({with_original_year/total*100:.1f}%)\n")
-        f.write(f"Found in CrossRef: {crossref_found} ({crossref_found/total*100:.1f}%)\n")
-        f.write(f"High title similarity (≥{TITLE_SIMILARITY_HIGH}): {high_similarity} ({high_similarity/total*100:.1f}%)\n\n")
-        
-        f.write("REFERENCE TYPES:\n")
-        f.write("-"*70 + "\n")
-        for ref_type, count in type_counts.items():
-            f.write(f"  {ref_type}: {count} ({count/total*100:.1f}%)\n")
-        
-        f.write("\nVERIFICATION STATUS BY REFERENCE TYPE:\n")
-        f.write("-"*70 + "\n")
-        f.write(status_by_type.to_string())
-        f.write("\n\n")
-        
-        f.write("MATCH SCORE INTERPRETATION FOR PEER REVIEW:\n")
-        f.write("-"*70 + "\n")
-        f.write("  90-100: Excellent - Safe to publish as-is\n")
-        f.write("  75-89:  Good - Verify DOI/year before publishing\n")
-        f.write("  50-74:  Fair - Requires manual verification\n")
-        f.write("  <50:    Poor - Do not use without manual verification\n\n")
-        
-        f.write("YEAR MATCHING POLICY:\n")
-        f.write("-"*70 + "\n")
-        f.write(f"  Modern sources: ±{ALLOW_YEAR_DIFFERENCE} years allowed (early online vs print)\n")
-        f.write(f"  Classics/translations: Original year tracked separately\n")
-        f.write(f"  Ancient texts: <{ANCIENT_TEXT_CUTOFF} (verification skipped)\n\n")
-        
-        f.write("="*70 + "\n")
-        f.write("REFERENCES NEEDING REVIEW:\n")
-        f.write("="*70 + "\n\n")
+def check_crossref_candidates(title, author=None, year=None, doi=None, doi_records=None):
+    """Check reference against CrossRef; returns (found, list of candidate works)
+
+    A DOI lookup yields a single candidate; a title search yields every row
+    CrossRef returned (CROSSREF_CANDIDATE_ROWS). doi_records holds works
+    already fetched by check_crossref_dois, keyed on lower-cased DOI.
+    On an unexpected error returns (False, error message).
+    """
+    try:
+        mirror = get_crossref_mirror()
+        if doi and doi_records and doi.lower() in doi_records:
+            return True, [doi_records[doi.lower()]]
+        elif mirror is not None:
+            return mirror.check(title, author, year, doi)
+        url, params = crossref_request(title, author, doi)
+        return crossref_outcome(get_with_backoff(url, params=params), doi)
+    except Exception as e:
+        return False, str(e)
+
+async def check_crossref_candidates_async(title, author=None, year=None, doi=None, doi_records=None):
+    """Coroutine version of check_crossref_candidates (async transport only)"""
+    try:
+        mirror = get_crossref_mirror()
+        if doi and doi_records and doi.lower() in doi_records:
+            return True, [doi_records[doi.lower()]]
+        elif mirror is not None:
+            return mirror.check(title, author, year, doi)
+        url, params = crossref_request(title, author, doi)
+        return crossref_outcome(await get_with_backoff_async(url, params=params), doi)
+    except Exception as e:
+        return False, str(e)
+
+def crossref_request(title, author=None, doi=None):
+    """(url, params) of the CrossRef API request for one reference: DOI lookup or title search"""
+    if doi:
+        return f"{CROSSREF_API}/{doi}", None
+    params = {"rows": CROSSREF_CANDIDATE_ROWS}
+    if title:
+        params["query.title"] = title
+    if author:
+        params["query.author"] = author
+    return CROSSREF_API, params
+
+def crossref_outcome(response, doi=None):
+    """(found, candidate works) from the response to crossref_request"""
+    if response is None:
+        return False, None
+    data = response.json()
+    if doi:
+        return True, [data.get("message", {})]
+    items = data.get("message", {}).get("items", [])
+    if items:
+        return True, items
+    return False, None
+
+def check_crossref(title, author=None, year=None, doi=None, doi_records=None):
+    """Check reference against CrossRef database with improved session handling
+
+    Returns (found, first candidate work); see check_crossref_candidates.
+    """
+    found, candidates = check_crossref_candidates(title, author, year, doi, doi_records)
+    if found and isinstance(candidates, list):
+        return True, candidates[0]
+    return found, candidates
+
+def check_crossref_dois(dois):
+    """Bulk-resolve DOIs via CrossRef filter queries (filter=doi:a,doi:b,...)
+
+    Repeated DOIs are looked up once, and batches are cut from the sorted
+    DOIs so the same set of DOIs always makes the same requests (and hits
+    the same HTTP cache entries) whatever the reference order. Returns
+    ({doi.lower(): work}, requests);
+    DOIs that a batch did not return (or whose batch failed) are left out so
+    check_crossref falls back to the exact /works/{doi} lookup for them.
+    """
+    unique_dois = sorted({doi.lower() for doi in dois if doi})
+    mirror = get_crossref_mirror()
+    if mirror is not None:
+        return mirror.lookup_dois(unique_dois), 0
+    records = {}
+    requests_made = 0
+    
+    for start in range(0, len(unique_dois), CROSSREF_DOI_BATCH_SIZE):
+        batch = unique_dois[start:start + CROSSREF_DOI_BATCH_SIZE]
+        params = {
+            'filter': ','.join(f'doi:{doi}' for doi in batch),
+            'rows': len(batch)
+        }
+        requests_made += 1
+        response = get_with_backoff(CROSSREF_API, params=params)
+        if response is None:
+            continue
+        try:
+            items = response.json().get('message', {}).get('items', [])
+        except ValueError:
+            continue
+        wanted = set(batch)
+        for item in items:
+            key = item.get('DOI', '').lower()
+            if key in wanted:
+                records[key] = item
+    
+    return records, requests_made
+
+def pubmed_term(title, author=None):
+    """Build the esearch term for one reference (quoted title for better precision)"""
+    query = f'"{title}"[Title]'
+    if author:
+        query += f' AND {author}[Author]'
+    return query
+
+def pubmed_search(term, retmax=1):
+    """Run one esearch query; returns the parsed JSON, or None if the request failed"""
+    params = {
+        'db': 'pubmed',
+        'term': term,
+        'retmode': 'json',
+        'retmax': retmax,
+        'tool': 'UWAcademicVerifier',
+        'email': EMAIL
+    }
+    if NCBI_API_KEY:
+        params['api_key'] = NCBI_API_KEY
+    
+    response = get_with_backoff(PUBMED_API, params=params)
+    if response is None:
+        return None
+    return response.json()
+
+def pubmed_summaries(pmids):
+    """Fetch esummary records (title, authors) for a list of PMIDs; {} on failure"""
+    if not pmids:
+        return {}
+    params = {
+        'db': 'pubmed',
+        'id': ','.join(pmids),
+        'retmode': 'json',
+        'tool': 'UWAcademicVerifier',
+        'email': EMAIL
+    }
+    if NCBI_API_KEY:
+        params['api_key'] = NCBI_API_KEY
+    
+    response = get_with_backoff(PUBMED_SUMMARY_API, params=params)
+    if response is None:
+        return {}
+    try:
+        result = response.json().get('result', {})
+    except ValueError:
+        return {}
+    return {pmid: result[pmid] for pmid in result.get('uids', []) if pmid in result}
+
+def _search_tokens(text):
+    """Lower-case, accent-free word tokens, roughly as PubMed indexes them"""
+    return re.findall(r'[a-z0-9]+', strip_accents(text or '').lower())
+
+def pubmed_summary_matches(title, author, summary):
+    """Does an esummary record look like the hit for this (title, author) query?"""
+    wanted = _search_tokens(title)
+    have = _search_tokens(summary.get('title', ''))
+    if not wanted or len(wanted) > len(have):
+        return False
+    n = len(wanted)
+    if not any(have[i:i + n] == wanted for i in range(len(have) - n + 1)):
+        return False
+    if not author:
+        return True
+    surname = _search_tokens(author)
+    return any(_search_tokens(a.get('name', ''))[:len(surname)] == surname
+               for a in summary.get('authors', []))
+
+def check_pubmed(title, author=None):
+    """Check reference against PubMed (primarily for journal articles)"""
+    try:
+        data = pubmed_search(pubmed_term(title, author))
+        if data is None:
+            return False, None
+        
+        count = int(data.get('esearchresult', {}).get('count', 0))
+        return count > 0, data
+    except Exception as e:
+        return False, str(e)
+
+def check_pubmed_batch(pairs):
+    """Resolve many (title, author) PubMed lookups with as few requests as possible
+
+    References are OR-joined into groups of PUBMED_BATCH_SIZE. A group whose
+    combined count is zero settles every member as not found in one request.
+    Otherwise the returned PMIDs are summarized (esummary) and mapped back to
+    the members whose title and author they match; each of those is confirmed
+    with its own query, and the rest of the group is narrowed down by halves
+    (group testing) until every member is settled. Any pair that ends up on its
+    own runs exactly the query check_pubmed would send, so each reference's
+    PubMed_Found is identical to one-at-a-time lookups; mapping hits back only
+    decides how many requests that takes.
+    
+    Returns ({(title, author): found}, number_of_requests).
+    """
+    unique_pairs = list(dict.fromkeys(pairs))
+    found = {}
+    requests_made = 0
+    
+    def search_count(group, retmax=1):
+        nonlocal requests_made
+        requests_made += 1
+        try:
+            data = pubmed_search(' OR '.join(f'({pubmed_term(t, a)})' for t, a in group), retmax)
+            if data is None:
+                return None, []
+            result = data.get('esearchresult', {})
+            # A rejected term comes back without a count (ERROR / errorlist):
+            # that says nothing about the members, so it counts as a failure
+            if 'count' not in result or 'ERROR' in result:
+                return None, []
+            return int(result['count']), result.get('idlist', [])
+        except Exception:
+            return None, []
+    
+    def check_each(group):
+        nonlocal requests_made
+        for pair in group:
+            requests_made += 1
+            found[pair] = check_pubmed(*pair)[0]
+    
+    def narrow(group):
+        if len(group) <= 1:
+            check_each(group)
+            return
+        count, _ = search_count(group)
+        if count == 0:
+            for pair in group:
+                found[pair] = False
+        elif count is not None and count >= len(group) / 2:
+            # Mostly hits: asking each member directly is cheaper than splitting
+            check_each(group)
+        else:
+            # Some hits, or the combined query failed: split in half and retry
+            mid = len(group) // 2
+            narrow(group[:mid])
+            narrow(group[mid:])
+    
+    def resolve(group):
+        nonlocal requests_made
+        if len(group) == 1:
+            check_each(group)
+            return
+        count, pmids = search_count(group, retmax=PUBMED_BATCH_RETMAX)
+        if count == 0:
+            for pair in group:
+                found[pair] = False
+            return
+        if count is None:
+            narrow(group)
+            return
+        
+        requests_made += 1
+        summaries = list(pubmed_summaries(pmids).values())
+        likely = [pair for pair in group
+                  if any(pubmed_summary_matches(pair[0], pair[1], doc) for doc in summaries)]
+        check_each(likely)
+        narrow([pair for pair in group if pair not in found])
+    
+    for start in range(0, len(unique_pairs), PUBMED_BATCH_SIZE):
+        resolve(unique_pairs[start:start + PUBMED_BATCH_SIZE])
+    
+    return found, requests_made
+
+# ============================================================================
+# CANDIDATE SCORING
+# ============================================================================
+
+# One scored CrossRef candidate. issues holds year diagnostics; notes holds
+# DEBUG_MODE explanations of each match component.
+CandidateScore = namedtuple('CandidateScore', [
+    'score', 'similarity', 'verified_doi', 'verified_title', 'verified_authors',
+    'verified_year', 'issues', 'notes'
+])
+
+def format_crossref_authors(work):
+    """First three CrossRef authors as 'Family Given, ...' (Unicode-normalized)"""
+    authors_list = work.get('author', [])
+    if not authors_list:
+        return ''
+    return ', '.join([
+        f"{normalize_text(a.get('family', ''))} {normalize_text(a.get('given', ''))}"
+        for a in authors_list[:3]
+    ])
+
+def compact_work(work):
+    """Only the CrossRef fields score_candidate reads (cheap to send to a worker process)"""
+    compact = {
+        'DOI': work.get('DOI', ''),
+        'title': (work.get('title') or [''])[:1],
+        'author': [{key: author[key] for key in ('family', 'given') if key in author}
+                   for author in (work.get('author') or [])[:3]],
+    }
+    verified_year = extract_crossref_year(work)
+    if verified_year:
+        compact['issued'] = {'date-parts': [[verified_year]]}
+    return compact
+
+def score_candidate(parsed, work, min_score=None):
+    """Score one CrossRef work against an extracted reference (0-100)
+
+    Title similarity gives up to 50 points, year 25 and first author 25, with
+    type-specific title thresholds and lenient years for classics. With
+    min_score, year and author are scored first and the title comparison only
+    runs at the similarity that could still reach min_score; candidates that
+    cannot get there return None without a full SequenceMatcher pass.
+    """
+    return score_verified(parsed, (work.get('title') or [''])[0], format_crossref_authors(work),
+                          extract_crossref_year(work), work.get('DOI', ''), min_score)
+
+def score_verified(parsed, verified_title, verified_authors, verified_year, verified_doi='',
+                   min_score=None):
+    """score_candidate on fields already taken from a work (title, authors string, year)
+    
+    Duplicate citations are scored this way against the match their
+    cluster's first reference was verified with.
+    """
+    ref_type, _, year, original_year, first_author, _, title = parsed
+    
+    # Determine thresholds based on reference type
+    if ref_type == 'book':
+        high_threshold = BOOK_TITLE_SIMILARITY_HIGH
+        low_threshold = BOOK_TITLE_SIMILARITY_LOW
+    else:
+        high_threshold = TITLE_SIMILARITY_HIGH
+        low_threshold = TITLE_SIMILARITY_LOW
+    
+    match_score = 0
+    issues = []
+    notes = []
+    
+    # Year match (with special handling for classics/editions)
+    if year and verified_year:
+        try:
+            year_diff = abs(int(year) - int(verified_year))
+            
+            if original_year is None:
+                # Modern source - strict checking
+                if year_diff == 0:
+                    match_score += 25
+                    notes.append("Year match: EXACT")
+                elif year_diff <= ALLOW_YEAR_DIFFERENCE:
+                    match_score += 15
+                    notes.append(f"Year match: CLOSE (±{year_diff} years)")
+                else:
+                    issues.append(f"YEAR_MISMATCH_{year_diff}yrs")
+                    notes.append(f"Year match: MISMATCH ({year_diff} years apart)")
+            else:
+                # Classic/translation - lenient checking
+                issues.append(f"CLASSIC_EDITION_(orig_{original_year}_edit_{year}_verified_{verified_year})")
+                match_score += 20  # Still give credit for finding it
+                notes.append(f"Year match: CLASSIC_TRANSLATION (original {original_year})")
+        except ValueError:
+            pass
+    
+    # Author match (using accent-stripped comparison)
+    if first_author and verified_authors:
+        author_stripped = strip_accents(first_author.lower())
+        verified_stripped = strip_accents(verified_authors.lower())
+        
+        if author_stripped in verified_stripped:
+            match_score += 25
+            notes.append("Author match: YES")
+        else:
+            notes.append("Author match: NO")
+    
+    # Title similarity (using SequenceMatcher), only as precise as min_score needs
+    sim = 0.0
+    if title and verified_title:
+        needed = None if min_score is None else min_score - match_score
+        if needed is None or needed <= 0:
+            floor = 0
+        elif needed <= 25:
+            floor = low_threshold
+        elif needed <= 50:
+            floor = high_threshold
+        else:
+            return None
+        sim = title_similarity_at_least(title, verified_title, floor)
+        if sim is None:
+            return None
+        
+        if sim >= high_threshold:
+            match_score += 50
+            notes.insert(0, f"Title match: STRONG ({sim:.2f})")
+        elif sim >= low_threshold:
+            match_score += 25
+            notes.insert(0, f"Title match: PARTIAL ({sim:.2f})")
+        else:
+            notes.insert(0, f"Title match: WEAK ({sim:.2f})")
+    
+    if min_score is not None and match_score < min_score:
+        return None
+    
+    return CandidateScore(match_score, sim, verified_doi, verified_title,
+                          verified_authors, verified_year, issues, notes)
+
+def rank_candidates(parsed, works):
+    """Score every candidate work and pick the best
+
+    Candidates are ranked by match score, then title similarity; ties keep
+    CrossRef's order. Only the top two are tracked, so a candidate that
+    cannot beat the current runner-up is discarded early by score_candidate.
+    Returns (best CandidateScore or None, runner-up margin in points or None).
+    """
+    best = None
+    second = None
+    for work in works:
+        candidate = score_candidate(parsed, work,
+                                    min_score=second.score if second is not None else None)
+        if candidate is None:
+            continue
+        if best is None or candidate[:2] > best[:2]:
+            best, second = candidate, best
+        elif second is None or candidate[:2] > second[:2]:
+            second = candidate
+    
+    margin = best.score - second.score if best is not None and second is not None else None
+    return best, margin
+
+# ============================================================================
+# TITLE BLOCKING (MINHASH LSH)
+# ============================================================================
+
+MINHASH_PRIME = (1 << 31) - 1
+
+def title_shingles(title, ngram=None):
+    """Character n-grams of normalize_title(title), whitespace collapsed and padded"""
+    if ngram is None:
+        ngram = BLOCKING_NGRAM
+    text = ' '.join(normalize_title(title).split()) if title else ''
+    if not text:
+        return set()
+    text = f" {text} "
+    if len(text) <= ngram:
+        return {text}
+    return {text[i:i + ngram] for i in range(len(text) - ngram + 1)}
+
+class TitleBlocker:
+    """MinHash LSH index over title n-grams: likely-similar titles share a bucket
+
+    Each title gets bands * rows MinHash values of its character n-grams,
+    cut into bands; two titles with n-gram Jaccard similarity J share at
+    least one band with probability 1 - (1 - J**rows)**bands. Bucket-mates
+    are only candidates, to be confirmed with title_similarity. The hash
+    functions are fixed, so band keys are stable across runs and processes
+    (mirrors store them). Keys added to the index can be any hashable.
+    """
+    
+    def __init__(self, bands=None, rows=None, ngram=None, max_bucket=None):
+        import numpy as np
+        self.bands = BLOCKING_BANDS if bands is None else bands
+        self.rows = BLOCKING_ROWS if rows is None else rows
+        self.ngram = BLOCKING_NGRAM if ngram is None else ngram
+        self.max_bucket = BLOCKING_MAX_BUCKET if max_bucket is None else max_bucket
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, MINHASH_PRIME, self.bands * self.rows, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, MINHASH_PRIME, self.bands * self.rows, dtype=np.uint64)[:, None]
+        self._buckets = {}
+    
+    def params(self):
+        """Constructor arguments that determine band keys (stored with a mirror)"""
+        return {'bands': self.bands, 'rows': self.rows, 'ngram': self.ngram}
+    
+    def signature(self, title):
+        """MinHash signature (bands * rows values) of a title, or None without n-grams"""
+        import numpy as np
+        shingles = title_shingles(title, self.ngram)
+        if not shingles:
+            return None
+        hashes = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in shingles], dtype=np.uint64)
+        return ((self._a * hashes + self._b) % MINHASH_PRIME).min(axis=1).astype(np.uint32)
+    
+    def band_keys(self, title):
+        """One bucket key per band ('l<band>:<hash>'); empty for a title without n-grams"""
+        signature = self.signature(title)
+        if signature is None:
+            return []
+        return [f"l{band}:{zlib.crc32(values.tobytes()):08x}"
+                for band, values in enumerate(signature.reshape(self.bands, self.rows))]
+    
+    def add(self, key, title):
+        for band_key in self.band_keys(title):
+            self._buckets.setdefault(band_key, []).append(key)
+    
+    def candidates(self, title, limit=None):
+        """Keys sharing a bucket with title, most shared bands first (then insertion order)"""
+        shared = Counter()
+        for band_key in self.band_keys(title):
+            bucket = self._buckets.get(band_key)
+            if bucket and len(bucket) <= self.max_bucket:
+                shared.update(bucket)
+        return [key for key, _ in shared.most_common(limit)]
+    
+    def pairs(self):
+        """Candidate pairs (earlier key, later key) of added titles that share a bucket
+
+        The cost is the sum of squared bucket sizes, not the square of the
+        number of titles.
+        """
+        found = set()
+        for bucket in self._buckets.values():
+            if 1 < len(bucket) <= self.max_bucket:
+                for i, first in enumerate(bucket):
+                    found.update((first, second) for second in bucket[i + 1:] if second != first)
+        return found
+
+# ============================================================================
+# LOCAL CROSSREF MIRROR (OFFLINE METADATA INDEX)
+# ============================================================================
+
+TITLE_TOKEN_PATTERN = re.compile(r'\w+')
+MIRROR_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is its of on or the to with".split())
+
+def title_tokens(title):
+    """Index tokens of a title: words of normalize_title, minus stopwords and single letters"""
+    if not title:
+        return set()
+    return {token for token in TITLE_TOKEN_PATTERN.findall(normalize_title(title))
+            if len(token) > 1 and token not in MIRROR_STOPWORDS}
+
+def surname_token(surname):
+    """Index token for an author surname (accent-free, lower-cased)"""
+    return 'a:' + strip_accents(surname).lower().strip()
+
+def iter_crossref_dump(path):
+    """Yield works from a CrossRef dump file (.gz files are decompressed on the fly)
+
+    .json files are single documents ({"items": [...]}, as in the CrossRef
+    public data file); anything else is read as JSON Lines, each line a work
+    or an {"items": [...]} page. API envelopes ({"message": ...}) are unwrapped.
+    """
+    def items(obj):
+        if isinstance(obj.get('message'), dict):
+            obj = obj['message']
+        return obj['items'] if 'items' in obj else [obj]
+    
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        if path.endswith(('.json', '.json.gz')):
+            yield from items(json.load(f))
+            return
+        for line in f:
+            if line.strip():
+                yield from items(json.loads(line))
+
+def mirror_tokens(record, blocker=None):
+    """Index tokens of a compact_work record: title words, author surnames, 'y:<year>'
+
+    With a TitleBlocker, the title's LSH band keys are indexed as well.
+    """
+    title = record['title'][0] if record['title'] else ''
+    tokens = title_tokens(title)
+    tokens.update(surname_token(author['family'])
+                  for author in record['author'] if author.get('family'))
+    if 'issued' in record:
+        tokens.add(f"y:{record['issued']['date-parts'][0][0]}")
+    if blocker is not None:
+        tokens.update(blocker.band_keys(title))
+    return tokens
+
+class MirrorIndex:
+    """Query logic shared by the local CrossRef mirror formats
+
+    Works are stored as compact_work records (everything scoring reads), so
+    candidates from a mirror go through the same rank_candidates path as
+    API results. Title queries look up the rarest title words and the first
+    author's surname (by document frequency), rank works by how many of them
+    they contain, then by year agreement, and return the top rows.
+    Mirrors built with a TitleBlocker (blocker is set) also index the LSH
+    band keys of every title; the query's band keys join the search, so a
+    misspelled title still reaches its work and near-identical titles rank
+    first. Subclasses supply the storage: _frequencies, _hits, _records and
+    lookup_dois.
+    """
+    
+    blocker = None
+    
+    def search(self, title, author=None, year=None, rows=None):
+        """Candidate works for a bibliographic query, best first (at most rows)"""
+        if rows is None:
+            rows = CROSSREF_CANDIDATE_ROWS
+        tokens = title_tokens(title)
+        if author:
+            tokens.add(surname_token(author))
+        band_keys = self.blocker.band_keys(title) if self.blocker is not None else []
+        if not tokens and not band_keys:
+            return []
+        frequencies = self._frequencies(sorted(tokens)) if tokens else []
+        query = [token for token, _ in sorted(frequencies, key=lambda row: (row[1], row[0]))]
+        query = query[:MIRROR_QUERY_TOKENS]
+        if band_keys:
+            query += [token for token, df in self._frequencies(band_keys) if df <= self.blocker.max_bucket]
+        if not query:
+            return []
+        hits = self._hits(query, MIRROR_CANDIDATE_POOL)
+        if not hits:
+            return []
+        records = self._records([work_id for work_id, _ in hits])
+        
+        def rank(hit):
+            work_id, count = hit
+            verified_year = extract_crossref_year(records[work_id])
+            close_year = bool(year and verified_year and year.isdigit() and verified_year.isdigit() and
+                              abs(int(year) - int(verified_year)) <= ALLOW_YEAR_DIFFERENCE)
+            return (-count, not close_year, work_id)
+        
+        return [records[work_id] for work_id, _ in sorted(hits, key=rank)[:rows]]
+    
+    def check(self, title, author=None, year=None, doi=None):
+        """Same contract as check_crossref_candidates: (found, list of works) or (False, None)"""
+        if doi:
+            record = self.lookup_dois([doi]).get(doi.lower())
+            return (True, [record]) if record is not None else (False, None)
+        candidates = self.search(title, author, year)
+        return (True, candidates) if candidates else (False, None)
+
+class CrossrefMirror(MirrorIndex):
+    """Read-only local CrossRef index in SQLite: exact DOI table plus an inverted token index"""
+    
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CrossRef mirror not found: {path} (build it with --build-mirror)")
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self.size = int(meta['works'])
+        if 'blocking' in meta:
+            self.blocker = TitleBlocker(**json.loads(meta['blocking']))
+    
+    @staticmethod
+    def build(path, dump_paths, batch_size=None, blocker=None):
+        """Build a mirror at path from CrossRef dump files; returns the number of works indexed
+
+        Works without a DOI are skipped and repeated DOIs keep their first
+        record. With a TitleBlocker, title LSH band keys are indexed too.
+        The index is written to a temp file and renamed into place.
+        """
+        if batch_size is None:
+            batch_size = MIRROR_BUILD_BATCH
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE works (id INTEGER PRIMARY KEY, doi TEXT NOT NULL UNIQUE, record TEXT NOT NULL)")
+        conn.execute("CREATE TABLE postings (token TEXT NOT NULL, work_id INTEGER NOT NULL)")
+        
+        count = 0
+        postings = []
+        cursor = conn.cursor()
+        for dump_path in dump_paths:
+            for work in iter_crossref_dump(dump_path):
+                doi = (work.get('DOI') or '').lower()
+                if not doi:
+                    continue
+                record = compact_work(work)
+                cursor.execute("INSERT OR IGNORE INTO works (doi, record) VALUES (?, ?)",
+                               (doi, json.dumps(record, ensure_ascii=False, separators=(',', ':'))))
+                if cursor.rowcount != 1:
+                    continue
+                work_id = cursor.lastrowid
+                postings.extend((token, work_id) for token in mirror_tokens(record, blocker))
+                count += 1
+                if count % batch_size == 0:
+                    conn.executemany("INSERT INTO postings VALUES (?, ?)", postings)
+                    conn.commit()
+                    postings = []
+                    print(f"  {count:,} works indexed...")
+        conn.executemany("INSERT INTO postings VALUES (?, ?)", postings)
+        
+        print("  Building token index...")
+        conn.execute("CREATE INDEX postings_token ON postings (token, work_id)")
+        conn.execute("CREATE TABLE token_df (token TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+        conn.execute("INSERT INTO token_df SELECT token, COUNT(*) FROM postings GROUP BY token")
+        conn.execute("INSERT INTO meta VALUES ('works', ?)", (str(count),))
+        if blocker is not None:
+            conn.execute("INSERT INTO meta VALUES ('blocking', ?)", (json.dumps(blocker.params()),))
+        conn.execute("INSERT INTO meta VALUES ('built', ?)", (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+        conn.commit()
+        conn.close()
+        os.replace(tmp_path, path)
+        return count
+    
+    def lookup_dois(self, dois):
+        """{doi.lower(): record} for the DOIs present in the mirror"""
+        records = {}
+        dois = [doi.lower() for doi in dois if doi]
+        with self._lock:
+            for start in range(0, len(dois), 500):
+                batch = dois[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT doi, record FROM works WHERE doi IN ({','.join('?' * len(batch))})", batch)
+                records.update((doi, json.loads(record)) for doi, record in rows)
+        return records
+    
+    def _frequencies(self, tokens):
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT token, df FROM token_df WHERE token IN ({','.join('?' * len(tokens))})",
+                tokens).fetchall()
+    
+    def _hits(self, query, limit):
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT work_id, COUNT(*) AS hits FROM postings WHERE token IN ({','.join('?' * len(query))})"
+                " GROUP BY work_id ORDER BY hits DESC, work_id LIMIT ?",
+                query + [limit]).fetchall()
+    
+    def _records(self, ids):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, record FROM works WHERE id IN ({','.join('?' * len(ids))})", ids)
+            return {work_id: json.loads(record) for work_id, record in rows}
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _hash64(text):
+    """Stable 64-bit hash of a string (DOI and token tables of the compact mirror)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class CompactMirror(MirrorIndex):
+    """Memory-mapped local CrossRef index for very large snapshots
+
+    A directory of flat files, all opened with numpy.memmap so a lookup only
+    pages in what it touches and opening is near-instant at any size:
+
+      works.bin     fixed-width row per work (COMPACT_WORK_DTYPE): offsets into
+                    the string heaps, year as int16 (0 = unknown), author slice
+      dois.heap     DOIs, packed UTF-8         titles.heap   titles, packed UTF-8
+      names.heap    interned author surnames and given names, packed UTF-8,
+      names.idx     with uint64 start offsets (one extra end offset)
+      authors.bin   (family id, given id) uint32 pairs, up to 3 per work
+      doi_hash.bin  (hash64, work) sorted by hash for binary search
+      tokens.bin    (hash64, postings start, df) sorted by hash
+      postings.bin  uint32 work ids grouped by token
+      meta.json     format version and counts
+
+    The builder spills postings and DOI hashes to sorted run files and
+    merges them, so only the interned author names stay in memory.
+    """
+    
+    VERSION = 1
+    # Record layouts as numpy dtype field lists (numpy is imported on first use)
+    WORK_DTYPE = [('doi', '<u8'), ('title', '<u8'), ('authors', '<u8'),
+                  ('title_len', '<u4'), ('doi_len', '<u2'), ('year', '<i2'),
+                  ('n_authors', '<u1')]
+    DOI_DTYPE = [('hash', '<u8'), ('work', '<u4')]
+    TOKEN_DTYPE = [('hash', '<u8'), ('start', '<u8'), ('df', '<u4')]
+    
+    def __init__(self, path):
+        import numpy as np
+        meta_file = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_file):
+            raise FileNotFoundError(f"CrossRef mirror not found: {path} (build it with --build-mirror)")
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != self.VERSION:
+            raise ValueError(f"{path}: compact mirror format {meta.get('version')} (expected {self.VERSION})")
+        self.path = path
+        self.size = meta['works']
+        if meta.get('blocking'):
+            self.blocker = TitleBlocker(**meta['blocking'])
+        self._works = self._map('works.bin', self.WORK_DTYPE)
+        self._dois = self._map('dois.heap', np.uint8)
+        self._titles = self._map('titles.heap', np.uint8)
+        self._names = self._map('names.heap', np.uint8)
+        self._name_offsets = self._map('names.idx', np.uint64)
+        self._authors = self._map('authors.bin', np.uint32).reshape(-1, 2)
+        self._doi_hash = self._map('doi_hash.bin', self.DOI_DTYPE)
+        self._tokens = self._map('tokens.bin', self.TOKEN_DTYPE)
+        self._postings = self._map('postings.bin', np.uint32)
+    
+    def _map(self, name, dtype):
+        import numpy as np
+        file_path = os.path.join(self.path, name)
+        if os.path.getsize(file_path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode='r')
+    
+    @staticmethod
+    def _merge_runs(run_files, block):
+        """Merge sorted (hash, work) run files: yields arrays in hash order
+
+        Equal hashes come out in run order, i.e. by work id. Each round
+        takes everything below the smallest last hash of the current
+        windows (all of it is inside the windows), then the whole group at
+        that hash run by run, so a group never straddles two rounds.
+        """
+        import numpy as np
+        runs = [np.memmap(run_file, dtype=CompactMirror.DOI_DTYPE, mode='r')
+                for run_file in run_files if os.path.getsize(run_file)]
+        positions = [0] * len(runs)
+        while True:
+            live = [i for i in range(len(runs)) if positions[i] < len(runs[i])]
+            if not live:
+                return
+            bound = min(runs[i]['hash'][min(positions[i] + block, len(runs[i])) - 1] for i in live)
+            parts = []
+            for i in live:
+                window = runs[i][positions[i]:positions[i] + block]
+                take = int(np.searchsorted(window['hash'], bound))
+                parts.append(window[:take])
+                positions[i] += take
+            merged = np.concatenate(parts)
+            if len(merged):
+                yield merged[np.argsort(merged['hash'], kind='stable')]
+            for i in live:
+                end = positions[i] + int(np.searchsorted(runs[i]['hash'][positions[i]:], bound, side='right'))
+                while positions[i] < end:
+                    yield np.array(runs[i][positions[i]:min(end, positions[i] + block)])
+                    positions[i] = min(end, positions[i] + block)
+    
+    @classmethod
+    def _repeated_dois(cls, tmp_path, chunk):
+        """Sorted ids of works whose DOI belongs to an earlier work, from the merged doi_hash.bin"""
+        import numpy as np
+        table_file = os.path.join(tmp_path, 'doi_hash.bin')
+        if not os.path.getsize(table_file):
+            return np.zeros(0, dtype=np.uint32)
+        table = np.memmap(table_file, dtype=cls.DOI_DTYPE, mode='r')
+        pairs = []
+        for start in range(0, len(table) - 1, chunk):
+            hashes = np.asarray(table['hash'][start:start + chunk + 1])
+            pairs.extend(int(i) + start for i in np.flatnonzero(hashes[1:] == hashes[:-1]))
+        if not pairs:
+            return np.zeros(0, dtype=np.uint32)
+        works = np.memmap(os.path.join(tmp_path, 'works.bin'), dtype=cls.WORK_DTYPE, mode='r')
+        dois = np.memmap(os.path.join(tmp_path, 'dois.heap'), dtype=np.uint8, mode='r')
+        repeated = []
+        group_end = -1
+        for i in pairs:
+            if i <= group_end:
+                continue
+            group_end = i + 1
+            while group_end + 1 < len(table) and table['hash'][group_end + 1] == table['hash'][i]:
+                group_end += 1
+            seen = set()
+            for work_id in table['work'][i:group_end + 1]:
+                row = works[int(work_id)]
+                doi = bytes(dois[int(row['doi']):int(row['doi']) + int(row['doi_len'])])
+                if doi in seen:
+                    repeated.append(int(work_id))
+                seen.add(doi)
+        return np.array(sorted(repeated), dtype=np.uint32)
+    
+    @classmethod
+    def build(cls, path, dump_paths, batch_size=None, blocker=None, run_size=None):
+        """Build a compact mirror directory at path; returns the number of works indexed
+
+        Same input, duplicate handling and blocker as CrossrefMirror.build;
+        the files are written to a temp directory that replaces path when
+        complete. Token postings and DOI hashes are collected as (hash,
+        work) pairs, written out sorted every run_size pairs
+        (MIRROR_BUILD_RUN) and merged at the end. A DOI seen twice is found
+        in the merged DOI table: the later works are dropped and the ids
+        renumbered (their strings stay in the heaps, unreferenced).
+        """
+        import numpy as np
+        if batch_size is None:
+            batch_size = MIRROR_BUILD_BATCH
+        if run_size is None:
+            run_size = MIRROR_BUILD_RUN
+        tmp_path = f"{path}.tmp"
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+        runs_path = os.path.join(tmp_path, 'runs')
+        os.makedirs(runs_path)
+        
+        def heap_file(name):
+            return open(os.path.join(tmp_path, name), 'wb')
+        
+        def spill(runs, hashes, work_ids, kind):
+            if not hashes:
+                return
+            pairs = np.zeros(len(hashes), dtype=cls.DOI_DTYPE)
+            pairs['hash'] = np.frombuffer(hashes, dtype=np.uint64)
+            pairs['work'] = np.frombuffer(work_ids, dtype=np.uint32)
+            runs.append(os.path.join(runs_path, f"{kind}.{len(runs):06d}.bin"))
+            with open(runs[-1], 'wb') as f:
+                f.write(pairs[np.argsort(pairs['hash'], kind='stable')].tobytes())
+            del hashes[:], work_ids[:]
+        
+        names = {'': 0}
+        works, authors = [], []
+        posting_hashes, posting_works, posting_runs = array('Q'), array('I'), []
+        doi_hashes, doi_works, doi_runs = array('Q'), array('I'), []
+        heap_size = {'dois': 0, 'titles': 0}
+        count = 0
+        with heap_file('works.bin') as works_file, heap_file('dois.heap') as dois_file, \
+                heap_file('titles.heap') as titles_file, heap_file('authors.bin') as authors_file:
+            
+            def add(heap, handle, text):
+                data = text.encode('utf-8')
+                offset = heap_size[heap]
+                handle.write(data)
+                heap_size[heap] += len(data)
+                return offset, len(data)
+            
+            def flush():
+                works_file.write(np.array(works, dtype=cls.WORK_DTYPE).tobytes())
+                authors_file.write(np.array(authors, dtype=np.uint32).tobytes())
+                works.clear()
+                authors.clear()
+            
+            author_count = 0
+            for dump_path in dump_paths:
+                for work in iter_crossref_dump(dump_path):
+                    doi = (work.get('DOI') or '').lower()
+                    if not doi:
+                        continue
+                    record = compact_work(work)
+                    title = record['title'][0] if record['title'] else ''
+                    verified_year = record['issued']['date-parts'][0][0] if 'issued' in record else ''
+                    year = int(verified_year) if str(verified_year).isdigit() and int(verified_year) < 32768 else 0
+                    doi_offset, doi_len = add('dois', dois_file, doi)
+                    title_offset, title_len = add('titles', titles_file, title)
+                    work_authors = record['author']
+                    for author in work_authors:
+                        family = names.setdefault(author.get('family') or '', len(names))
+                        given = names.setdefault(author.get('given') or '', len(names))
+                        authors.append((family, given))
+                    works.append((doi_offset, title_offset, author_count, title_len, doi_len,
+                                  year, len(work_authors)))
+                    author_count += len(work_authors)
+                    doi_hashes.append(_hash64(doi))
+                    doi_works.append(count)
+                    for token in mirror_tokens(record, blocker):
+                        posting_hashes.append(_hash64(token))
+                        posting_works.append(count)
+                    count += 1
+                    if count % batch_size == 0:
+                        flush()
+                        print(f"  {count:,} works indexed...")
+                    if len(posting_hashes) >= run_size:
+                        spill(posting_runs, posting_hashes, posting_works, 'postings')
+                    if len(doi_hashes) >= run_size:
+                        spill(doi_runs, doi_hashes, doi_works, 'dois')
+            flush()
+        spill(posting_runs, posting_hashes, posting_works, 'postings')
+        spill(doi_runs, doi_hashes, doi_works, 'dois')
+        
+        print("  Building token index...")
+        block = max(4096, run_size // max(len(posting_runs), len(doi_runs), 1))
+        with heap_file('doi_hash.bin') as f:
+            for pairs in cls._merge_runs(doi_runs, block):
+                f.write(pairs.tobytes())
+        repeated = cls._repeated_dois(tmp_path, run_size)
+        
+        def renumber(pairs):
+            if not len(repeated):
+                return pairs
+            pairs = pairs[~np.isin(pairs['work'], repeated)]
+            pairs['work'] -= np.searchsorted(repeated, pairs['work']).astype(np.uint32)
+            return pairs
+        
+        if len(repeated):
+            for name, dtype in [('works.bin', cls.WORK_DTYPE), ('doi_hash.bin', cls.DOI_DTYPE)]:
+                table = np.memmap(os.path.join(tmp_path, name), dtype=dtype, mode='r')
+                with heap_file(f"{name}.new") as f:
+                    for start in range(0, len(table), run_size):
+                        rows = np.asarray(table[start:start + run_size])
+                        if name == 'works.bin':
+                            rows = rows[~np.isin(np.arange(start, start + len(rows)), repeated)]
+                        else:
+                            rows = renumber(rows)
+                        f.write(rows.tobytes())
+                del table
+                os.replace(os.path.join(tmp_path, f"{name}.new"), os.path.join(tmp_path, name))
+            count -= len(repeated)
+        
+        postings = 0
+        pending = None
+        with heap_file('postings.bin') as postings_file, heap_file('tokens.bin') as tokens_file:
+            for pairs in cls._merge_runs(posting_runs, block):
+                pairs = renumber(pairs)
+                if not len(pairs):
+                    continue
+                postings_file.write(pairs['work'].tobytes())
+                unique, starts, dfs = np.unique(pairs['hash'], return_index=True, return_counts=True)
+                tokens = np.zeros(len(unique), dtype=cls.TOKEN_DTYPE)
+                tokens['hash'], tokens['start'], tokens['df'] = unique, starts + postings, dfs
+                postings += len(pairs)
+                # The first token may continue the last one of the previous array
+                if pending is not None and pending['hash'][0] == tokens['hash'][0]:
+                    pending['df'] += tokens['df'][0]
+                    tokens = tokens[1:]
+                if len(tokens):
+                    if pending is not None:
+                        tokens_file.write(pending.tobytes())
+                    tokens_file.write(tokens[:-1].tobytes())
+                    pending = tokens[-1:].copy()
+            if pending is not None:
+                tokens_file.write(pending.tobytes())
+        shutil.rmtree(runs_path)
+        
+        name_list = sorted(names, key=names.get)
+        encoded = [name.encode('utf-8') for name in name_list]
+        name_offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        name_offsets[1:] = np.cumsum([len(data) for data in encoded])
+        for name, data in [('names.heap', b''.join(encoded)), ('names.idx', name_offsets.tobytes())]:
+            with heap_file(name) as f:
+                f.write(data)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': cls.VERSION, 'works': count, 'names': len(name_list),
+                       'postings': postings,
+                       'blocking': blocker.params() if blocker is not None else None,
+                       'built': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}, f)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+        return count
+    
+    def _string(self, heap, offset, length):
+        return bytes(heap[offset:offset + length]).decode('utf-8')
+    
+    def _name(self, name_id):
+        start, end = self._name_offsets[name_id], self._name_offsets[name_id + 1]
+        return bytes(self._names[start:end]).decode('utf-8')
+    
+    def _record(self, work_id):
+        """Rebuild the compact_work record of one work"""
+        row = self._works[work_id]
+        record = {
+            'DOI': self._string(self._dois, int(row['doi']), int(row['doi_len'])),
+            'title': [self._string(self._titles, int(row['title']), int(row['title_len']))],
+            'author': [],
+        }
+        start = int(row['authors'])
+        for family, given in self._authors[start:start + int(row['n_authors'])]:
+            author = {}
+            if family:
+                author['family'] = self._name(family)
+            if given:
+                author['given'] = self._name(given)
+            record['author'].append(author)
+        if row['year']:
+            record['issued'] = {'date-parts': [[str(int(row['year']))]]}
+        return record
+    
+    def lookup_dois(self, dois):
+        """{doi.lower(): record} for the DOIs present in the mirror"""
+        import numpy as np
+        records = {}
+        table = self._doi_hash
+        for doi in dois:
+            if not doi:
+                continue
+            doi = doi.lower()
+            key = _hash64(doi)
+            i = int(np.searchsorted(table['hash'], key))
+            while i < len(table) and int(table['hash'][i]) == key:
+                work_id = int(table['work'][i])
+                row = self._works[work_id]
+                if self._string(self._dois, int(row['doi']), int(row['doi_len'])) == doi:
+                    records[doi] = self._record(work_id)
+                    break
+                i += 1
+        return records
+    
+    def _token_rows(self, tokens):
+        import numpy as np
+        hashes = np.array([_hash64(token) for token in tokens], dtype=np.uint64)
+        positions = np.searchsorted(self._tokens['hash'], hashes)
+        found = []
+        for token, key, i in zip(tokens, hashes, positions):
+            if i < len(self._tokens) and self._tokens['hash'][i] == key:
+                found.append((token, self._tokens[i]))
+        return found
+    
+    def _frequencies(self, tokens):
+        return [(token, int(row['df'])) for token, row in self._token_rows(tokens)]
+    
+    def _hits(self, query, limit):
+        import numpy as np
+        slices = [self._postings[int(row['start']):int(row['start']) + int(row['df'])]
+                  for _, row in self._token_rows(query)]
+        if not slices:
+            return []
+        ids, counts = np.unique(np.concatenate(slices), return_counts=True)
+        order = np.lexsort((ids, -counts))[:limit]
+        return [(int(ids[i]), int(counts[i])) for i in order]
+    
+    def _records(self, ids):
+        return {work_id: self._record(work_id) for work_id in ids}
+    
+    def close(self):
+        for name in ('_works', '_dois', '_titles', '_names', '_name_offsets', '_authors',
+                     '_doi_hash', '_tokens', '_postings'):
+            setattr(self, name, None)
+
+crossref_mirror = None
+_mirror_lock = threading.Lock()
+
+def get_crossref_mirror():
+    """Open the CrossRef mirror on first use (None when CROSSREF_MIRROR is not set)
+
+    A directory is a CompactMirror; a file is the SQLite CrossrefMirror.
+    """
+    global crossref_mirror
+    if not CROSSREF_MIRROR:
+        return None
+    with _mirror_lock:
+        if crossref_mirror is None or crossref_mirror.path != CROSSREF_MIRROR:
+            mirror_class = CompactMirror if os.path.isdir(CROSSREF_MIRROR) else CrossrefMirror
+            crossref_mirror = mirror_class(CROSSREF_MIRROR)
+    return crossref_mirror
+
+# ============================================================================
+# INCREMENTAL RE-VERIFICATION STATE
+# ============================================================================
+
+STATE_VERSION = 1
+
+def reference_hash(ref_text):
+    """Content hash of a reference: SHA-1 of its NFC-normalized, stripped text"""
+    return hashlib.sha1(normalize_text(ref_text).strip().encode('utf-8')).hexdigest()
+
+def verification_settings():
+    """Settings that change scores; stored state is ignored if any of them differ"""
+    return {
+        'title_thresholds': [TITLE_SIMILARITY_HIGH, TITLE_SIMILARITY_LOW],
+        'book_title_thresholds': [BOOK_TITLE_SIMILARITY_HIGH, BOOK_TITLE_SIMILARITY_LOW],
+        'allow_year_difference': ALLOW_YEAR_DIFFERENCE,
+        'ancient_text_cutoff': ANCIENT_TEXT_CUTOFF,
+        'book_cues': BOOK_CUES,
+        'crossref_candidate_rows': CROSSREF_CANDIDATE_ROWS,
+        'crossref_mirror': CROSSREF_MIRROR,
+        'duplicates': [DETECT_DUPLICATES, DUPLICATE_TITLE_SIMILARITY],
+    }
+
+def load_verification_state(state_file):
+    """Load {reference_hash: {'result': ..., 'extraction_failure': ...}} from a previous run
+
+    Returns {} when there is no usable state (missing, unreadable, another
+    format version, or produced with different matching settings).
+    """
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"  (Ignoring unreadable state file {state_file}: {e})")
+        return {}
+    
+    if state.get('version') != STATE_VERSION:
+        print(f"  (Ignoring state file {state_file}: written by another version)")
+        return {}
+    if state.get('settings') != json.loads(json.dumps(verification_settings())):
+        print(f"  (Ignoring state file {state_file}: matching settings changed)")
+        return {}
+    return state.get('references', {})
+
+class VerificationStateWriter:
+    """Stream the state file one reference at a time
+
+    Entries go to a temp file as they arrive (nothing is held in memory);
+    commit() renames it over state_file, so a crash never leaves half a file
+    and an aborted run keeps the previous state. The JSON layout is the one
+    load_verification_state reads.
+    """
+    
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.tmp_file = f"{state_file}.tmp"
+        self._file = open(self.tmp_file, 'w', encoding='utf-8')
+        header = json.dumps({
+            'version': STATE_VERSION,
+            'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'settings': verification_settings(),
+        }, ensure_ascii=False)
+        self._file.write(header[:-1] + ', "references": {')
+        self._separator = ''
+    
+    def add(self, ref_hash, result, extraction_failure):
+        entry = json.dumps({'result': result, 'extraction_failure': extraction_failure},
+                           ensure_ascii=False)
+        self._file.write(f'{self._separator}"{ref_hash}": {entry}')
+        self._separator = ', '
+    
+    def commit(self):
+        self._file.write('}}')
+        self._file.close()
+        os.replace(self.tmp_file, self.state_file)
+    
+    def discard(self):
+        self._file.close()
+        os.remove(self.tmp_file)
+
+def diff_reference_sets(previous, hashes, parsed_references, duplicate_of=None):
+    """Compare this run's references with the previous state
+
+    A reference is 'changed' when its text is new but an entry that
+    disappeared had the same first author and year (an edited reference);
+    any other new text is 'added' and any other vanished text 'removed'.
+    Duplicate citations (duplicate_of[i] not None) are not stored in the
+    state, so they are left out. Returns (added, changed, removed): lists
+    of this run's reference numbers (added, changed) and of previous
+    reference numbers (removed).
+    """
+    current = set(hashes)
+    gone = {}
+    for ref_hash, entry in previous.items():
+        if ref_hash not in current:
+            result = entry['result']
+            key = (result.get('Extracted_First_Author'), result.get('Extracted_Year'))
+            gone.setdefault(key, []).append(result['Reference_Number'])
+    
+    added, changed = [], []
+    for idx, (ref_hash, parsed) in enumerate(zip(hashes, parsed_references), 1):
+        if ref_hash in previous or (duplicate_of is not None and duplicate_of[idx - 1] is not None):
+            continue
+        matches = gone.get((parsed.first_author, parsed.year))
+        if matches and parsed.first_author:
+            matches.pop(0)
+            changed.append(idx)
+        else:
+            added.append(idx)
+    removed = sorted(n for numbers in gone.values() for n in numbers)
+    return added, changed, removed
+
+# ============================================================================
+# CHECKPOINT JOURNAL (CRASH-RESUMABLE RUNS)
+# ============================================================================
+
+class CheckpointJournal:
+    """Append-only JSONL journal of finished references
+
+    The first line is a header with the format version and matching settings;
+    every following line is one {'hash', 'result', 'extraction_failure'}
+    record. Records are buffered and written in batches, so checkpointing
+    costs one write per CHECKPOINT_BATCH_SIZE results (or per
+    CHECKPOINT_FLUSH_SECONDS) rather than one per reference.
+    """
+    
+    def __init__(self, path, resume=False, batch_size=CHECKPOINT_BATCH_SIZE,
+                 flush_seconds=CHECKPOINT_FLUSH_SECONDS):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        append = resume and self._prepare_append(path)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        if not append:
+            self._file.write(json.dumps({'version': STATE_VERSION,
+                                         'settings': verification_settings()}) + '\n')
+            self._file.flush()
+    
+    @staticmethod
+    def load(path):
+        """Read finished references from a journal: {hash: {'result', 'extraction_failure'}}
+
+        A torn final line (crash mid-write) is skipped. Returns {} when the
+        journal is missing or was written with other settings.
+        """
+        entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                header = None
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if header is None:
+                        header = record
+                        if not CheckpointJournal._header_matches(header):
+                            print(f"  (Ignoring checkpoint {path}: written with other settings)")
+                            return {}
+                        continue
+                    entries[record['hash']] = {'result': record['result'],
+                                               'extraction_failure': record['extraction_failure']}
+        except FileNotFoundError:
+            return {}
+        return entries
+    
+    @staticmethod
+    def _header_matches(header):
+        return (isinstance(header, dict) and header.get('version') == STATE_VERSION and
+                header.get('settings') == json.loads(json.dumps(verification_settings())))
+    
+    @staticmethod
+    def _prepare_append(path):
+        """Whether a resumed run can append to the journal at path
+
+        A torn final line is cut off, so the next record starts on a line of
+        its own. Returns False (the journal is then started afresh) when the
+        file is missing or load() would reject its header.
+        """
+        try:
+            with open(path, 'rb+') as f:
+                first = f.readline()
+                try:
+                    header = json.loads(first)
+                except ValueError:
+                    return False
+                if not first.endswith(b'\n') or not CheckpointJournal._header_matches(header):
+                    return False
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    f.truncate(len(first) + data.rfind(b'\n') + 1)
+        except FileNotFoundError:
+            return False
+        return True
+    
+    def record(self, ref_hash, result, extraction_failure):
+        self._buffer.append(json.dumps({'hash': ref_hash, 'result': result,
+                                        'extraction_failure': extraction_failure},
+                                       ensure_ascii=False))
+        if (len(self._buffer) >= self.batch_size or
+                time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+    
+    def flush(self):
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._file.flush()
+            self._buffer = []
+        self._last_flush = time.monotonic()
+    
+    def close(self, remove=False):
+        """Flush and close; remove=True deletes the journal after a completed run"""
+        self.flush()
+        self._file.close()
+        if remove:
+            os.remove(self.path)
+
+# ============================================================================
+# SHARED LOOKUPS (CROSS-DOCUMENT DEDUPLICATION)
+# ============================================================================
+
+def lookup_key(parsed):
+    """Identity of a reference for lookup sharing: normalized DOI, else normalized title + year + first author
+
+    The first author is part of the title key because the CrossRef search
+    sends it as query.author: two references with the same title but
+    different authors make different requests and must not share a result.
+    """
+    if parsed.doi:
+        return ('doi', parsed.doi.lower())
+    if parsed.title:
+        author = strip_accents(parsed.first_author.lower()) if parsed.first_author else None
+        return ('title', normalize_title(parsed.title), parsed.year, author)
+    return None
+
+class SharedLookups:
+    """Network lookups shared by every reference in a run, or by a whole batch of documents
+
+    prefetch() resolves DOIs in bulk and PubMed pairs in batches, skipping
+    anything already resolved, so prefetching the union of several documents
+    and then each document costs the network nothing extra. CrossRef
+    candidate lists are memoized on lookup_key (reduced by compact_work, which
+    keeps the memo small), so references that cite the same work share one
+    query; scoring stays per reference. Safe to use from
+    several worker threads: a lookup in progress is waited on, not repeated.
+    """
+    
+    def __init__(self):
+        self.doi_records = {}
+        self.pubmed_results = {}
+        self._dois_checked = set()
+        self._crossref = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.references = 0
+        self.keys = set()
+    
+    def __len__(self):
+        """Number of memoized lookups (DOI records, PubMed pairs and CrossRef candidate lists)"""
+        return len(self.doi_records) + len(self.pubmed_results) + len(self._crossref)
+    
+    def prefetch(self, parsed_references):
+        """Bulk-resolve DOIs and PubMed pairs not resolved yet; prints request counts"""
+        dois = []
+        pubmed_pairs = []
+        for parsed in parsed_references:
+            if parsed.ref_type == 'ancient_text':
+                continue
+            if parsed.doi and parsed.doi.lower() not in self._dois_checked:
+                dois.append(parsed.doi)
+            if (parsed.ref_type == 'journal_article' and parsed.title and parsed.first_author and
+                    (parsed.title, parsed.first_author) not in self.pubmed_results):
+                pubmed_pairs.append((parsed.title, parsed.first_author))
+        
+        doi_records, doi_requests = check_crossref_dois(dois)
+        self.doi_records.update(doi_records)
+        self._dois_checked.update(doi.lower() for doi in dois)
+        if dois:
+            print(f"CrossRef: {len(doi_records)} of {len(set(d.lower() for d in dois))} unique DOIs "
+                  f"resolved in {doi_requests} requests")
+        pubmed_results, pubmed_requests = check_pubmed_batch(pubmed_pairs)
+        self.pubmed_results.update(pubmed_results)
+        if pubmed_pairs:
+            print(f"PubMed: {len(pubmed_results)} lookups resolved in {pubmed_requests} requests")
+    
+    def count(self, parsed_references):
+        """Record references towards the dedup ratio (references per unique lookup)"""
+        for parsed in parsed_references:
+            self.references += 1
+            self.keys.add(lookup_key(parsed) or ('unkeyed', self.references))
+    
+    def dedup_line(self):
+        unique = len(self.keys)
+        ratio = self.references / unique if unique else 1.0
+        return (f"Deduplication: {self.references} references, {unique} unique "
+                f"(ratio {ratio:.2f}; {self.references - unique} lookups shared)")
+    
+    def crossref_candidates(self, parsed):
+        """check_crossref_candidates for parsed, computed once per lookup_key"""
+        key = lookup_key(parsed)
+        if key is None:
+            return check_crossref_candidates(parsed.title, parsed.first_author, parsed.year,
+                                             parsed.doi, self.doi_records)
+        with self._lock:
+            if key in self._crossref:
+                return self._crossref[key]
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+        if not owner:
+            event.wait()
+            return self._crossref[key]
+        outcome = (False, None)
+        try:
+            found, candidates = check_crossref_candidates(parsed.title, parsed.first_author,
+                                                          parsed.year, parsed.doi, self.doi_records)
+            if isinstance(candidates, list):
+                candidates = [compact_work(work) for work in candidates]
+            outcome = (found, candidates)
+        finally:
+            with self._lock:
+                self._crossref[key] = outcome
+                del self._pending[key]
+            event.set()
+        return outcome
+    
+    def fetch_all_async(self, parsed_references, concurrency=None):
+        """CrossRef lookups for parsed_references on the async transport, ahead of scoring
+
+        Every lookup_key not memoized yet becomes one check_crossref_candidates_async
+        call on the transport's event loop. asyncio.gather runs concurrency
+        (default HTTP_POOL_SIZE) workers taking keys in turn, so that many
+        searches are in flight without a thread each and only that many
+        coroutines exist at a time. Results go into the memo that
+        crossref_candidates reads; requests are counted into the calling
+        thread's track_requests stats. Returns the number of lookups made.
+        """
+        import asyncio
+        if concurrency is None:
+            concurrency = HTTP_POOL_SIZE
+        todo = {}
+        for parsed in parsed_references:
+            key = lookup_key(parsed)
+            if (parsed.ref_type != 'ancient_text' and key is not None and
+                    key not in self._crossref and key not in self._pending):
+                todo.setdefault(key, parsed)
+        pending = iter(todo.items())
+        stats = getattr(_request_context, 'stats', None)
+        
+        async def worker():
+            for key, parsed in pending:
+                found, candidates = await check_crossref_candidates_async(
+                    parsed.title, parsed.first_author, parsed.year, parsed.doi, self.doi_records)
+                if isinstance(candidates, list):
+                    candidates = [compact_work(work) for work in candidates]
+                with self._lock:
+                    self._crossref[key] = (found, candidates)
+        
+        async def run():
+            with track_requests(stats):
+                await asyncio.gather(*(worker() for _ in range(min(concurrency, len(todo)))))
+        
+        if todo:
+            get_transport().run(run())
+        return len(todo)
+    
+    def pubmed(self, title, author):
+        """PubMed_Found for (title, author): the prefetched value or a direct check"""
+        pair = (title, author)
+        if pair not in self.pubmed_results:
+            self.pubmed_results[pair], _ = check_pubmed(title, author)
+        return self.pubmed_results[pair]
+    
+    def fetch(self, parsed, timings=None):
+        """Do every lookup process_reference will ask for, ahead of scoring
+
+        timings, when given, receives the 'crossref' and 'pubmed' durations.
+        """
+        if parsed.ref_type == 'ancient_text':
+            return
+        if parsed.doi or parsed.title:
+            started = time.perf_counter()
+            self.crossref_candidates(parsed)
+            if timings is not None:
+                timings['crossref'] = time.perf_counter() - started
+        if parsed.ref_type == 'journal_article' and parsed.title and parsed.first_author:
+            started = time.perf_counter()
+            self.pubmed(parsed.title, parsed.first_author)
+            if timings is not None:
+                timings['pubmed'] = time.perf_counter() - started
+    
+    def export(self, parsed_references):
+        """Picklable lookups for parsed_references (to send to a worker process)"""
+        crossref = {}
+        pubmed = {}
+        for parsed in parsed_references:
+            key = lookup_key(parsed)
+            if key in self._crossref:
+                crossref[key] = self._crossref[key]
+            pair = (parsed.title, parsed.first_author)
+            if pair in self.pubmed_results:
+                pubmed[pair] = self.pubmed_results[pair]
+        return {'crossref': crossref, 'pubmed': pubmed}
+    
+    @classmethod
+    def from_export(cls, exported):
+        """Rebuild lookups from export() (in a worker process)"""
+        lookups = cls()
+        lookups._crossref.update(exported['crossref'])
+        lookups.pubmed_results.update(exported['pubmed'])
+        return lookups
+
+# ============================================================================
+# PROCESS POOL (CPU-BOUND STAGES)
+# ============================================================================
+
+# Settings parsing and scoring read. Command-line options rebind them in the
+# main process only; worker processes started with spawn or forkserver
+# re-import the module defaults, so every chunk carries the current values.
+WORKER_SETTINGS = [
+    'TITLE_SIMILARITY_HIGH', 'TITLE_SIMILARITY_LOW', 'BOOK_TITLE_SIMILARITY_HIGH',
+    'BOOK_TITLE_SIMILARITY_LOW', 'ALLOW_YEAR_DIFFERENCE', 'ANCIENT_TEXT_CUTOFF', 'BOOK_CUES',
+    'EMAIL', 'DEBUG_MODE',
+]
+
+def worker_settings():
+    """Current values of WORKER_SETTINGS, to send along with work for a process pool"""
+    return {name: globals()[name] for name in WORKER_SETTINGS}
+
+def apply_worker_settings(settings):
+    """Worker process side of worker_settings()"""
+    globals().update(settings)
+
+def _parse_chunk(texts, settings):
+    apply_worker_settings(settings)
+    return [tuple(parse_reference(text)) for text in texts]
+
+def parse_references(texts, executor=None, chunk_size=None):
+    """parse_reference for every text; chunks go to executor (a process pool) when given
+
+    Records travel back as plain tuples, the cheapest form to pickle.
+    """
+    if chunk_size is None:
+        chunk_size = PROCESS_CHUNK_SIZE
+    if executor is None or len(texts) <= chunk_size:
+        return [parse_reference(text) for text in texts]
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    return [ParsedReference._make(fields)
+            for chunk in executor.map(_parse_chunk, chunks, [worker_settings()] * len(chunks))
+            for fields in chunk]
+
+def _score_chunk(items, total, exported_lookups, settings, profiled=False):
+    """Worker process: process_reference for (idx, ref_text, parsed fields) items
+
+    All lookups arrive in exported_lookups, so nothing here touches the network.
+    settings (worker_settings()) are applied first. With profiled, each
+    outcome comes back as (outcome, scoring seconds).
+    """
+    apply_worker_settings(settings)
+    lookups = SharedLookups.from_export(exported_lookups)
+    if not profiled:
+        return [process_reference(idx, ref_text, total, parsed=ParsedReference._make(fields),
+                                  lookups=lookups)
+                for idx, ref_text, fields in items]
+    scored = []
+    for idx, ref_text, fields in items:
+        timings = {}
+        outcome = process_reference(idx, ref_text, total, parsed=ParsedReference._make(fields),
+                                    lookups=lookups, timings=timings)
+        scored.append((outcome, timings.get('scoring', 0.0)))
+    return scored
+
+def _carried_outcome(idx, entry, total):
+    """process_reference-style outcome for a reference reused from state or checkpoint"""
+    result = dict(entry['result'], Reference_Number=idx)
+    lines = [f"\nReference {idx}/{total}: unchanged since last run (previous result reused)"]
+    return result, entry['extraction_failure'], lines
+
+def iter_process_outcomes(executor, rows, total, lookups, processes, io_workers=1, chunk_size=None,
+                          max_pending=None, profile=None):
+    """Verify rows of (idx, ref_text, parsed, carried entry) with scoring in a process pool
+
+    Rows are taken a chunk at a time. The chunk's lookups run here, in the
+    main process (on io_workers threads); the chunk is then scored by
+    _score_chunk in executor, a pool of processes workers, while the next
+    chunk's lookups proceed. At most max_pending chunks (default: two per
+    process) are in flight, and
+    outcomes are yielded in row order like process_reference's. A
+    RunProfile gets each reference's lookup and scoring times.
+    """
+    if chunk_size is None:
+        chunk_size = PROCESS_CHUNK_SIZE
+    if max_pending is None:
+        max_pending = 2 * max(processes, 1)
+    io_pool = ThreadPoolExecutor(max_workers=io_workers) if io_workers > 1 else None
+    settings = worker_settings()
+    
+    def fetch(row):
+        idx, _, parsed, _ = row
+        if profile is None:
+            lookups.fetch(parsed)
+            return
+        record = profile.reference(idx)
+        started = time.perf_counter()
+        with track_requests(record.requests):
+            lookups.fetch(parsed, timings=record.stages)
+        record.total += time.perf_counter() - started
+    
+    def drain(block, future):
+        scored = iter(future.result() if future is not None else ())
+        for idx, ref_text, parsed, entry in block:
+            if entry is not None:
+                yield _carried_outcome(idx, entry, total)
+            elif profile is None:
+                yield next(scored)
+            else:
+                outcome, seconds = next(scored)
+                record = profile.reference(idx)
+                record.stages['scoring'] = seconds
+                record.total += seconds
+                yield outcome
+    
+    rows = iter(rows)
+    pending = deque()
+    try:
+        while True:
+            block = list(islice(rows, chunk_size))
+            if not block:
+                break
+            todo = [row for row in block if row[3] is None]
+            if io_pool is not None:
+                list(io_pool.map(fetch, todo))
+            else:
+                for row in todo:
+                    fetch(row)
+            future = None
+            if todo:
+                items = [(idx, ref_text, tuple(parsed)) for idx, ref_text, parsed, _ in todo]
+                future = executor.submit(_score_chunk, items, total,
+                                         lookups.export([parsed for _, _, parsed, _ in todo]),
+                                         settings, profile is not None)
+            pending.append((block, future))
+            while len(pending) > max_pending:
+                yield from drain(*pending.popleft())
+        while pending:
+            yield from drain(*pending.popleft())
+    finally:
+        if io_pool is not None:
+            io_pool.shutdown(wait=True, cancel_futures=True)
+
+# ============================================================================
+# DUPLICATE CITATIONS (INTRA-BIBLIOGRAPHY CLUSTERING)
+# ============================================================================
+
+def same_cited_work(a, b, min_similarity=None):
+    """Whether two parsed references cite the same work (see DETECT_DUPLICATES)"""
+    if min_similarity is None:
+        min_similarity = DUPLICATE_TITLE_SIMILARITY
+    if a.doi and b.doi:
+        return a.doi.lower() == b.doi.lower()
+    if not (a.first_author and b.first_author and a.title and b.title):
+        return False
+    if strip_accents(a.first_author).lower() != strip_accents(b.first_author).lower():
+        return False
+    if a.year and b.year and a.year.isdigit() and b.year.isdigit():
+        if abs(int(a.year) - int(b.year)) > ALLOW_YEAR_DIFFERENCE:
+            return False
+    elif a.year != b.year:
+        return False
+    return title_similarity_at_least(a.title, b.title, min_similarity) is not None
+
+def find_duplicate_references(parsed_references, min_similarity=None, blocker=None):
+    """Cluster references citing the same work; returns duplicate_of per reference
+
+    duplicate_of[i] is the (0-based) index of the first reference of i's
+    cluster, or None when i is first (or alone). References sharing a DOI
+    are joined directly; for the rest only pairs whose titles share a
+    TitleBlocker bucket are compared with same_cited_work, so the cost grows
+    with the number of similar titles rather than with the square of the
+    bibliography size. Ancient texts are never clustered.
+    """
+    if blocker is None:
+        blocker = TitleBlocker(bands=DUPLICATE_BLOCKING_BANDS, rows=DUPLICATE_BLOCKING_ROWS)
+    parent = list(range(len(parsed_references)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+    
+    first_with_doi = {}
+    for i, parsed in enumerate(parsed_references):
+        if parsed.ref_type == 'ancient_text':
+            continue
+        if parsed.doi:
+            union(first_with_doi.setdefault(parsed.doi.lower(), i), i)
+        if parsed.title:
+            blocker.add(i, parsed.title)
+    for i, j in blocker.pairs():
+        if find(i) != find(j) and same_cited_work(parsed_references[i], parsed_references[j],
+                                                  min_similarity):
+            union(i, j)
+    
+    duplicate_of = []
+    for i in range(len(parsed_references)):
+        root = find(i)
+        duplicate_of.append(root if root != i else None)
+    return duplicate_of
+
+def _duplicate_outcome(idx, ref_text, parsed, total, representative):
+    """process_reference-style outcome for a duplicate, without any lookup
+
+    The duplicate keeps its cluster's CrossRef and PubMed results, but its
+    own extracted fields are scored against the work the first reference
+    was matched to, and it gets its own issues (NO_DOI_FOUND, ...) followed
+    by DUPLICATE_OF_REF_<n>. It always needs review.
+    """
+    ref_type, doi, year, original_year, first_author, all_authors, title = parsed
+    first_idx = representative['Reference_Number']
+    result = dict(representative,
+                  Reference_Number=idx,
+                  Reference_Type=ref_type,
+                  Original_Text=ref_text,
+                  Extracted_First_Author=first_author,
+                  Extracted_All_Authors=', '.join(all_authors) if all_authors else '',
+                  Extracted_Year=year,
+                  Extracted_Original_Year=original_year,
+                  Extracted_Title=title,
+                  Extracted_DOI=doi,
+                  Title_Similarity=0.0,
+                  CrossRef_Match_Score=0,
+                  Issues_Detected='In press or future publication' if ref_type == 'in_press' else [])
+    if representative['CrossRef_Found'] and representative['Verified_Title']:
+        match = score_verified(parsed, representative['Verified_Title'], representative['Verified_Authors'],
+                               representative['Verified_Year'], representative['Verified_DOI'])
+        if title:
+            result['Title_Similarity'] = round(match.similarity, 3)
+        result['CrossRef_Match_Score'] = match.score
+    assign_status(result, doi, title)
+    issues = [] if result['Issues_Detected'] == 'None' else [result['Issues_Detected']]
+    result['Issues_Detected'] = '; '.join(issues + [f"DUPLICATE_OF_REF_{first_idx}"])
+    result['Status'] = 'NEEDS_REVIEW'
+    lines = [f"\nReference {idx}/{total}: duplicate of reference {first_idx} (its lookups reused)",
+             f"  ⚠ Status: NEEDS_REVIEW | Score: {result['CrossRef_Match_Score']} | "
+             f"Sim: {result['Title_Similarity']:.2f} | DUPLICATE_OF_REF_{first_idx}"]
+    return result, extraction_failure_note(parsed), lines
+
+# ============================================================================
+# MAIN VERIFICATION FUNCTION
+# ============================================================================
+
+def extraction_failure_note(parsed):
+    """What parse_reference failed to extract from a reference, or None"""
+    extraction_failure = None
+    if not parsed.title:
+        extraction_failure = "Title extraction failed - pattern may need adjustment"
+    if not parsed.first_author:
+        extraction_failure = (extraction_failure or "") + "; Author extraction failed"
+    if not parsed.year:
+        extraction_failure = (extraction_failure or "") + "; Year extraction failed"
+    return extraction_failure
+
+def process_reference(idx, ref_text, total, parsed=None, lookups=None, timings=None):
+    """Extract, verify and score a single reference
+
+    parsed is the reference's ParsedReference when the caller already has it.
+    lookups is the run's SharedLookups (prefetched DOIs and PubMed results,
+    memoized CrossRef queries); a private one is used when omitted. timings,
+    when given, receives the 'crossref', 'scoring' and 'pubmed' durations.
+    Returns (result, extraction_failure, log_lines). Console output is
+    collected in log_lines rather than printed so that references verified
+    concurrently still print as one contiguous block each.
+    """
+    lines = []
+    log = lines.append
+    extraction_failure = None
+    
+    log(f"\nProcessing reference {idx}/{total}...")
+    log(f"  {ref_text[:80]}...")
+    
+    # Detect reference type and extract metadata
+    if parsed is None:
+        parsed = parse_reference(ref_text)
+    if lookups is None:
+        lookups = SharedLookups()
+    ref_type, doi, year, original_year, first_author, all_authors, title = parsed
+    
+    if DEBUG_MODE:
+        log(f"  DEBUG - Type: {ref_type}")
+        log(f"  DEBUG - Extracted:")
+        log(f"    First Author: {first_author}")
+        log(f"    All Authors: {list(all_authors)}")
+        log(f"    Year: {year} | Original: {original_year}")
+        log(f"    Title: {title}")
+        log(f"    DOI: {doi}")
+    
+    # Initialize result dictionary
+    result = {
+        'Reference_Number': idx,
+        'Reference_Type': ref_type,
+        'Original_Text': ref_text,
+        'Extracted_First_Author': first_author,
+        'Extracted_All_Authors': ', '.join(all_authors) if all_authors else '',
+        'Extracted_Year': year,
+        'Extracted_Original_Year': original_year,
+        'Extracted_Title': title,
+        'Extracted_DOI': doi,
+        'CrossRef_Found': False,
+        'Title_Similarity': 0.0,
+        'CrossRef_Match_Score': 0,
+        'CrossRef_Candidates': 0,
+        'Runner_Up_Margin': '',
+        'PubMed_Found': False,
+        'Verified_DOI': '',
+        'Verified_Title': '',
+        'Verified_Authors': '',
+        'Verified_Year': '',
+        'Issues_Detected': [],
+        'Status': 'PENDING'
+    }
+    
+    # Handle ancient texts separately (skip verification)
+    if ref_type == 'ancient_text':
+        result['Status'] = 'ANCIENT_TEXT'
+        result['Issues_Detected'] = f'Ancient text (pre-{ANCIENT_TEXT_CUTOFF}) - verification not applicable'
+        log(f"  ⌛ Status: ANCIENT_TEXT (pre-{ANCIENT_TEXT_CUTOFF})")
+        return result, extraction_failure, lines
+    
+    # Handle in-press items
+    if ref_type == 'in_press':
+        result['Issues_Detected'] = 'In press or future publication'
+    
+    # Track extraction failures
+    extraction_failure = extraction_failure_note(parsed)
+    
+    # Check CrossRef and keep the best-scoring candidate
+    if doi or title:
+        started = time.perf_counter()
+        crossref_found, candidates = lookups.crossref_candidates(parsed)
+        if timings is not None:
+            timings['crossref'] = time.perf_counter() - started
+        result['CrossRef_Found'] = crossref_found
+        
+        if crossref_found and candidates:
+            started = time.perf_counter()
+            best, margin = rank_candidates(parsed, candidates)
+            if timings is not None:
+                timings['scoring'] = time.perf_counter() - started
+            result['CrossRef_Candidates'] = len(candidates)
+            result['Runner_Up_Margin'] = margin if margin is not None else ''
+            result['Verified_DOI'] = best.verified_doi
+            result['Verified_Title'] = best.verified_title
+            result['Verified_Authors'] = best.verified_authors
+            result['Verified_Year'] = best.verified_year
+            if title and best.verified_title:
+                result['Title_Similarity'] = round(best.similarity, 3)
+            result['CrossRef_Match_Score'] = best.score
+            
+            if DEBUG_MODE:
+                for note in best.notes:
+                    log(f"  DEBUG - {note}")
+                if len(candidates) > 1:
+                    log(f"  DEBUG - Best of {len(candidates)} candidates (runner-up margin: {margin})")
+    
+    # Check PubMed (only for journal articles, not books)
+    if title and first_author and ref_type == 'journal_article':
+        started = time.perf_counter()
+        result['PubMed_Found'] = lookups.pubmed(title, first_author)
+        if timings is not None:
+            timings['pubmed'] = time.perf_counter() - started
+    
+    # Determine status and issues
+    assign_status(result, doi, title)
+    
+    # Print status
+    if result['Status'] == 'ANCIENT_TEXT':
+        status_symbol = '⌛'
+    elif result['Status'] == 'VERIFIED':
+        status_symbol = '✓'
+    else:
+        status_symbol = '⚠'
+    
+    log(f"  {status_symbol} Status: {result['Status']} | Score: {result['CrossRef_Match_Score']} | "
+        f"Sim: {result['Title_Similarity']:.2f} | Type: {ref_type}")
+    
+    return result, extraction_failure, lines
+
+def assign_status(result, doi, title):
+    """Set result's Status and join its Issues_Detected from the lookup outcome"""
+    if not result.get('Issues_Detected'):
+        issues = []
+    else:
+        issues = result['Issues_Detected'] if isinstance(result['Issues_Detected'], list) else [result['Issues_Detected']]
+    
+    if not result['CrossRef_Found'] and not result['PubMed_Found']:
+        if 'NOT_FOUND_IN_DATABASES' not in issues:
+            issues.append("NOT_FOUND_IN_DATABASES")
+        result['Status'] = 'NEEDS_REVIEW'
+    elif result['CrossRef_Match_Score'] < 50:
+        if 'LOW_MATCH_CONFIDENCE' not in issues:
+            issues.append("LOW_MATCH_CONFIDENCE")
+        result['Status'] = 'NEEDS_REVIEW'
+    else:
+        result['Status'] = 'VERIFIED'
+    
+    if not doi:
+        if 'NO_DOI_FOUND' not in issues:
+            issues.append("NO_DOI_FOUND")
+    
+    if not title:
+        if 'TITLE_NOT_EXTRACTED' not in issues:
+            issues.append("TITLE_NOT_EXTRACTED")
+        result['Status'] = 'NEEDS_REVIEW'
+    
+    result['Issues_Detected'] = '; '.join(issues) if issues else 'None'
+
+def read_references(word_file, reader=None):
+    """Probable reference paragraphs of a Word document, in order
+
+    Collection starts at the first reference-list heading (see
+    collect_references). reader is 'stream' or 'python-docx' (default
+    DOCX_READER).
+    """
+    return collect_references(iter_document_paragraphs(word_file, reader))
+
+def iter_verification(word_file, max_workers=None, incremental=None, state_file=None,
+                      resume=False, checkpoint_file=None, lookups=None, references=None,
+                      processes=None, detect_duplicates=None, profile=None, parsed_references=None,
+                      process_pool=None, duplicate_of=None):
+    """Verify all references, yielding (result, extraction_failure) as each one finishes
+
+    Results come out in Reference_Number order and are not kept, so callers
+    that write them out as they arrive (run_verification) never hold the
+    result rows. Only the output is streamed: the references, their parsed
+    records, hashes and carried-over results are read in full up front
+    (duplicate detection, the incremental diff and the prefetch need all of
+    them), so memory still grows with the bibliography through the inputs.
+    
+    With max_workers > 1, references are verified concurrently on a bounded
+    thread pool. Results are still collected in Reference_Number order, so the
+    output is identical to a serial run.
+    
+    In incremental mode, references whose text is unchanged since the run that
+    wrote state_file keep their previous results; only new or edited ones are
+    looked up. The state file is rewritten after every incremental run (and
+    only then: a plain run leaves no state behind).
+    
+    Finished references are journaled to checkpoint_file as the run goes; with
+    resume=True, references already in the journal are not verified again.
+    The journal is deleted once the run completes.
+    
+    word_file may be any input load_references reads (.docx, .bib, .ris,
+    .txt, or "-" for standard input). lookups is a SharedLookups to reuse
+    (batch mode shares one across documents); references skips reading
+    word_file when already read, and parsed_references (one ParsedReference
+    per reference, as BibTeX/RIS input provides) skips the extraction.
+    
+    With processes > 1, parsing and scoring run in a pool of that many
+    processes (see iter_process_outcomes); max_workers then sets the number
+    of threads doing the network lookups. process_pool is a running
+    ProcessPoolExecutor of processes workers to use instead (the service
+    keeps one warm); it is left running.
+    
+    With detect_duplicates (default DETECT_DUPLICATES), repeated citations of
+    one work are found before any lookup (find_duplicate_references); only
+    the first is verified and the others reuse its result, flagged
+    DUPLICATE_OF_REF_<n>. duplicate_of, as find_duplicate_references returned
+    it for these references, skips that search (batch mode finds them once).
+    
+    profile is an optional RunProfile to fill with stage timings and
+    per-reference request counts.
+    """
+    if max_workers is None:
+        max_workers = MAX_WORKERS
+    if incremental is None:
+        incremental = INCREMENTAL_MODE
+    if state_file is None:
+        state_file = STATE_FILE
+    if checkpoint_file is None:
+        checkpoint_file = CHECKPOINT_FILE
+    if processes is None:
+        processes = PROCESS_WORKERS
+    if detect_duplicates is None:
+        detect_duplicates = DETECT_DUPLICATES
+    run_started = time.perf_counter()
+    
+    print(f"Reading bibliography from {'standard input' if word_file == '-' else word_file}...")
+    
+    if references is None:
+        with profile_stage(profile, 'read'):
+            references, parsed_references = load_references(word_file)
+    
+    print(f"Found {len(references)} reference entries (headers filtered)")
+    if DEBUG_MODE:
+        print(f"\n{'='*70}")
+        print("DEBUG MODE: ON - Showing detailed extraction info")
+        print(f"{'='*70}\n")
+    
+    total = len(references)
+    
+    own_pool = process_pool is None
+    if own_pool and processes > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        process_pool = ProcessPoolExecutor(max_workers=processes)
+    with profile_stage(profile, 'parse'):
+        if parsed_references is not None:
+            parsed_references = list(parsed_references)
+        elif profile is not None and process_pool is None:
+            parsed_references = []
+            for idx, ref_text in enumerate(references, 1):
+                started = time.perf_counter()
+                parsed_references.append(parse_reference(ref_text))
+                record = profile.reference(idx)
+                record.stages['extraction'] = record.total = time.perf_counter() - started
+        else:
+            parsed_references = parse_references(references, process_pool)
+    hashes = [reference_hash(ref_text) for ref_text in references]
+    
+    # Duplicate citations are verified once, through the first of each cluster
+    if not detect_duplicates:
+        duplicate_of = [None] * total
+    elif duplicate_of is None:
+        with profile_stage(profile, 'duplicates'):
+            duplicate_of = find_duplicate_references(parsed_references)
+    duplicates = sum(1 for first in duplicate_of if first is not None)
+    if duplicates:
+        print(f"Duplicates: {duplicates} entries cite a work listed earlier (verified once, "
+              f"flagged DUPLICATE_OF_REF_n)")
+    
+    # Incremental mode: carry over results for unchanged references
+    previous = load_verification_state(state_file) if incremental else {}
+    checkpointed = CheckpointJournal.load(checkpoint_file) if resume else {}
+    if resume:
+        done = sum(1 for ref_hash in hashes if ref_hash in checkpointed)
+        print(f"Resume: {done} of {total} references already verified in {checkpoint_file}")
+    carried = [checkpointed.get(ref_hash) or previous.get(ref_hash) for ref_hash in hashes]
+    # Duplicates are rebuilt from their cluster's result every run, and a stored
+    # DUPLICATE_OF_REF_n row (state files written before duplicates were left
+    # out hold some) only means something next to its reference n
+    carried = [None if first is not None or (entry is not None and 'DUPLICATE_OF_REF_' in
+                                             str(entry['result'].get('Issues_Detected')))
+               else entry for entry, first in zip(carried, duplicate_of)]
+    if incremental:
+        added, changed, removed = diff_reference_sets(previous, hashes, parsed_references, duplicate_of)
+        print(f"Incremental: {sum(1 for c in carried if c)} unchanged (reused), "
+              f"{len(added)} added, {len(changed)} changed, {len(removed)} removed since last run")
+        if added:
+            print(f"  Added: #{', #'.join(map(str, added))}")
+        if changed:
+            print(f"  Changed: #{', #'.join(map(str, changed))}")
+        if removed:
+            print(f"  Removed (previous numbering): #{', #'.join(map(str, removed))}")
+    unique = [i for i in range(total) if duplicate_of[i] is None]
+    
+    # Pre-pass: resolve DOIs in bulk and PubMed in batches before per-reference work
+    if lookups is None:
+        lookups = SharedLookups()
+    with profile_stage(profile, 'prefetch'):
+        lookups.prefetch([parsed_references[i] for i in unique if carried[i] is None])
+        if HTTP_TRANSPORT == 'async' and not (CACHE_OFFLINE or CROSSREF_MIRROR):
+            searched = lookups.fetch_all_async([parsed_references[i] for i in unique if carried[i] is None])
+            if searched:
+                print(f"CrossRef: {searched} lookups run on the async transport "
+                      f"({HTTP_POOL_SIZE} in flight)")
+    
+    def verify_one(idx, ref_text, parsed, entry):
+        if entry is not None:
+            return _carried_outcome(idx, entry, total)
+        if profile is None:
+            return process_reference(idx, ref_text, total, parsed=parsed, lookups=lookups)
+        record = profile.reference(idx)
+        started = time.perf_counter()
+        with track_requests(record.requests):
+            outcome = process_reference(idx, ref_text, total, parsed=parsed, lookups=lookups,
+                                        timings=record.stages)
+        record.total += time.perf_counter() - started
+        return outcome
+    
+    if process_pool is not None:
+        print(f"Scoring in {processes} worker processes "
+              f"(lookups on {max_workers} thread{'s' if max_workers > 1 else ''})")
+        if max_workers > 1:
+            configure_session(pool_size=max_workers)
+        executor = process_pool
+        outcomes = iter_process_outcomes(process_pool,
+                                         ((i + 1, references[i], parsed_references[i], carried[i])
+                                          for i in unique),
+                                         total, lookups, processes, io_workers=max_workers, profile=profile)
+    elif max_workers > 1:
+        print(f"Verifying with {max_workers} concurrent workers")
+        configure_session(pool_size=max_workers)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        # executor.map yields in submission order, whatever order workers finish in
+        outcomes = executor.map(verify_one, [i + 1 for i in unique], [references[i] for i in unique],
+                                [parsed_references[i] for i in unique], [carried[i] for i in unique])
+    else:
+        executor = None
+        outcomes = (verify_one(i + 1, references[i], parsed_references[i], carried[i]) for i in unique)
+    
+    # First entries of clusters keep their result until their duplicates are reached
+    cluster_heads = set(first for first in duplicate_of if first is not None)
+    cluster_results = {}
+    
+    state = VerificationStateWriter(state_file) if incremental else None
+    journal = CheckpointJournal(checkpoint_file, resume=resume)
+    completed = False
+    verify_started = time.perf_counter()
+    try:
+        for i, (ref_hash, entry, first) in enumerate(zip(hashes, carried, duplicate_of)):
+            if first is not None:
+                result, extraction_failure, lines = _duplicate_outcome(
+                    i + 1, references[i], parsed_references[i], total, cluster_results[first])
+            else:
+                result, extraction_failure, lines = next(outcomes)
+                if i in cluster_heads:
+                    cluster_results[i] = result
+                if entry is None:
+                    journal.record(ref_hash, result, extraction_failure)
+            if profile is not None and (first is not None or entry is not None):
+                profile.reference(i + 1).source = 'duplicate' if first is not None else 'reused'
+            for line in lines:
+                print(line)
+            if state is not None and first is None:
+                # Duplicates are not stored: their flag depends on the rest of the bibliography
+                state.add(ref_hash, result, extraction_failure)
+            yield result, extraction_failure
+        completed = True
+    finally:
+        if profile is not None:
+            profile.stages['verify'] = time.perf_counter() - verify_started
+            profile.stages['total'] = time.perf_counter() - run_started
+        if process_pool is not None:
+            outcomes.close()
+        if executor is not None and (executor is not process_pool or own_pool):
+            executor.shutdown(wait=True, cancel_futures=True)
+        journal.close(remove=completed)
+        if state is not None and completed:
+            state.commit()
+        elif state is not None:
+            state.discard()
+    
+    if response_cache is not None:
+        print(f"\n{response_cache.stats_line()}")
+
+def verify_bibliography(word_file, **options):
+    """Main function to verify all references
+
+    Collects iter_verification (same options) into a DataFrame and returns
+    (DataFrame, {Reference_Number: extraction_failure}). For large batches
+    prefer run_verification, which streams rows straight to the CSV files.
+    """
+    import pandas as pd
+    results = []
+    extraction_failures = {}
+    for result, extraction_failure in iter_verification(word_file, **options):
+        results.append(result)
+        if extraction_failure:
+            extraction_failures[result['Reference_Number']] = extraction_failure
+    return pd.DataFrame(results), extraction_failures
+
+def run_verification(word_file, output_file, r_output_file, log_file, parquet_file=None,
+                     results=None, **options):
+    """Streaming pipeline: verify and write each row to both CSV files as it finishes
+
+    The summary log is written from running totals (ReportStats) at the end,
+    so no step needs the full result table in memory (the input references
+    are still held; see iter_verification). With parquet_file the
+    rows also go to a Parquet file, one row group at a time, and a results
+    list gets every row appended (the service returns them as JSON). Options
+    are those of iter_verification. Returns (ReportStats, extraction_failures).
+    """
+    stats = ReportStats()
+    extraction_failures = {}
+    with ReportWriter(output_file, r_output_file, parquet_file) as writer:
+        for result, extraction_failure in iter_verification(word_file, **options):
+            writer.write(result)
+            stats.add(result)
+            if results is not None:
+                results.append(result)
+            if extraction_failure:
+                extraction_failures[result['Reference_Number']] = extraction_failure
+    print(f"\n✓ Detailed report saved to: {output_file}")
+    print(f"✓ R-compatible file saved to: {r_output_file}")
+    if parquet_file:
+        print(f"✓ Parquet file saved to: {parquet_file}")
+    stats.write_log(log_file)
+    print(f"✓ Summary log saved to: {log_file}")
+    return stats, extraction_failures
+
+def find_documents(pattern):
+    """Input files to verify in batch mode: every supported file in a directory, or those matching a glob"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+    return sorted(path for path in glob.glob(pattern)
+                  if input_format(path) in INPUT_READERS and os.path.isfile(path)
+                  and not os.path.basename(path).startswith('~$'))
+
+def run_batch(word_files, output_dir=None, profile=False, parquet=False, **options):
+    """Verify several documents, looking up each citation they share only once
+
+    All documents are read and parsed first; references are identified by
+    normalized DOI or normalized title + year + first author (lookup_key).
+    The union is prefetched in one pass and a single SharedLookups serves
+    every document, so a work cited in many manuscripts costs one lookup. Each
+    document still gets its own reports (and state/checkpoint files) in
+    output_dir/<document name>/, and output_dir/batch_summary.csv lists the
+    per-document counts. Options are those of iter_verification; with
+    profile=True each document also gets PROFILE_FILE and PROFILE_CSV, and
+    with parquet=True a PARQUET_FILE.
+    Returns {word_file: (ReportStats, extraction_failures)}.
+    """
+    import pandas as pd
+    if output_dir is None:
+        output_dir = BATCH_OUTPUT_DIR
+    
+    detect_duplicates = options.pop('detect_duplicates', None)
+    if detect_duplicates is None:
+        detect_duplicates = DETECT_DUPLICATES
+    lookups = SharedLookups()
+    documents = []
+    for word_file in word_files:
+        references, parsed_references = load_references(word_file)
+        if parsed_references is None:
+            parsed_references = [parse_reference(ref_text) for ref_text in references]
+        lookups.count(parsed_references)
+        # Found once here, for the prefetch and for the document's own run
+        duplicate_of = (find_duplicate_references(parsed_references) if detect_duplicates
+                        else [None] * len(parsed_references))
+        documents.append((word_file, references, parsed_references, duplicate_of))
+    
+    print(f"Batch: {len(documents)} documents")
+    print(lookups.dedup_line())
+    if not (options.get('incremental') or options.get('resume')):
+        # With --incremental/--resume most references are reused, so each
+        # document prefetches only what it actually needs to look up
+        prefetch = []
+        for _, _, parsed_references, duplicate_of in documents:
+            prefetch.extend(parsed for parsed, first in zip(parsed_references, duplicate_of)
+                            if first is None)
+        lookups.prefetch(prefetch)
+    
+    outcomes = {}
+    used_names = set()
+    summary_rows = []
+    for word_file, references, parsed_references, duplicate_of in documents:
+        name = os.path.splitext(os.path.basename(word_file))[0]
+        base_name, n = name, 1
+        while name in used_names:
+            n += 1
+            name = f"{base_name}_{n}"
+        used_names.add(name)
+        doc_dir = os.path.join(output_dir, name)
+        os.makedirs(doc_dir, exist_ok=True)
         
-        needs_review_refs = df[df['Status'] == 'NEEDS_REVIEW']
-        if len(needs_review_refs) > 0:
-            for _, row in needs_review_refs.iterrows():
-                f.write(f"Reference #{row['Reference_Number']} ({row['Reference_Type']}):\n")
-                f.write(f"  {row['Original_Text'][:100]}...\n")
-                f.write(f"  Issues: {row['Issues_Detected']}\n")
-                f.write(f"  Match Score: {row['CrossRef_Match_Score']}\n")
-                f.write(f"  Title Similarity: {row['Title_Similarity']:.2f}\n")
-                if row['Extracted_Original_Year']:
-                    f.write(f"  Original Year: {row['Extracted_Original_Year']}\n")
-                f.write("\n")
+        print(f"\n{'='*70}\nDocument: {word_file} -> {doc_dir}\n{'='*70}")
+        doc_profile = RunProfile(word_file) if profile else None
+        stats, extraction_failures = run_verification(
+            word_file,
+            os.path.join(doc_dir, DOCUMENT_REPORT_FILE),
+            os.path.join(doc_dir, DOCUMENT_R_OUTPUT_FILE),
+            os.path.join(doc_dir, DOCUMENT_LOG),
+            parquet_file=os.path.join(doc_dir, PARQUET_FILE) if parquet else None,
+            state_file=os.path.join(doc_dir, STATE_FILE),
+            checkpoint_file=os.path.join(doc_dir, CHECKPOINT_FILE),
+            lookups=lookups, references=references, parsed_references=parsed_references,
+            detect_duplicates=detect_duplicates, duplicate_of=duplicate_of,
+            profile=doc_profile, **options)
+        export_extraction_failures(extraction_failures, os.path.join(doc_dir, EXTRACTION_FAILURES_LOG))
+        if doc_profile is not None:
+            doc_profile.write(os.path.join(doc_dir, PROFILE_FILE), os.path.join(doc_dir, PROFILE_CSV))
+        outcomes[word_file] = (stats, extraction_failures)
+        summary_rows.append({
+            'Document': word_file,
+            'Report_Folder': doc_dir,
+            'References': stats.total,
+            'Verified': stats.status_counts['VERIFIED'],
+            'Needs_Review': stats.status_counts['NEEDS_REVIEW'],
+            'Ancient_Texts': stats.status_counts['ANCIENT_TEXT'],
+            'Extraction_Failures': len(extraction_failures),
+        })
+    
+    summary_file = os.path.join(output_dir, 'batch_summary.csv')
+    os.makedirs(output_dir, exist_ok=True)
+    pd.DataFrame(summary_rows, columns=['Document', 'Report_Folder', 'References', 'Verified',
+                                        'Needs_Review', 'Ancient_Texts', 'Extraction_Failures']
+                 ).to_csv(summary_file, index=False)
+    print(f"\n✓ Batch summary saved to: {summary_file}")
+    print(lookups.dedup_line())
+    return outcomes
+
+# ============================================================================
+# RUN PROFILE (PER-STAGE TIMING)
+# ============================================================================
+
+# CSV columns of the per-reference profile; stage durations are in seconds
+PROFILE_COLUMNS = ['Reference_Number', 'Source', 'Extraction_s', 'CrossRef_s', 'PubMed_s',
+                   'Scoring_s', 'Total_s', 'Requests', 'Cache_Hits', 'Retries', 'Bytes',
+                   'Cache_Status']
+PROFILE_STAGE_COLUMNS = {'extraction': 'Extraction_s', 'crossref': 'CrossRef_s',
+                         'pubmed': 'PubMed_s', 'scoring': 'Scoring_s'}
+
+class ReferenceProfile:
+    """Stage durations (seconds), wall time and request counters of one reference"""
+    
+    __slots__ = ('idx', 'source', 'stages', 'requests', 'total')
+    
+    def __init__(self, idx):
+        self.idx = idx
+        self.source = 'verified'  # or 'reused' (state/checkpoint) or 'duplicate'
+        self.stages = {}
+        self.requests = RequestStats()
+        self.total = 0.0
+    
+    def row(self):
+        row = {'Reference_Number': self.idx, 'Source': self.source}
+        for stage, column in PROFILE_STAGE_COLUMNS.items():
+            row[column] = round(self.stages.get(stage, 0.0), 6)
+        row.update(Total_s=round(self.total, 6), Requests=self.requests.requests,
+                   Cache_Hits=self.requests.cache_hits, Retries=self.requests.retries,
+                   Bytes=self.requests.bytes, Cache_Status=self.requests.cache_status)
+        return row
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(math.ceil(fraction * len(ordered))) - 1))]
+
+class RunProfile:
+    """Where a run's time and requests went, filled in by iter_verification(profile=...)
+
+    Run stages ('read', 'parse', 'duplicates', 'prefetch', 'verify' and
+    'total') are wall-clock seconds; requests made by a stage rather than a
+    reference (the bulk DOI and PubMed pre-pass) are counted under that
+    stage. Each reference gets a ReferenceProfile: extraction, CrossRef,
+    PubMed and scoring times, and a total that is its wall time from parsing
+    to result (on concurrent runs this includes waiting for the rate
+    limiter). Profiling adds a few clock reads per reference; runs without
+    a profile skip it entirely.
+    """
+    
+    def __init__(self, label=''):
+        self.label = label
+        self.stages = {}
+        self.stage_requests = {}
+        self.references = {}
+        self._lock = threading.Lock()
+    
+    def reference(self, idx):
+        """The ReferenceProfile of reference idx (created on first use)"""
+        with self._lock:
+            record = self.references.get(idx)
+            if record is None:
+                record = self.references[idx] = ReferenceProfile(idx)
+            return record
+    
+    @contextmanager
+    def stage(self, name):
+        """Time a run stage and count the requests this thread makes during it"""
+        stats = self.stage_requests.setdefault(name, RequestStats())
+        started = time.perf_counter()
+        try:
+            with track_requests(stats):
+                yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+    
+    def request_totals(self):
+        totals = RequestStats()
+        for stats in self.stage_requests.values():
+            totals.add(stats)
+        for record in self.references.values():
+            totals.add(record.requests)
+        return totals
+    
+    def rows(self):
+        return [self.references[idx].row() for idx in sorted(self.references)]
+    
+    def summary(self):
+        """Run-level figures: stage times, reference counts, latency percentiles, request totals"""
+        verified = [record.total for record in self.references.values() if record.source == 'verified']
+        sources = Counter(record.source for record in self.references.values())
+        return {
+            'label': self.label,
+            'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'stages_s': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'references': {'total': len(self.references), 'verified': sources['verified'],
+                           'reused': sources['reused'], 'duplicate': sources['duplicate']},
+            'reference_latency_s': {'p50': round(percentile(verified, 0.50), 6),
+                                    'p95': round(percentile(verified, 0.95), 6),
+                                    'max': round(max(verified, default=0.0), 6)},
+            'requests': self.request_totals().as_dict(),
+            'stage_requests': {name: stats.as_dict() for name, stats in self.stage_requests.items()},
+        }
+    
+    def write(self, json_file, csv_file=None):
+        """Save summary() plus per-reference rows as JSON, and the rows as CSV"""
+        rows = self.rows()
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(), 'references': rows}, f, indent=1)
+        if csv_file:
+            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=PROFILE_COLUMNS, lineterminator=os.linesep)
+                writer.writeheader()
+                writer.writerows(rows)
+    
+    def report_lines(self, top=None):
+        """Console summary: stage times, request totals and the top slowest references"""
+        if top is None:
+            top = PROFILE_TOP
+        summary = self.summary()
+        requests_made = summary['requests']
+        latency = summary['reference_latency_s']
+        lines = ["RUN PROFILE:",
+                 "  Stages: " + ", ".join(f"{name} {seconds:.2f}s"
+                                          for name, seconds in summary['stages_s'].items()),
+                 f"  Requests: {requests_made['requests']} ({requests_made['cache_hits']} from cache, "
+                 f"{requests_made['retries']} retries, {requests_made['bytes'] / 1024:.1f} KiB)",
+                 f"  Per-reference latency: p50 {latency['p50'] * 1e3:.1f} ms, "
+                 f"p95 {latency['p95'] * 1e3:.1f} ms, max {latency['max'] * 1e3:.1f} ms"]
+        slowest = sorted((record for record in self.references.values() if record.source == 'verified'),
+                         key=lambda record: -record.total)[:top]
+        if slowest:
+            lines.append(f"  Slowest {len(slowest)} references (seconds):")
+            lines.append(f"  {'#':>6} {'Total':>8} {'Extract':>8} {'CrossRef':>8} {'PubMed':>8} "
+                         f"{'Score':>8} {'Req':>4} {'Retry':>5} {'KiB':>7}  Cache")
+            for record in slowest:
+                stages = record.stages
+                lines.append(f"  {record.idx:>6} {record.total:8.3f} {stages.get('extraction', 0):8.3f} "
+                             f"{stages.get('crossref', 0):8.3f} {stages.get('pubmed', 0):8.3f} "
+                             f"{stages.get('scoring', 0):8.3f} {record.requests.requests:>4} "
+                             f"{record.requests.retries:>5} {record.requests.bytes / 1024:7.1f}  "
+                             f"{record.requests.cache_status}")
+        return lines
+
+def profile_stage(profile, name):
+    """profile.stage(name), or a no-op context when profiling is off"""
+    return profile.stage(name) if profile is not None else nullcontext()
+
+@contextmanager
+def hot_path_profiler(cprofile_file=None, trace_memory=False, top=20):
+    """Optional cProfile / tracemalloc around a block; free when both are off
+
+    cProfile stats are dumped to cprofile_file (for pstats or snakeviz) and
+    the top functions by cumulative time are printed. cProfile only follows
+    the calling thread, so profile with --workers 1 to see the whole hot
+    path. tracemalloc prints the peak traced memory and the top allocation
+    sites. Both modules are imported only when requested.
+    """
+    if not cprofile_file and not trace_memory:
+        yield
+        return
+    profiler = None
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if cprofile_file:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile_file)
+            import pstats
+            print(f"\ncProfile: stats saved to {cprofile_file}; top {top} by cumulative time:")
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(top)
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            print(f"\ntracemalloc: peak traced memory {peak / 2**20:.1f} MiB; top {top} allocation sites:")
+            for stat in snapshot.statistics('lineno')[:top]:
+                print(f"  {stat}")
+
+# ============================================================================
+# GENERATE REPORTS
+# ============================================================================
+
+def _present(value):
+    """True for a filled-in cell: not None/NaN and not an empty string"""
+    return value is not None and value == value and value != ''
+
+def _csv_value(value):
+    """Cell as pandas.to_csv writes it: None and NaN become empty"""
+    return '' if value is None or value != value else value
+
+def _present_mask(values):
+    """Vectorized _present for a Series"""
+    return values.notna() & values.ne('')
+
+def confidence_level(score):
+    """Match-score band used in the R export"""
+    return ('Excellent' if score >= 90 else
+            'Good' if score >= 75 else
+            'Fair' if score >= 50 else 'Poor')
+
+def r_export_row(result):
+    """The R export's extra columns (boolean flags, confidence, priority) for one result"""
+    needs_review = result['Status'] == 'NEEDS_REVIEW'
+    score = result['CrossRef_Match_Score']
+    return {
+        'Needs_Manual_Check': needs_review,
+        'Has_DOI': _present(result['Extracted_DOI']),
+        'High_Confidence': score >= 75 and result['Title_Similarity'] >= TITLE_SIMILARITY_HIGH,
+        'Is_Book': result['Reference_Type'] == 'book',
+        'Is_Ancient': result['Reference_Type'] == 'ancient_text',
+        'Is_Translation_or_Classic': _present(result['Extracted_Original_Year']),
+        'Confidence_Level': confidence_level(score),
+        'Review_Priority': ('HIGH' if needs_review and score < 50
+                            else 'MEDIUM' if needs_review else 'LOW'),
+    }
+
+def r_export_columns(df):
+    """r_export_row for a whole results DataFrame, in one vectorized pass"""
+    import numpy as np
+    import pandas as pd
+    needs_review = df['Status'].eq('NEEDS_REVIEW')
+    score = df['CrossRef_Match_Score'].astype(float)
+    return pd.DataFrame({
+        'Needs_Manual_Check': needs_review,
+        'Has_DOI': _present_mask(df['Extracted_DOI']),
+        'High_Confidence': (score >= 75) & (df['Title_Similarity'].astype(float) >= TITLE_SIMILARITY_HIGH),
+        'Is_Book': df['Reference_Type'].eq('book'),
+        'Is_Ancient': df['Reference_Type'].eq('ancient_text'),
+        'Is_Translation_or_Classic': _present_mask(df['Extracted_Original_Year']),
+        'Confidence_Level': np.select([score >= 90, score >= 75, score >= 50],
+                                      ['Excellent', 'Good', 'Fair'], 'Poor'),
+        'Review_Priority': np.select([needs_review & (score < 50), needs_review], ['HIGH', 'MEDIUM'], 'LOW'),
+    }, index=df.index)
+
+def r_column_name(column):
+    """R-friendly column name (no spaces, no '#')"""
+    return column.replace(' ', '_').replace('#', 'Num')
+
+# Arrow types of the Parquet columns that are not strings
+PARQUET_COLUMN_TYPES = {
+    'Reference_Number': 'int64', 'CrossRef_Found': 'bool', 'Title_Similarity': 'float64',
+    'CrossRef_Match_Score': 'int64', 'CrossRef_Candidates': 'int64', 'Runner_Up_Margin': 'float64',
+    'PubMed_Found': 'bool', 'Needs_Manual_Check': 'bool', 'Has_DOI': 'bool', 'High_Confidence': 'bool',
+    'Is_Book': 'bool', 'Is_Ancient': 'bool', 'Is_Translation_or_Classic': 'bool',
+}
+
+def report_arrow_table(df):
+    """Results DataFrame plus r_export_columns as a pyarrow Table with typed columns"""
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    
+    df = pd.concat([df, r_export_columns(df)], axis=1)
+    fields, arrays = [], []
+    for column in df.columns:
+        arrow_type = pa.type_for_alias(PARQUET_COLUMN_TYPES.get(column, 'string'))
+        values = df[column]
+        present = _present_mask(values)
+        if pa.types.is_string(arrow_type):
+            values = values.where(present, None).map(str, na_action='ignore')
+        elif pa.types.is_boolean(arrow_type):
+            values = values.where(present, False).astype(bool)
         else:
-            f.write("None - all references verified!\n\n")
+            values = pd.to_numeric(values.where(present, np.nan))
+        fields.append(pa.field(column, arrow_type))
+        arrays.append(pa.array(values, type=arrow_type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+def export_parquet(df, filename):
+    """Export a results DataFrame (with the R columns) as one Parquet file"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Parquet output needs pyarrow: pip install pyarrow')
+    pq.write_table(report_arrow_table(df), filename)
+    print(f"✓ Parquet file saved to: {filename}")
+
+class ParquetReportWriter:
+    """Append result rows to a Parquet file, one row group per PARQUET_ROW_GROUP_SIZE rows
+
+    Each group is converted in one vectorized pass (report_arrow_table);
+    the schema is fixed by the first group.
+    """
+    
+    def __init__(self, filename, columns=None, row_group_size=None):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError('Parquet output needs pyarrow: pip install pyarrow')
+        self._pq = pq
+        self.filename = filename
+        self._columns = columns
+        self._row_group_size = row_group_size or PARQUET_ROW_GROUP_SIZE
+        self._rows = []
+        self._writer = None
+    
+    def write(self, result):
+        if self._columns is None:
+            self._columns = list(result)
+        self._rows.append(result)
+        if len(self._rows) >= self._row_group_size:
+            self.flush()
+    
+    def flush(self):
+        import pandas as pd
+        if not self._rows:
+            return
+        table = report_arrow_table(pd.DataFrame(self._rows, columns=self._columns))
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.filename, table.schema)
+        self._writer.write_table(table)
+        self._rows = []
+    
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+
+class ReportWriter:
+    """Write result rows to the detailed CSV and the R CSV as they arrive
+
+    Output matches what DataFrame.to_csv produced for the same rows; the
+    header is taken from the first result. With parquet_file the rows also
+    go to a ParquetReportWriter.
+    """
+    
+    def __init__(self, output_file, r_output_file=None, parquet_file=None):
+        self._parquet = ParquetReportWriter(parquet_file) if parquet_file else None
+        self._files = []
+        self._report = self._open(output_file)
+        self._r_report = self._open(r_output_file) if r_output_file else None
+        self._columns = None
+    
+    def _open(self, filename):
+        f = open(filename, 'w', encoding='utf-8', newline='')
+        self._files.append(f)
+        return csv.writer(f, lineterminator=os.linesep)
+    
+    def write(self, result):
+        extra = r_export_row(result) if self._r_report else None
+        if self._columns is None:
+            self._columns = list(result)
+            self._report.writerow(self._columns)
+            if self._r_report:
+                self._r_report.writerow([r_column_name(c) for c in self._columns] + list(extra))
+        row = [_csv_value(result.get(column)) for column in self._columns]
+        self._report.writerow(row)
+        if self._r_report:
+            self._r_report.writerow(row + list(extra.values()))
+        if self._parquet:
+            self._parquet.write(result)
+    
+    def close(self):
+        for f in self._files:
+            f.close()
+        if self._parquet:
+            self._parquet.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ReportStats:
+    """Running aggregates behind the summary log, updated one result at a time"""
+    
+    def __init__(self):
+        self.total = 0
+        self.status_counts = Counter()
+        self.type_counts = Counter()
+        self.status_by_type = Counter()
+        self.with_doi = 0
+        self.with_original_year = 0
+        self.crossref_found = 0
+        self.high_similarity = 0
+        self.needs_review = []
+    
+    def add(self, result):
+        self.total += 1
+        ref_type, status = result['Reference_Type'], result['Status']
+        self.status_counts[status] += 1
+        self.type_counts[ref_type] += 1
+        self.status_by_type[(ref_type, status)] += 1
+        self.with_doi += _present(result['Extracted_DOI'])
+        self.with_original_year += _present(result['Extracted_Original_Year'])
+        self.crossref_found += result['CrossRef_Found'] == True
+        self.high_similarity += result['Title_Similarity'] >= TITLE_SIMILARITY_HIGH
+        if status == 'NEEDS_REVIEW':
+            # Keep only what the review section prints, not the whole row
+            self.needs_review.append((
+                result['Reference_Number'], ref_type, result['Original_Text'][:100],
+                result['Issues_Detected'], result['CrossRef_Match_Score'],
+                result['Title_Similarity'], result['Extracted_Original_Year'],
+            ))
+    
+    @classmethod
+    def from_results(cls, results):
+        stats = cls()
+        for result in results:
+            stats.add(result)
+        return stats
+    
+    @classmethod
+    def from_frame(cls, df):
+        """Same totals as from_results for a whole results DataFrame, from one groupby"""
+        stats = cls()
+        stats.total = len(df)
+        # sort=False keeps first-appearance order, as the Counters of add() do
+        pairs = df.groupby(['Reference_Type', 'Status'], sort=False).size()
+        stats.status_by_type = Counter({key: int(n) for key, n in pairs.items()})
+        stats.status_counts = Counter({key: int(n) for key, n in
+                                       pairs.groupby(level='Status', sort=False).sum().items()})
+        stats.type_counts = Counter({key: int(n) for key, n in
+                                     pairs.groupby(level='Reference_Type', sort=False).sum().items()})
+        stats.with_doi = int(_present_mask(df['Extracted_DOI']).sum())
+        stats.with_original_year = int(_present_mask(df['Extracted_Original_Year']).sum())
+        stats.crossref_found = int(df['CrossRef_Found'].eq(True).sum())
+        stats.high_similarity = int((df['Title_Similarity'].astype(float) >= TITLE_SIMILARITY_HIGH).sum())
+        review = df[df['Status'].eq('NEEDS_REVIEW')]
+        review = review.assign(Original_Text=review['Original_Text'].str[:100])
+        stats.needs_review = list(zip(*(review[column].tolist() for column in (
+            'Reference_Number', 'Reference_Type', 'Original_Text', 'Issues_Detected',
+            'CrossRef_Match_Score', 'Title_Similarity', 'Extracted_Original_Year'))))
+        return stats
+    
+    def type_counts_table(self):
+        """Reference types by frequency (same order as Series.value_counts)"""
+        import pandas as pd
+        return pd.Series(self.type_counts, dtype='int64').sort_values(ascending=False).to_dict()
+    
+    def status_by_type_table(self):
+        """Reference_Type x Status counts, laid out like pd.crosstab"""
+        import pandas as pd
+        table = pd.Series(self.status_by_type, dtype='int64').unstack(fill_value=0)
+        table = table.sort_index().sort_index(axis=1)
+        table.index.name = 'Reference_Type'
+        table.columns.name = 'Status'
+        return table
+    
+    def summary_lines(self):
+        """The log's OVERALL STATISTICS, REFERENCE TYPES and status-by-type sections, as lines"""
+        total = self.total
+        share = total or 1  # an empty run shows 0.0% everywhere
+        verified = self.status_counts['VERIFIED']
+        needs_review = self.status_counts['NEEDS_REVIEW']
+        ancient = self.status_counts['ANCIENT_TEXT']
+        with_doi = self.with_doi
+        with_original_year = self.with_original_year
+        crossref_found = self.crossref_found
+        high_similarity = self.high_similarity
+        type_counts = self.type_counts_table()
+        status_by_type = self.status_by_type_table()
         
-        f.write("="*70 + "\n")
-        f.write("QUICK DECISION RULES:\n")
-        f.write("="*70 + "\n")
-        f.write("If YEAR_MISMATCH ≤ 2 years AND title similarity > 0.75: Likely OK\n")
-        f.write("If NOT_FOUND_IN_DATABASES but has DOI: Verify DOI is correct\n")
-        f.write("If LOW_MATCH_CONFIDENCE but Is_Book=TRUE: Expected (lower thresholds for books)\n")
-        f.write("If CLASSIC_EDITION: Check that original year aligns with content cited\n")
+        lines = [
+            "OVERALL STATISTICS:",
+            "-"*70,
+            f"Total references checked: {total}",
+            f"✓ Verified: {verified} ({verified/share*100:.1f}%)",
+            f"⚠  Needs review: {needs_review} ({needs_review/share*100:.1f}%)",
+            f"⌛ Ancient texts (skipped): {ancient} ({ancient/share*100:.1f}%)",
+            f"References with DOI: {with_doi} ({with_doi/share*100:.1f}%)",
+            f"Classics/translations (original year): {with_original_year} ({with_original_year/share*100:.1f}%)",
+            f"Found in CrossRef: {crossref_found} ({crossref_found/share*100:.1f}%)",
+            f"High title similarity (≥{TITLE_SIMILARITY_HIGH}): {high_similarity} ({high_similarity/share*100:.1f}%)",
+            "",
+            "REFERENCE TYPES:",
+            "-"*70,
+        ]
+        for ref_type, count in type_counts.items():
+            lines.append(f"  {ref_type}: {count} ({count/share*100:.1f}%)")
+        lines += ["", "VERIFICATION STATUS BY REFERENCE TYPE:", "-"*70, status_by_type.to_string()]
+        return lines
+    
+    def write_log(self, log_file):
+        """Write the human-readable summary log"""
+        # Write summary log
+        with open(log_file, 'w', encoding='utf-8') as f:
+            f.write("BIBLIOGRAPHY VERIFICATION SUMMARY\n")
+            f.write("="*70 + "\n")
+            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write("="*70 + "\n\n")
+            
+            f.write("\n".join(self.summary_lines()))
+            f.write("\n\n")
+            
+            f.write("MATCH SCORE INTERPRETATION FOR PEER REVIEW:\n")
+            f.write("-"*70 + "\n")
+            f.write("  90-100: Excellent - Safe to publish as-is\n")
+            f.write("  75-89:  Good - Verify DOI/year before publishing\n")
+            f.write("  50-74:  Fair - Requires manual verification\n")
+            f.write("  <50:    Poor - Do not use without manual verification\n\n")
+            
+            f.write("YEAR MATCHING POLICY:\n")
+            f.write("-"*70 + "\n")
+            f.write(f"  Modern sources: ±{ALLOW_YEAR_DIFFERENCE} years allowed (early online vs print)\n")
+            f.write(f"  Classics/translations: Original year tracked separately\n")
+            f.write(f"  Ancient texts: <{ANCIENT_TEXT_CUTOFF} (verification skipped)\n\n")
+            
+            f.write("="*70 + "\n")
+            f.write("REFERENCES NEEDING REVIEW:\n")
+            f.write("="*70 + "\n\n")
+            
+            if self.needs_review:
+                for number, ref_type, text, issues, score, similarity, original_year in self.needs_review:
+                    f.write(f"Reference #{number} ({ref_type}):\n")
+                    f.write(f"  {text}...\n")
+                    f.write(f"  Issues: {issues}\n")
+                    f.write(f"  Match Score: {score}\n")
+                    f.write(f"  Title Similarity: {similarity:.2f}\n")
+                    if _present(original_year):
+                        f.write(f"  Original Year: {original_year}\n")
+                    f.write("\n")
+            else:
+                f.write("None - all references verified!\n\n")
+            
+            f.write("="*70 + "\n")
+            f.write("QUICK DECISION RULES:\n")
+            f.write("="*70 + "\n")
+            f.write("If YEAR_MISMATCH ≤ 2 years AND title similarity > 0.75: Likely OK\n")
+            f.write("If NOT_FOUND_IN_DATABASES but has DOI: Verify DOI is correct\n")
+            f.write("If LOW_MATCH_CONFIDENCE but Is_Book=TRUE: Expected (lower thresholds for books)\n")
+            f.write("If CLASSIC_EDITION: Check that original year aligns with content cited\n")
+
+def generate_report(df, output_file, log_file, extraction_failures_file):
+    """Generate comprehensive verification reports from a results DataFrame"""
     
+    # Save detailed CSV
+    df.to_csv(output_file, index=False)
+    print(f"\n✓ Detailed report saved to: {output_file}")
+    
+    ReportStats.from_frame(df).write_log(log_file)
     print(f"✓ Summary log saved to: {log_file}")
 
 def export_for_r(df, filename):
     """Export with R-friendly column names and format"""
-    df_r = df.copy()
-    
-    # Convert to R-friendly column names (no spaces, underscores)
-    df_r.columns = (df_r.columns
-                    .str.replace(' ', '_', regex=False)
-                    .str.replace('#', 'Num', regex=False))
-    
-    # Add simple boolean columns for R filtering
-    df_r['Needs_Manual_Check'] = df_r['Status'] == 'NEEDS_REVIEW'
-    df_r['Has_DOI'] = df_r['Extracted_DOI'].notna() & (df_r['Extracted_DOI'] != '')
-    df_r['High_Confidence'] = (df_r['CrossRef_Match_Score'] >= 75) & (df_r['Title_Similarity'] >= TITLE_SIMILARITY_HIGH)
-    df_r['Is_Book'] = df_r['Reference_Type'] == 'book'
-    df_r['Is_Ancient'] = df_r['Reference_Type'] == 'ancient_text'
-    df_r['Is_Translation_or_Classic'] = df_r['Extracted_Original_Year'].notna() & (df_r['Extracted_Original_Year'] != '')
-    
-    # Confidence level categories
-    df_r['Confidence_Level'] = df_r['CrossRef_Match_Score'].apply(
-        lambda x: 'Excellent' if x >= 90 else 
-                  'Good' if x >= 75 else
-                  'Fair' if x >= 50 else 'Poor'
-    )
-    
-    # Review priority
-    df_r['Review_Priority'] = df_r.apply(lambda row: 
-        'HIGH' if row['Status'] == 'NEEDS_REVIEW' and row['CrossRef_Match_Score'] < 50 
-        else 'MEDIUM' if row['Status'] == 'NEEDS_REVIEW' 
-        else 'LOW', axis=1)
-    
-    df_r.to_csv(filename, index=False)
+    import pandas as pd
+    r_df = pd.concat([df.rename(columns=r_column_name), r_export_columns(df)], axis=1)
+    r_df.to_csv(filename, index=False)
     print(f"✓ R-compatible file saved to: {filename}")
 
 def export_extraction_failures(extraction_failures, filename):
@@ -699,11 +4473,697 @@ def export_extraction_failures(extraction_failures, filename):
     
     print(f"✓ Extraction failures logged to: {filename}")
 
+def export_extracted_references(input_path, filename):
+    """--extract-only: write each reference's extracted fields to a CSV, without any lookups
+
+    Streams rows with the csv module, so neither pandas nor requests is
+    loaded. Returns (number of references, {Reference_Number: extraction_failure}).
+    """
+    references, parsed_references = load_references(input_path)
+    if parsed_references is None:
+        parsed_references = map(parse_reference, references)
+    extraction_failures = {}
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(['Reference_Number', 'Original_Text'] + EXTRACTED_COLUMNS)
+        for idx, (ref_text, parsed) in enumerate(zip(references, parsed_references), 1):
+            ref_type, doi, year, original_year, first_author, all_authors, title = parsed
+            writer.writerow([idx, ref_text, ref_type, first_author,
+                             ', '.join(all_authors) if all_authors else '',
+                             year, original_year, title, doi])
+            note = extraction_failure_note(parsed)
+            if note:
+                extraction_failures[idx] = note
+    print(f"✓ {len(references)} references extracted to: {filename}")
+    return len(references), extraction_failures
+
+# ============================================================================
+# VERIFICATION SERVICE (HTTP/JSON)
+# ============================================================================
+
+# Report files a finished job serves, with their content types
+SERVICE_REPORT_TYPES = {
+    DOCUMENT_REPORT_FILE: 'text/csv; charset=utf-8',
+    DOCUMENT_R_OUTPUT_FILE: 'text/csv; charset=utf-8',
+    DOCUMENT_LOG: 'text/plain; charset=utf-8',
+    EXTRACTION_FAILURES_LOG: 'text/plain; charset=utf-8',
+    PARQUET_FILE: 'application/vnd.apache.parquet',
+}
+
+class ServiceError(Exception):
+    """A request the service turns down, with the HTTP status to answer"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class VerificationJob:
+    """One submitted bibliography: its input, report folder, progress and outcome"""
+    
+    def __init__(self, job_id, client, job_dir, input_file, references=None):
+        self.id = job_id
+        self.client = client
+        self.dir = job_dir
+        self.input_file = input_file
+        self.references = references  # reference strings posted as JSON (no input file)
+        self.status = 'queued'  # then 'running', then 'done' or 'failed'
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.stats = None
+        self.extraction_failures = None
+        self.results = None
+        self.error = None
+        self.finished_event = threading.Event()
+    
+    def report_files(self):
+        """Report files of a finished job, by name"""
+        if self.status != 'done':
+            return []
+        return [name for name in SERVICE_REPORT_TYPES if os.path.isfile(os.path.join(self.dir, name))]
+    
+    def as_dict(self, position=None, results=False):
+        """JSON description: status and timings, then the summary and report links once done"""
+        def stamp(t):
+            return datetime.fromtimestamp(t).isoformat(timespec='seconds') if t else None
+        info = {'job': self.id, 'client': self.client, 'status': self.status,
+                'submitted': stamp(self.submitted), 'started': stamp(self.started),
+                'finished': stamp(self.finished)}
+        if position is not None:
+            info['queue_position'] = position
+        if self.started:
+            info['wait_s'] = round(self.started - self.submitted, 3)
+        if self.finished and self.started:
+            info['run_s'] = round(self.finished - self.started, 3)
+        if self.error:
+            info['error'] = self.error
+        if self.stats is not None:
+            info['summary'] = {'references': self.stats.total,
+                               'verified': self.stats.status_counts['VERIFIED'],
+                               'needs_review': self.stats.status_counts['NEEDS_REVIEW'],
+                               'ancient_texts': self.stats.status_counts['ANCIENT_TEXT'],
+                               'extraction_failures': len(self.extraction_failures)}
+            info['files'] = {name: f"/jobs/{self.id}/{name}" for name in self.report_files()}
+        if results and self.results is not None:
+            info['results'] = self.results
+        return info
+
+class FairJobQueue:
+    """Jobs waiting to run, served round-robin across clients
+
+    Every client has its own first-in first-out queue, and get() takes the
+    next job of the client served least recently (a client new to the queue
+    comes first). One client submitting a whole journal issue therefore
+    does not hold back the manuscripts of the others. A client may have at
+    most max_per_client jobs waiting.
+    """
+    
+    def __init__(self, max_per_client=None):
+        self.max_per_client = max_per_client or SERVICE_MAX_QUEUED_PER_CLIENT
+        self._queues = {}  # client -> deque of waiting jobs, in order of arrival
+        self._served = {}  # client -> turn on which it was last served
+        self._turn = 0
+        self._condition = threading.Condition()
+        self._closed = False
+    
+    @staticmethod
+    def _next_client(waiting, served):
+        return min((client for client, count in waiting.items() if count),
+                   key=lambda client: served.get(client, 0))
+    
+    def put(self, job):
+        with self._condition:
+            if self._closed:
+                raise ServiceError(503, "The service is shutting down")
+            queue = self._queues.setdefault(job.client, deque())
+            if len(queue) >= self.max_per_client:
+                raise ServiceError(429, f"Client '{job.client}' already has {len(queue)} jobs waiting")
+            queue.append(job)
+            self._condition.notify()
+    
+    def get(self):
+        """Next job (blocks until there is one); None once the queue is closed"""
+        with self._condition:
+            while not self._queues and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+            client = self._next_client({c: len(q) for c, q in self._queues.items()}, self._served)
+            queue = self._queues[client]
+            job = queue.popleft()
+            self._turn += 1
+            if queue:
+                self._served[client] = self._turn
+            else:
+                del self._queues[client]
+                self._served.pop(client, None)
+            return job
+    
+    def position(self, job):
+        """Jobs that will start before this one (None if it is not waiting)"""
+        with self._condition:
+            queue = self._queues.get(job.client)
+            if queue is None or job not in queue:
+                return None
+            index = queue.index(job)
+            waiting = {client: len(q) for client, q in self._queues.items()}
+            served = dict(self._served)
+            turn = self._turn
+            ahead = 0
+            # Replay get() until it reaches the job
+            while True:
+                client = self._next_client(waiting, served)
+                if client == job.client:
+                    if index == 0:
+                        return ahead
+                    index -= 1
+                waiting[client] -= 1
+                turn += 1
+                served[client] = turn
+                ahead += 1
+    
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+    
+    def __len__(self):
+        with self._condition:
+            return sum(len(queue) for queue in self._queues.values())
+
+class VerificationService:
+    """Job queue and warm verification state behind the HTTP API (--serve)
+
+    Jobs run on job_workers threads in this process, so the HTTP session's
+    keep-alive connections, the response cache, the transport, the lookup
+    memo (one SharedLookups for every job, started afresh past
+    SERVICE_LOOKUP_MEMO_SIZE entries) and, with processes > 1, the process
+    pool stay warm from one job to the next. Each job writes the usual
+    reports to service_dir/<job id>/; beyond SERVICE_KEEP_JOBS finished
+    jobs, the oldest are removed with their folders.
+    """
+    
+    def __init__(self, service_dir=None, job_workers=None, max_workers=None, processes=None,
+                 detect_duplicates=None, parquet=False):
+        self.dir = service_dir or SERVICE_DIR
+        self.job_workers = job_workers or SERVICE_JOB_WORKERS
+        self.options = {'max_workers': max_workers or MAX_WORKERS, 'detect_duplicates': detect_duplicates}
+        self.parquet = parquet
+        self.jobs = {}  # id -> VerificationJob, oldest first
+        self.queue = FairJobQueue()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._lookups = SharedLookups()
+        os.makedirs(self.dir, exist_ok=True)
+        
+        # Warm up once: worker processes are forked before any thread starts
+        self.processes = PROCESS_WORKERS if processes is None else processes
+        self.process_pool = None
+        if self.processes > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            self.process_pool = ProcessPoolExecutor(max_workers=self.processes)
+            list(self.process_pool.map(abs, range(self.processes)))
+        configure_session(pool_size=self.job_workers * self.options['max_workers'])
+        get_response_cache()
+        get_transport()
+        self._threads = [threading.Thread(target=self._work, name=f"service-job-{n}", daemon=True)
+                         for n in range(self.job_workers)]
+        for thread in self._threads:
+            thread.start()
+    
+    def submit(self, client, references=None, data=None, filename=None):
+        """Queue a job for a list of reference strings, or for file contents (data) named filename"""
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.dir, job_id)
+        if references is not None:
+            input_file = f"job {job_id} ({len(references)} posted references)"
+        else:
+            extension = input_format(filename)
+            if extension not in INPUT_READERS:
+                raise ServiceError(415, f"Unsupported input format '{extension}' "
+                                        f"(use {', '.join(INPUT_READERS)})")
+            input_file = os.path.join(job_dir, 'input' + extension +
+                                      ('.gz' if filename.lower().endswith('.gz') else ''))
+        job = VerificationJob(job_id, client, job_dir, input_file, references)
+        os.makedirs(job_dir)
+        if data is not None:
+            with open(input_file, 'wb') as f:
+                f.write(data)
+        with self._lock:
+            self.jobs[job_id] = job
+        try:
+            self.queue.put(job)
+        except ServiceError:
+            with self._lock:
+                del self.jobs[job_id]
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return job
+    
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            self._run(job)
+    
+    def _run(self, job):
+        job.status = 'running'
+        job.started = time.time()
+        results = []
+        try:
+            with self._lock:
+                if len(self._lookups) > SERVICE_LOOKUP_MEMO_SIZE:
+                    self._lookups = SharedLookups()
+                lookups = self._lookups
+            job.stats, job.extraction_failures = run_verification(
+                job.input_file,
+                os.path.join(job.dir, DOCUMENT_REPORT_FILE),
+                os.path.join(job.dir, DOCUMENT_R_OUTPUT_FILE),
+                os.path.join(job.dir, DOCUMENT_LOG),
+                parquet_file=os.path.join(job.dir, PARQUET_FILE) if self.parquet else None,
+                results=results, references=job.references,
+                state_file=os.path.join(job.dir, STATE_FILE),
+                checkpoint_file=os.path.join(job.dir, CHECKPOINT_FILE),
+                lookups=lookups, process_pool=self.process_pool, processes=self.processes,
+                **self.options)
+            export_extraction_failures(job.extraction_failures,
+                                       os.path.join(job.dir, EXTRACTION_FAILURES_LOG))
+            job.results = results
+            job.status = 'done'
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = 'failed'
+            print(f"✗ Job {job.id} failed: {job.error}")
+        finally:
+            job.finished = time.time()
+            job.finished_event.set()
+            self._expire()
+    
+    def _expire(self):
+        """Drop the oldest finished jobs beyond SERVICE_KEEP_JOBS"""
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job.finished_event.is_set()]
+            expired = finished[:max(0, len(finished) - SERVICE_KEEP_JOBS)]
+            for job in expired:
+                del self.jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.dir, ignore_errors=True)
+    
+    def job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def list_jobs(self):
+        with self._lock:
+            return list(self.jobs.values())
+    
+    def describe(self, job, results=False):
+        return job.as_dict(position=self.queue.position(job), results=results)
+    
+    def delete(self, job):
+        """Remove a finished job and its files"""
+        if not job.finished_event.is_set():
+            raise ServiceError(409, f"Job {job.id} is {job.status}")
+        with self._lock:
+            self.jobs.pop(job.id, None)
+        shutil.rmtree(job.dir, ignore_errors=True)
+    
+    def health(self):
+        with self._lock:
+            statuses = Counter(job.status for job in self.jobs.values())
+            memo = len(self._lookups)
+        return {'status': 'ok', 'uptime_s': round(time.time() - self.started, 1),
+                'job_workers': self.job_workers, 'queued': len(self.queue),
+                'running': statuses['running'], 'done': statuses['done'], 'failed': statuses['failed'],
+                'lookup_memo': memo,
+                'cache': response_cache.stats_line() if response_cache is not None else None}
+    
+    def close(self):
+        """Stop taking jobs, let running ones finish, and shut the process pool down"""
+        self.queue.close()
+        for thread in self._threads:
+            thread.join()
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+
+def _multipart_file(content_type, body):
+    """(filename, contents) of the first file in a multipart/form-data body"""
+    from email import policy as email_policy
+    from email.parser import BytesParser
+    message = BytesParser(policy=email_policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+    if message.is_multipart():
+        for part in message.iter_parts():
+            if part.get_filename():
+                return part.get_filename(), part.get_payload(decode=True)
+    raise ServiceError(400, "No file found in the multipart upload")
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/JSON front end of the VerificationService in the class attribute service
+
+    POST   /jobs              submit a bibliography: a JSON body {"references": [...]},
+                              a multipart form with a file, or the raw file
+                              (?filename=paper.bib, default .docx); ?wait=1 answers
+                              once the job has finished, with its results
+    GET    /jobs              every job, without results
+    GET    /jobs/<id>         status, summary, report links and (when done) result rows
+    GET    /jobs/<id>/<file>  one of the job's reports (CSV, log, Parquet)
+    DELETE /jobs/<id>         remove a finished job and its files
+    GET    /health            queue length, job counts and cache statistics
+
+    Jobs belong to the client named in the X-Client-Id header (or ?client=),
+    else to the caller's address; the queue takes clients in turn.
+    """
+    
+    protocol_version = 'HTTP/1.1'
+    server_version = 'BibliographyVerifier/1.0'
+    service = None
+    
+    def do_GET(self):
+        self._dispatch('GET')
+    
+    def do_POST(self):
+        self._dispatch('POST')
+    
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+    
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        try:
+            body = self._read_body() if method == 'POST' else b''
+            if parts == ['health'] and method == 'GET':
+                self._send_json(200, self.service.health())
+            elif parts == ['jobs'] and method == 'POST':
+                self._submit(params, body)
+            elif parts == ['jobs'] and method == 'GET':
+                self._send_json(200, {'jobs': [self.service.describe(job) for job in self.service.list_jobs()]})
+            elif len(parts) in (2, 3) and parts[0] == 'jobs':
+                job = self.service.job(parts[1])
+                if job is None:
+                    raise ServiceError(404, f"No job {parts[1]}")
+                if len(parts) == 3 and method == 'GET':
+                    self._send_report(job, parts[2])
+                elif method == 'GET':
+                    self._send_json(200, self.service.describe(job, results=params.get('results') != '0'))
+                elif method == 'DELETE':
+                    self.service.delete(job)
+                    self._send_json(200, {'job': job.id, 'deleted': True})
+                else:
+                    raise ServiceError(405, f"{method} is not supported on {url.path}")
+            else:
+                raise ServiceError(404, f"Unknown endpoint {method} {url.path}")
+        except ServiceError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+    
+    def _read_body(self):
+        if 'chunked' in self.headers.get('Transfer-Encoding', ''):
+            self.close_connection = True
+            raise ServiceError(411, "Send the upload with a Content-Length")
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > SERVICE_MAX_UPLOAD_MB * 2**20:
+            self.close_connection = True  # the unread body would garble the next request
+            raise ServiceError(413, f"Upload larger than {SERVICE_MAX_UPLOAD_MB} MB")
+        return self.rfile.read(length)
+    
+    def _submit(self, params, body):
+        client = self.headers.get('X-Client-Id') or params.get('client') or self.client_address[0]
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('application/json'):
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                raise ServiceError(400, f"Invalid JSON: {e}")
+            references = payload.get('references') if isinstance(payload, dict) else payload
+            if not isinstance(references, list) or not all(isinstance(r, str) for r in references):
+                raise ServiceError(400, 'Expected {"references": ["reference text", ...]}')
+            references = [reference.strip() for reference in references if reference.strip()]
+            if not references:
+                raise ServiceError(400, "No references to verify")
+            job = self.service.submit(client, references=references)
+        else:
+            filename = params.get('filename') or self.headers.get('X-Filename') or 'upload.docx'
+            if content_type.startswith('multipart/form-data'):
+                filename, body = _multipart_file(content_type, body)
+            if not body:
+                raise ServiceError(400, "Empty upload")
+            job = self.service.submit(client, data=body, filename=filename)
+        if params.get('wait', '0') != '0':
+            job.finished_event.wait()
+            self._send_json(200 if job.status == 'done' else 422, self.service.describe(job, results=True))
+        else:
+            self._send_json(202, self.service.describe(job), {'Location': f"/jobs/{job.id}"})
+    
+    def _send_report(self, job, name):
+        if name not in SERVICE_REPORT_TYPES:
+            raise ServiceError(404, f"No report named {name}")
+        if job.status != 'done':
+            raise ServiceError(409, f"Job {job.id} is {job.status}")
+        if name not in job.report_files():
+            raise ServiceError(404, f"Job {job.id} has no {name}")
+        with open(os.path.join(job.dir, name), 'rb') as f:
+            data = f.read()
+        self._send(200, data, SERVICE_REPORT_TYPES[name],
+                   {'Content-Disposition': f'attachment; filename="{name}"'})
+    
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8', headers)
+    
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_service_server(service, host=None, port=None):
+    """ThreadingHTTPServer answering the service API for service (port 0 picks a free port)"""
+    handler = type('Handler', (ServiceRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host or SERVICE_HOST, SERVICE_PORT if port is None else port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve(host=None, port=None, **options):
+    """Run the verification service until interrupted (--serve); options go to VerificationService"""
+    service = VerificationService(**options)
+    server = make_service_server(service, host, port)
+    host, port = server.server_address[:2]
+    print(f"Verification service on http://{host}:{port} "
+          f"({service.job_workers} job workers, reports in {service.dir}/)")
+    print(f"  curl -F file=@bibliography.docx 'http://{host}:{port}/jobs?wait=1'")
+    print("Press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping: running jobs finish first, queued jobs are dropped")
+    finally:
+        server.server_close()
+        service.close()
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
+def parse_args():
+    """Parse command-line options (defaults come from the CONFIGURATION section)
+
+    Only the standard library is needed here, so --help and option errors
+    come back before any of the heavy dependencies is imported.
+    """
+    parser = argparse.ArgumentParser(description="Verify an APA bibliography against CrossRef and PubMed")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"references verified concurrently (default: {MAX_WORKERS})")
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL_MODE,
+                        help=f"re-verify only references that changed since the last run ({STATE_FILE})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass the persistent response cache for this run")
+    parser.add_argument("--offline", action="store_true",
+                        help="answer only from the response cache, never query the APIs")
+    parser.add_argument("--cache-file", default=CACHE_FILE,
+                        help=f"response cache location (default: {CACHE_FILE})")
+    parser.add_argument("--ncbi-api-key", default=NCBI_API_KEY,
+                        help="NCBI E-utilities API key (raises the PubMed limit from 3 to 10 requests/s)")
+    parser.add_argument("--transport", choices=["sync", "async"], default=HTTP_TRANSPORT,
+                        help=f"HTTP client backend (default: {HTTP_TRANSPORT}; async needs httpx)")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue an interrupted run from {CHECKPOINT_FILE}")
+    parser.add_argument("--mirror", default=CROSSREF_MIRROR, metavar="PATH",
+                        help="answer CrossRef lookups from a local mirror built with --build-mirror")
+    parser.add_argument("--build-mirror", nargs="+", metavar="DUMP",
+                        help="index CrossRef dump files (.jsonl/.json, optionally .gz) into --mirror and exit")
+    parser.add_argument("--mirror-blocking", action="store_true",
+                        help="also index MinHash LSH buckets of titles in --build-mirror, so "
+                             "misspelled titles still find their work (larger index)")
+    parser.add_argument("--mirror-format", choices=["sqlite", "compact"], default=MIRROR_FORMAT,
+                        help="index built by --build-mirror: SQLite file, or memory-mapped directory "
+                             f"for very large snapshots (default: {MIRROR_FORMAT})")
+    parser.add_argument("--processes", type=int, default=PROCESS_WORKERS,
+                        help="worker processes for parsing and scoring on large corpora "
+                             f"(default: {PROCESS_WORKERS} = in the main process)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="verify repeated citations of one work separately instead of "
+                             "flagging them DUPLICATE_OF_REF_n")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"record per-stage timings and request counts to {PROFILE_FILE} and "
+                             f"{PROFILE_CSV} and list the slowest references")
+    parser.add_argument("--profile-top", type=int, default=PROFILE_TOP, metavar="N",
+                        help=f"slowest references listed with --profile (default: {PROFILE_TOP})")
+    parser.add_argument("--parquet", action="store_true", default=PARQUET_OUTPUT,
+                        help=f"also write the report with the R columns to {PARQUET_FILE} (needs pyarrow)")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="run under cProfile and save the stats to FILE")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="trace memory allocations and report the peak and top allocation sites")
+    parser.add_argument("--input", default=WORD_FILE, metavar="PATH",
+                        help=f"bibliography to verify: .docx, .bib, .ris or .txt (one reference per "
+                             f"line), or - for standard input (default: {WORD_FILE})")
+    parser.add_argument("--output", default=OUTPUT_FILE, metavar="FILE",
+                        help=f"detailed verification report (default: {OUTPUT_FILE})")
+    parser.add_argument("--r-output", default=R_OUTPUT_FILE, metavar="FILE",
+                        help=f"R-compatible report with boolean flags (default: {R_OUTPUT_FILE})")
+    parser.add_argument("--log", default=DETAILED_LOG, metavar="FILE",
+                        help=f"human-readable summary and review list (default: {DETAILED_LOG})")
+    parser.add_argument("--email", default=EMAIL, metavar="ADDRESS",
+                        help=f"contact address sent to CrossRef and PubMed (default: {EMAIL})")
+    parser.add_argument("--title-threshold", type=float, default=TITLE_SIMILARITY_HIGH,
+                        help=f"title similarity for a confident article match (default: {TITLE_SIMILARITY_HIGH})")
+    parser.add_argument("--book-title-threshold", type=float, default=BOOK_TITLE_SIMILARITY_HIGH,
+                        help=f"title similarity for a confident book match (default: {BOOK_TITLE_SIMILARITY_HIGH})")
+    parser.add_argument("--year-tolerance", type=int, default=ALLOW_YEAR_DIFFERENCE, metavar="YEARS",
+                        help=f"years a match may differ by (default: {ALLOW_YEAR_DIFFERENCE})")
+    parser.add_argument("--ancient-cutoff", type=int, default=ANCIENT_TEXT_CUTOFF, metavar="YEAR",
+                        help=f"references before this year are ancient texts, not looked up "
+                             f"(default: {ANCIENT_TEXT_CUTOFF})")
+    parser.add_argument("--extract-only", nargs="?", const=EXTRACTION_FILE, metavar="FILE",
+                        help="parse the input and write the extracted fields to FILE "
+                             f"(default: {EXTRACTION_FILE}) without verifying anything")
+    parser.add_argument("--docx-reader", choices=["stream", "python-docx"], default=DOCX_READER,
+                        help=f"how Word files are read (default: {DOCX_READER})")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB",
+                        help="verify every supported file in a directory (or matching a glob) instead of "
+                             f"{WORD_FILE}; shared references are looked up once")
+    parser.add_argument("--serve", action="store_true",
+                        help="run as a local HTTP/JSON verification service that keeps pools and "
+                             "caches warm between jobs (see --host, --port)")
+    parser.add_argument("--host", default=SERVICE_HOST,
+                        help=f"--serve: address to listen on (default: {SERVICE_HOST})")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT,
+                        help=f"--serve: port to listen on (default: {SERVICE_PORT})")
+    parser.add_argument("--job-workers", type=int, default=SERVICE_JOB_WORKERS,
+                        help=f"--serve: jobs verified at the same time (default: {SERVICE_JOB_WORKERS})")
+    parser.add_argument("--service-dir", default=SERVICE_DIR,
+                        help=f"--serve: where each job's reports are kept (default: {SERVICE_DIR})")
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR,
+                        help=f"where --batch writes one report folder per document (default: {BATCH_OUTPUT_DIR})")
+    args = parser.parse_args()
+    if args.no_cache and args.offline:
+        parser.error("--offline needs the cache; drop --no-cache")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if input_format(args.input) not in INPUT_READERS:
+        parser.error(f"--input: unsupported format '{input_format(args.input)}' "
+                     f"(use {', '.join(INPUT_READERS)} or - for standard input)")
+    if args.processes < 0:
+        parser.error("--processes cannot be negative")
+    if args.job_workers < 1:
+        parser.error("--job-workers must be at least 1")
+    if args.serve and args.batch:
+        parser.error("--serve and --batch cannot be combined")
+    if args.extract_only and (args.serve or args.batch):
+        parser.error("--extract-only reads a single --input; drop --serve/--batch")
+    if "@" not in args.email:
+        parser.error(f"--email: '{args.email}' is not an email address")
+    for option, value, low in [("--title-threshold", args.title_threshold, TITLE_SIMILARITY_LOW),
+                               ("--book-title-threshold", args.book_title_threshold, BOOK_TITLE_SIMILARITY_LOW)]:
+        if not low < value <= 1:
+            parser.error(f"{option} must be above the partial-match threshold {low} and at most 1")
+    if args.year_tolerance < 0:
+        parser.error("--year-tolerance cannot be negative")
+    if args.build_mirror and not args.mirror:
+        parser.error("--build-mirror needs --mirror PATH for the index it writes")
+    if args.parquet:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--parquet needs pyarrow: pip install pyarrow")
+    return args
+
+def main_batch(args):
+    """--batch: verify many documents with shared lookups; returns the exit status"""
+    word_files = find_documents(args.batch)
+    if not word_files:
+        print(f"\n✗ Error: No bibliography files found for '{args.batch}'")
+        return 1
+    try:
+        outcomes = run_batch(word_files, args.output_dir, max_workers=args.workers,
+                             incremental=args.incremental, resume=args.resume,
+                             processes=args.processes,
+                             detect_duplicates=not args.keep_duplicates,
+                             profile=args.profile, parquet=args.parquet)
+    except KeyboardInterrupt:
+        print("\n✗ Interrupted - finished references are saved in each document's checkpoint file")
+        print("  Re-run with --resume to continue where this run stopped")
+        return 1
+    
+    print("\n" + "="*70)
+    print(f"✓ BATCH VERIFICATION COMPLETE! ({len(outcomes)} documents)")
+    print("="*70)
+    for word_file, (stats, _) in outcomes.items():
+        print(f"  {word_file}: {stats.total} references, "
+              f"{stats.status_counts['NEEDS_REVIEW']} need review")
+    print(f"\nPer-document reports and batch_summary.csv are in: {args.output_dir}")
+    if args.profile:
+        print(f"Run profiles: {PROFILE_FILE} and {PROFILE_CSV} in each document's folder")
+    if args.parquet:
+        print(f"Parquet reports: {PARQUET_FILE} in each document's folder")
+    print("="*70 + "\n")
+    return 0
+
 if __name__ == "__main__":
+    args = parse_args()
+    CACHE_ENABLED = CACHE_ENABLED and not args.no_cache
+    CACHE_OFFLINE = CACHE_OFFLINE or args.offline
+    CACHE_FILE = args.cache_file
+    NCBI_API_KEY = args.ncbi_api_key
+    HTTP_TRANSPORT = args.transport
+    DOCX_READER = args.docx_reader
+    WORD_FILE = args.input
+    OUTPUT_FILE = args.output
+    R_OUTPUT_FILE = args.r_output
+    DETAILED_LOG = args.log
+    EMAIL = args.email
+    TITLE_SIMILARITY_HIGH = args.title_threshold
+    BOOK_TITLE_SIMILARITY_HIGH = args.book_title_threshold
+    ALLOW_YEAR_DIFFERENCE = args.year_tolerance
+    ANCIENT_TEXT_CUTOFF = args.ancient_cutoff
+    CROSSREF_MIRROR = args.mirror
+    
+    if args.build_mirror:
+        print(f"Building CrossRef mirror {CROSSREF_MIRROR} from {len(args.build_mirror)} dump file(s)...")
+        started = time.time()
+        mirror_class = CompactMirror if args.mirror_format == "compact" else CrossrefMirror
+        blocker = TitleBlocker() if args.mirror_blocking else None
+        indexed = mirror_class.build(CROSSREF_MIRROR, args.build_mirror, blocker=blocker)
+        print(f"✓ {indexed:,} works indexed in {time.time() - started:.1f}s")
+        sys.exit(0)
+    
+    if args.extract_only:
+        try:
+            _, extraction_failures = export_extracted_references(WORD_FILE, args.extract_only)
+        except FileNotFoundError:
+            print(f"\n✗ Error: Could not find '{WORD_FILE}'")
+            sys.exit(1)
+        export_extraction_failures(extraction_failures, EXTRACTION_FAILURES_LOG)
+        sys.exit(0)
+    
     print("\n" + "="*70)
     print("BIBLIOGRAPHY VERIFICATION TOOL - PRODUCTION VERSION")
     print("="*70)
@@ -712,57 +5172,57 @@ if __name__ == "__main__":
     print(f"  • Ancient text cutoff: <{ANCIENT_TEXT_CUTOFF}")
     print(f"  • Book title threshold: {BOOK_TITLE_SIMILARITY_HIGH}")
     print(f"  • Article title threshold: {TITLE_SIMILARITY_HIGH}")
-    print(f"  • CrossRef session: Enabled with exponential backoff")
+    if CROSSREF_MIRROR:
+        print(f"  • CrossRef source: local mirror {CROSSREF_MIRROR} (no CrossRef API calls)")
+    else:
+        print(f"  • CrossRef session: Enabled with exponential backoff ({HTTP_TRANSPORT} transport)")
     print(f"  • Reference filtering: Enabled (headers removed)")
+    print(f"  • Concurrent workers: {args.workers}")
+    if args.processes > 1:
+        print(f"  • Worker processes (parse/score): {args.processes}")
+    if args.keep_duplicates:
+        print(f"  • Duplicate citations: verified separately")
+    print(f"  • Response cache: {CACHE_FILE if CACHE_ENABLED else 'Disabled'}"
+          f"{' (offline only)' if CACHE_OFFLINE else ''}")
     print()
     
+    if args.serve:
+        serve(args.host, args.port, service_dir=args.service_dir, job_workers=args.job_workers,
+              max_workers=args.workers, processes=args.processes,
+              detect_duplicates=not args.keep_duplicates, parquet=args.parquet)
+        sys.exit(0)
+    
+    if args.batch:
+        with hot_path_profiler(args.cprofile, args.tracemalloc):
+            status = main_batch(args)
+        sys.exit(status)
+    
     
 
     try:
-        # Run verification
-        df_results, extraction_failures = verify_bibliography(WORD_FILE)
-        
-        # Generate reports
-        generate_report(df_results, OUTPUT_FILE, DETAILED_LOG, EXTRACTION_FAILURES_LOG)
-        export_for_r(df_results, R_OUTPUT_FILE)
+        # Run verification, writing report rows as references finish
+        profile = RunProfile(WORD_FILE) if args.profile else None
+        with hot_path_profiler(args.cprofile, args.tracemalloc):
+            stats, extraction_failures = run_verification(WORD_FILE, OUTPUT_FILE, R_OUTPUT_FILE, DETAILED_LOG,
+                                                          parquet_file=PARQUET_FILE if args.parquet else None,
+                                                          max_workers=args.workers,
+                                                          incremental=args.incremental,
+                                                          resume=args.resume,
+                                                          processes=args.processes,
+                                                          detect_duplicates=not args.keep_duplicates,
+                                                          profile=profile)
         export_extraction_failures(extraction_failures, EXTRACTION_FAILURES_LOG)
+        if profile is not None:
+            profile.write(PROFILE_FILE, PROFILE_CSV)
+            print("\n" + "\n".join(profile.report_lines(args.profile_top)))
 
         # === PRINT ONLY KEY SUMMARY SECTIONS TO CONSOLE ===
-        try:
-            with open(DETAILED_LOG, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            sections_to_print = []
-            capture = False
-            wanted_headers = [
-                "OVERALL STATISTICS:",
-                "REFERENCE TYPES:",
-                "VERIFICATION STATUS BY REFERENCE TYPE:"
-            ]
-
-            for line in lines:
-                if any(h in line for h in wanted_headers):
-                    capture = True
-                    sections_to_print.append("\n" + line.rstrip())
-                    continue
-                if capture:
-                    # Stop capturing when we hit another all-caps header
-                    if line.strip().isupper() and line.strip().endswith(":") and line.strip() not in wanted_headers:
-                        capture = False
-                    else:
-                        sections_to_print.append(line.rstrip())
-
-            print("\n" + "="*70)
-            print("SUMMARY (Key Metrics Only)")
-            print("="*70)
-            for ln in sections_to_print:
-                print(ln)
-            print("="*70)
-        except Exception as e_summary:
-            print(f"(Could not print summary sections: {e_summary})")
-
-
-
+        # (from the in-memory totals; the log file is not read back)
+        print("\n" + "="*70)
+        print("SUMMARY (Key Metrics Only)")
+        print("="*70)
+        print("\n".join(stats.summary_lines()))
+        print("="*70)
         
         print("\n" + "="*70)
         print("✓ VERIFICATION COMPLETE!")
@@ -777,6 +5237,12 @@ if __name__ == "__main__":
         if extraction_failures:
             print(f"  4. {EXTRACTION_FAILURES_LOG}")
             print(f"     → References with extraction issues for debugging")
+        if args.parquet:
+            print(f"  • {PARQUET_FILE}")
+            print(f"     → Report with the R columns in Parquet (typed columns, for Arrow/pandas/DuckDB)")
+        if profile is not None:
+            print(f"  • {PROFILE_FILE} / {PROFILE_CSV}")
+            print(f"     → Stage timings, request counts and cache status per reference")
         
         print(f"\nNext steps for peer review:")
         print(f"  • Review items marked 'NEEDS_REVIEW' in {DETAILED_LOG}")
@@ -788,9 +5254,12 @@ if __name__ == "__main__":
         print(f"    refs %>% filter(Needs_Manual_Check) %>% view()")
         print("="*70 + "\n")
         
+    except KeyboardInterrupt:
+        print(f"\n✗ Interrupted - finished references are saved in '{CHECKPOINT_FILE}'")
+        print("  Re-run with --resume to continue where this run stopped")
     except FileNotFoundError:
         print(f"\n✗ Error: Could not find '{WORD_FILE}'")
-        print("  Please ensure the Word file is in the same directory as this script")
+        print("  Please ensure the file exists, or pass its path with --input")
     except Exception as e:
         print(f"\n✗ Error: {str(e)}")
         import traceback